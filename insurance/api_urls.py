@@ -4,6 +4,7 @@ from .api_view.customer_view import CustomerView
 from .api_view.insurance_policy_view import InsurancePolicyView
 from .api_view.payment_view import PaymentView
 from .api_view.analytics_view import AnalyticsView
+from .api_view.search_view import AutocompleteView, SearchView
 
 router = DefaultRouter()
 router.register(r'customers', CustomerView, basename="customer")
@@ -11,5 +12,7 @@ router.register(r'policies', InsurancePolicyView,  basename="policy")
 router.register(r'claims', ClaimView,  basename="claim")
 router.register(r'payments', PaymentView,  basename="payment")
 router.register(r'analytics', AnalyticsView, basename="analytics")
+router.register(r'search', SearchView, basename="search")
+router.register(r'autocomplete', AutocompleteView, basename="autocomplete")
 
 urlpatterns = router.urls
@@ -6,18 +6,32 @@ from drf_yasg import openapi
 import pandas as pd
 
 from ..repository.unit_of_work import UnitOfWork
-from ..parallel_db.optimizer import DatabaseOptimizer
+from ..parallel_db.jobs import (
+    parse_optimization_params, parse_job_params, submit_optimization_job,
+    get_optimization_job, cancel_optimization_job
+)
+from ..parallel_db.history import experiment_history
+from ..parallel_db.plans import PLAN_QUERIES, capture_plans, plan_overview
+from ..parallel_db.search import STRATEGIES
+from ..serializers import OptimizationJobSerializer
 
 
 class AnalyticsView(viewsets.ViewSet):
     permission_classes = [permissions.AllowAny]
+    # Only the read-only aggregates go to a replica. Jobs and query plans
+    # stay on the primary: a plan capture must EXPLAIN every query on the
+    # same server, and a job poll must see the job its submit just wrote.
+    replica_actions = (
+        'payments_by_month', 'avg_claim_by_age_group', 'claims_per_customer', 'policy_profit_by_type',
+        'time_to_claim', 'top_customers_by_payouts', 'counts',
+    )
 
     @action(detail=False, methods=['get'], url_path='payments-by-month')
     def payments_by_month(self, request):
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
         policy_type = request.query_params.get('policy_type')
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.payments.payments_by_month(date_from=date_from, date_to=date_to, policy_type=policy_type)
             data = list(qs)
         df = pd.DataFrame(data)
@@ -40,7 +54,7 @@ class AnalyticsView(viewsets.ViewSet):
     def avg_claim_by_age_group(self, request):
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.claims.avg_claim_by_age_group(date_from=date_from, date_to=date_to)
             data = list(qs)
         df = pd.DataFrame(data)
@@ -68,7 +82,7 @@ class AnalyticsView(viewsets.ViewSet):
     @action(detail=False, methods=['get'], url_path='claims-per-customer')
     def claims_per_customer(self, request):
         only_with_claims = request.query_params.get('only_with_claims', 'false').lower() in ('1', 'true', 'yes')
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.claims.claims_per_customer(only_with_claims=only_with_claims)
             data = list(qs)
         df = pd.DataFrame(data)
@@ -92,7 +106,7 @@ class AnalyticsView(viewsets.ViewSet):
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
         try:
-            with UnitOfWork() as repo:
+            with UnitOfWork(read_only=True) as repo:
                 qs = repo.policies.policy_profit_by_type(date_from=date_from, date_to=date_to)
                 data = list(qs)
         except Exception as e:
@@ -116,7 +130,7 @@ class AnalyticsView(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'], url_path='time-to-claim')
     def time_to_claim(self, request):
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.policies.time_to_first_claim_per_policy()
             data = list(qs)
 
@@ -152,7 +166,7 @@ class AnalyticsView(viewsets.ViewSet):
         threshold = float(threshold_param) if threshold_param is not None else None
         date_from = request.query_params.get('date_from')
         date_to = request.query_params.get('date_to')
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.payments.top_customers_by_payouts(limit=limit, threshold=threshold, date_from=date_from,
                                                         date_to=date_to)
             data = list(qs)
@@ -178,43 +192,81 @@ class AnalyticsView(viewsets.ViewSet):
     @action(detail=False, methods=['post'], url_path='db-optimization')
     def db_optimization(self, request):
         try:
-            num_queries = int(request.data.get('num_queries', 150))
-            num_queries = max(100, min(200, num_queries))
-            
-            num_workers_range = request.data.get('num_workers_range', [1, 2, 4, 8, 16])
-            batch_sizes = request.data.get('batch_sizes', [10, 25, 50, 100])
-            test_threads = request.data.get('test_threads', True)
-            test_processes = request.data.get('test_processes', False)
-            
-            optimizer = DatabaseOptimizer(num_queries=num_queries)
-            results = optimizer.run_experiments(
-                num_workers_range=num_workers_range,
-                batch_sizes=batch_sizes,
-                test_threads=test_threads,
-                test_processes=test_processes
+            params = parse_optimization_params(request.data)
+        except ValueError as e:
+            return Response(
+                {'error': str(e), 'strategies': list(STRATEGIES)},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            optimal_config = optimizer.find_optimal_config(results)
-            
-            return Response({
-                'optimal_config': optimal_config.get('optimal_config', {}),
-                'all_results': optimal_config.get('all_results', []),
-                'avg_time_by_workers': optimal_config.get('avg_time_by_workers', {}),
-                'best_result': optimal_config.get('best_result', {}),
-                'meta': {
-                    'total_experiments': len(results),
-                    'num_queries': num_queries,
-                }
-            })
-        except Exception as e:
+        # Runs as a background job like db-optimization/jobs, so the request
+        # does not hold a server worker for the whole experiment.
+        job = submit_optimization_job(params)
+        return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'], url_path='db-optimization/jobs')
+    def submit_db_optimization_job(self, request):
+        try:
+            params = parse_job_params(request.data)
+        except ValueError as e:
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': str(e), 'strategies': list(STRATEGIES)},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        job = submit_optimization_job(params)
+        return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'db-optimization/jobs/(?P<job_id>[0-9]+)')
+    def db_optimization_job(self, request, job_id=None):
+        job = get_optimization_job(int(job_id))
+        if job is None:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(OptimizationJobSerializer(job).data)
+
+    @action(detail=False, methods=['post'], url_path=r'db-optimization/jobs/(?P<job_id>[0-9]+)/cancel')
+    def cancel_db_optimization_job(self, request, job_id=None):
+        if not cancel_optimization_job(int(job_id)):
+            job = get_optimization_job(int(job_id))
+            if job is None:
+                return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'error': 'Job already finished', 'status': job.status},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({'job_id': int(job_id), 'cancel_requested': True}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path='db-optimization/history')
+    def db_optimization_history(self, request):
+        try:
+            limit = max(1, min(200, int(request.query_params.get('limit', 20))))
+            num_queries = request.query_params.get('num_queries')
+            num_queries = int(num_queries) if num_queries else None
+        except ValueError:
+            return Response({'error': 'limit and num_queries must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        history = experiment_history(limit=limit, num_queries=num_queries)
+        return Response(history)
+
+    @action(detail=False, methods=['get', 'post'], url_path='query-plans',
+            permission_classes=[permissions.IsAdminUser])
+    def query_plans(self, request):
+        if request.method == 'POST':
+            queries = request.data.get('queries') or None
+            if queries is not None and not isinstance(queries, list):
+                queries = [queries]
+            try:
+                captured = capture_plans(queries)
+            except ValueError as e:
+                return Response({'error': str(e), 'queries': list(PLAN_QUERIES)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'captured': captured}, status=status.HTTP_201_CREATED)
+        name = request.query_params.get('name')
+        if name and name not in PLAN_QUERIES:
+            return Response({'error': 'Unknown query', 'queries': list(PLAN_QUERIES)}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            limit = max(1, min(200, int(request.query_params.get('limit', 20))))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(plan_overview(name, limit))
 
     @action(detail=False, methods=['get'], url_path='counts')
     def counts(self, request):
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             data = {
                 'policies_count': repo.policies.count(),
                 'customers_count': repo.customers.count(),
@@ -6,16 +6,27 @@ from drf_yasg import openapi
 
 from insurance.model.claim import Claim
 from ..repository.unit_of_work import UnitOfWork
+from .update import RepositoryUpdateMixin
+from .expand import apply_expand, expand_data, parse_expand
 from ..serializers import (
-    ClaimSerializer
+    ClaimSerializer,
+    ClaimFullViewSerializer,
 )
 
 
-class ClaimView(viewsets.ModelViewSet):
+class ClaimView(RepositoryUpdateMixin, viewsets.ModelViewSet):
     # permission_classes = [permissions.AllowAny]
+    repository = 'claims'
+    not_found_error = 'Claim not found'
     with UnitOfWork() as repo:
         queryset = repo.claims.get_all()
     serializer_class = ClaimSerializer
+    replica_actions = ('list', 'retrieve', 'full_view')
+    # ?expand= options for list() and find_by_customer; see api_view/expand.py.
+    expansions = {
+        'policy': {'policy_number': 'policy__policy_number'},
+        'customer': {'customer_id': 'policy__customer_id', 'customer_full_name': 'policy__customer__full_name'},
+    }
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -27,28 +38,40 @@ class ClaimView(viewsets.ModelViewSet):
             page = 1
         if page_size < 1:
             page_size = 10
-        with UnitOfWork() as repo:
+        try:
+            expand = parse_expand(request, self.expansions)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.claims.get_all()
             total = qs.count()
             start = (page - 1) * page_size
             end = start + page_size
-            items = list(qs.order_by('id')[start:end])
+            items = list(apply_expand(qs, self.expansions, expand).order_by('id')[start:end])
             serializer = self.serializer_class(items, many=True)
             total_pages = (total + page_size - 1) // page_size if page_size else 1
             return Response({
-                'items': serializer.data,
+                'items': expand_data(items, serializer.data, self.expansions, expand),
                 'total': total,
                 'page': page,
                 'page_size': page_size,
                 'total_pages': total_pages,
             })
 
+    @action(detail=True, methods=['get'], url_path='full')
+    def full_view(self, request, pk=None):
+        with UnitOfWork(read_only=True) as repo:
+            claim = repo.claims.get_full_view(pk)
+            if claim is None:
+                return Response({"error": "Claim not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(ClaimFullViewSerializer(claim).data)
+
     @action(detail=False, methods=['get'])
     def find_by_policy(self, request):
         policy_id = request.query_params.get('policy_id')
         if not policy_id:
             return Response({"error": "Missing policy_id"}, status=status.HTTP_400_BAD_REQUEST)
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             claims = repo.claims.find_by_policy(policy_id)
             serializer = self.serializer_class(claims, many=True)
             return Response(serializer.data)
@@ -64,22 +87,27 @@ class ClaimView(viewsets.ModelViewSet):
             page = 1
         if page_size < 1:
             page_size = 10
-        with UnitOfWork() as repo:
+        try:
+            expand = parse_expand(request, self.expansions)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.claims.find_by_customer(customer_id)
             # qs may be a QuerySet or list; ensure QuerySet-like slicing
             try:
                 total = qs.count()
-                ordered = qs.order_by('id')
+                ordered = apply_expand(qs, self.expansions, expand).order_by('id')
             except Exception:
                 ordered = list(qs)
                 total = len(ordered)
+                expand = []
             start = (page - 1) * page_size
             end = start + page_size
-            items = ordered[start:end]
+            items = list(ordered[start:end])
             serializer = self.serializer_class(items, many=True)
             total_pages = (total + page_size - 1) // page_size if page_size else 1
             return Response({
-                'items': serializer.data,
+                'items': expand_data(items, serializer.data, self.expansions, expand),
                 'total': total,
                 'page': page,
                 'page_size': page_size,
@@ -88,5 +116,5 @@ class ClaimView(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def count(self, request):
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             return Response({"count": repo.claims.count()})
@@ -1,21 +1,34 @@
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework import viewsets, permissions
 from insurance.model.customer import Customer
+from ..metrics import record_cache
 from ..serializers import (
-    CustomerSerializer
+    CustomerSerializer,
+    CustomerSummarySerializer,
 )
 from rest_framework.decorators import action
 from drf_yasg.utils import swagger_auto_schema
 from ..repository.unit_of_work import UnitOfWork
+from .update import RepositoryUpdateMixin
 from rest_framework.response import Response
 from drf_yasg import openapi
 from rest_framework import status
 
+SUMMARY_CACHE_PREFIX = 'customer-summary:'
+# settings.CACHES alias shared by all worker processes, so an update or
+# delete on one worker drops the summary for all of them.
+SUMMARY_CACHE = 'customer-summary'
 
-class CustomerView(viewsets.ModelViewSet):
+
+class CustomerView(RepositoryUpdateMixin, viewsets.ModelViewSet):
     # permission_classes = [permissions.AllowAny]
+    repository = 'customers'
+    not_found_error = 'Customer not found'
     serializer_class = CustomerSerializer
     with UnitOfWork() as repo:
         queryset = repo.customers.get_all()
+    replica_actions = ('list', 'retrieve', 'summary', 'cached_summary')
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -27,7 +40,7 @@ class CustomerView(viewsets.ModelViewSet):
             page = 1
         if page_size < 1:
             page_size = 10
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.customers.get_all()
             total = qs.count()
             start = (page - 1) * page_size
@@ -44,7 +57,7 @@ class CustomerView(viewsets.ModelViewSet):
             })
 
     def retrieve(self, request, pk=None, *args, **kwargs):
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             policy = repo.customers.get_by_id(pk)
             if not policy:
                 return Response({"error": "Policy not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -60,41 +73,55 @@ class CustomerView(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def update(self, request, pk=None, *args, **kwargs):
-        partial = kwargs.pop('partial', False)
-        with UnitOfWork() as repo:
-            instance = repo.customers.get_by_id(pk)
-            if not instance:
-                return Response({"error": "Policy not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = self.serializer_class(instance, data=request.data, partial=partial)
-        if serializer.is_valid():
-            with UnitOfWork() as repo:
-                updated = repo.customers.update(pk, **serializer.validated_data)
-            return Response(self.serializer_class(updated).data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    def partial_update(self, request, pk=None, *args, **kwargs):
-        kwargs['partial'] = True
-        return self.update(request, pk, *args, **kwargs)
+        response = super().update(request, pk, *args, **kwargs)
+        caches[SUMMARY_CACHE].delete(f'{SUMMARY_CACHE_PREFIX}{pk}')
+        return response
 
     def destroy(self, request, pk=None, *args, **kwargs):
         with UnitOfWork() as repo:
             deleted = repo.customers.delete(pk)
+        caches[SUMMARY_CACHE].delete(f'{SUMMARY_CACHE_PREFIX}{pk}')
         if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({"error": "Policy not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    def _summary_data(self, pk):
+        with UnitOfWork(read_only=True) as repo:
+            customer = repo.customers.get_summary(pk)
+            return CustomerSummarySerializer(customer).data if customer else None
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        data = self._summary_data(pk)
+        if data is None:
+            return Response({"error": "Customer not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    @action(detail=True, methods=['get'], url_path='summary/cached')
+    def cached_summary(self, request, pk=None):
+        # Dropped when the customer is updated or deleted; new claims and
+        # payments show up once the entry expires.
+        key = f'{SUMMARY_CACHE_PREFIX}{pk}'
+        data = caches[SUMMARY_CACHE].get(key)
+        record_cache('customer_summary', data is not None)
+        if data is None:
+            data = self._summary_data(pk)
+            if data is None:
+                return Response({"error": "Customer not found"}, status=status.HTTP_404_NOT_FOUND)
+            caches[SUMMARY_CACHE].set(key, data, getattr(settings, 'CUSTOMER_SUMMARY_CACHE_SECONDS', 60))
+        return Response(data)
+
     @action(detail=False, methods=['get'])
     def find_by_tax_number(self, request):
         tax_number = request.query_params.get('tax_number')
         if not tax_number:
             return Response({"error": "Missing tax_number"}, status=status.HTTP_400_BAD_REQUEST)
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             customer = repo.customers.find_by_tax_number(tax_number)
             serializer = self.serializer_class(customer)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def count(self, request):
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             return Response({"count": repo.customers.count()})
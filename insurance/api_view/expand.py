@@ -0,0 +1,37 @@
+from typing import Dict, List
+
+from django.db.models import F
+
+
+# expand= option -> {output key: lookup path}. Each option adds joined
+# display columns to the list query itself instead of one lookup per row.
+Expansions = Dict[str, Dict[str, str]]
+
+
+def parse_expand(request, available: Expansions) -> List[str]:
+    """
+    Returns the requested options in order, or raises ValueError naming the
+    first one the endpoint does not offer.
+    """
+    names = []
+    for name in request.query_params.get('expand', '').split(','):
+        name = name.strip()
+        if not name or name in names:
+            continue
+        if name not in available:
+            raise ValueError(f"Unknown expand option '{name}'. Choose from: {', '.join(available)}")
+        names.append(name)
+    return names
+
+
+def apply_expand(qs, available: Expansions, names: List[str]):
+    annotations = {key: F(path) for name in names for key, path in available[name].items()}
+    return qs.annotate(**annotations) if annotations else qs
+
+
+def expand_data(items, data: List[dict], available: Expansions, names: List[str]) -> List[dict]:
+    keys = [key for name in names for key in available[name]]
+    for obj, row in zip(items, data):
+        for key in keys:
+            row[key] = getattr(obj, key)
+    return data
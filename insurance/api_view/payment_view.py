@@ -7,14 +7,25 @@ from ..serializers import (
     PaymentSerializer,
 )
 from ..repository.unit_of_work import UnitOfWork
-from rest_framework import permissions
+from .update import RepositoryUpdateMixin
+from .expand import apply_expand, expand_data, parse_expand
+from rest_framework import permissions, status
 
 
-class PaymentView(viewsets.ModelViewSet):
+class PaymentView(RepositoryUpdateMixin, viewsets.ModelViewSet):
     # permission_classes = [permissions.AllowAny]
+    repository = 'payments'
+    not_found_error = 'Payment not found'
     with UnitOfWork() as repo:
         queryset = repo.payments.get_all()
     serializer_class = PaymentSerializer
+    # ?expand= options for list(); see api_view/expand.py.
+    expansions = {
+        'claim': {'claim_date': 'claim__claim_date'},
+        'policy': {'policy_id': 'claim__policy_id', 'policy_number': 'claim__policy__policy_number'},
+        'customer': {'customer_id': 'claim__policy__customer_id',
+                     'customer_full_name': 'claim__policy__customer__full_name'},
+    }
 
     def list(self, request, *args, **kwargs):
         page = int(request.query_params.get('page', 1) or 1)
@@ -23,16 +34,20 @@ class PaymentView(viewsets.ModelViewSet):
             page = 1
         if page_size < 1:
             page_size = 10
-        with UnitOfWork() as repo:
+        try:
+            expand = parse_expand(request, self.expansions)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        with UnitOfWork(read_only=True) as repo:
             qs = repo.payments.get_all()
             total = qs.count()
             start = (page - 1) * page_size
             end = start + page_size
-            items = list(qs.order_by('id')[start:end])
+            items = list(apply_expand(qs, self.expansions, expand).order_by('id')[start:end])
             serializer = self.serializer_class(items, many=True)
             total_pages = (total + page_size - 1) // page_size if page_size else 1
             return Response({
-                'items': serializer.data,
+                'items': expand_data(items, serializer.data, self.expansions, expand),
                 'total': total,
                 'page': page,
                 'page_size': page_size,
@@ -41,5 +56,5 @@ class PaymentView(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def count(self, request):
-        with UnitOfWork() as repo:
+        with UnitOfWork(read_only=True) as repo:
             return Response({"count": repo.payments.count()})
\ No newline at end of file
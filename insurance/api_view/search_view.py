@@ -0,0 +1,81 @@
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+
+from ..repository.search import MIN_QUERY_LENGTH, decode_cursor, encode_cursor, sort_key
+from ..repository.unit_of_work import UnitOfWork
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+KINDS = ('customer', 'policy')
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_KINDS = ('customer', 'policy', 'claim')
+
+
+class SearchView(viewsets.ViewSet):
+    replica_actions = '__all__'
+
+    def list(self, request):
+        """
+        GET /api/search/?q=<text>[&kind=customer|policy][&limit=N][&after=<next>]
+        Customers by name, email or tax number and policies by number, best
+        match first. Pass the returned `next` as `after` for the following page.
+        """
+        query = request.query_params.get('q', '').strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return Response({'error': f'q must be at least {MIN_QUERY_LENGTH} characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        kind = request.query_params.get('kind')
+        if kind and kind not in KINDS:
+            return Response({'error': f"Unknown kind '{kind}'. Choose from: {', '.join(KINDS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+            after = request.query_params.get('after')
+            after = decode_cursor(after) if after else None
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Each kind's best limit + 1 rows after the cursor contain the merged
+        # page and tell whether there is another one.
+        rows = []
+        with UnitOfWork(read_only=True) as repo:
+            if kind in (None, 'customer'):
+                rows += repo.customers.search(query, limit + 1, after)
+            if kind in (None, 'policy'):
+                rows += repo.policies.search(query, limit + 1, after)
+        rows.sort(key=sort_key)
+        items = rows[:limit]
+        return Response({
+            'items': items,
+            'next': encode_cursor(items[-1]) if len(rows) > limit else None,
+        })
+
+
+class AutocompleteView(viewsets.ViewSet):
+    replica_actions = '__all__'
+
+    def list(self, request):
+        """
+        GET /api/autocomplete/?kind=customer|policy|claim&q=<text>
+        At most AUTOCOMPLETE_LIMIT {id, label} pairs for the form widgets.
+        Queries too short for the trigram indexes return nothing, except a
+        claim id.
+        """
+        kind = request.query_params.get('kind')
+        if kind not in AUTOCOMPLETE_KINDS:
+            return Response({'error': f"Unknown kind '{kind}'. Choose from: {', '.join(AUTOCOMPLETE_KINDS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        query = request.query_params.get('q', '').strip()
+        searchable = len(query) >= MIN_QUERY_LENGTH
+        items = []
+        with UnitOfWork(read_only=True) as repo:
+            if kind == 'customer' and searchable:
+                items = [{'id': row['id'], 'label': f"{row['full_name']} ({row['tax_number']})"}
+                         for row in repo.customers.search(query, AUTOCOMPLETE_LIMIT)]
+            elif kind == 'policy' and searchable:
+                items = [{'id': row['id'], 'label': row['policy_number']}
+                         for row in repo.policies.search(query, AUTOCOMPLETE_LIMIT)]
+            elif kind == 'claim' and (searchable or query.isdigit()):
+                items = [{'id': claim.id, 'label': str(claim)}
+                         for claim in repo.claims.autocomplete(query, AUTOCOMPLETE_LIMIT, by_policy=searchable)]
+        return Response({'items': items})
@@ -0,0 +1,46 @@
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..repository.unit_of_work import UnitOfWork
+
+
+class RepositoryUpdateMixin:
+    """
+    PUT/PATCH for a ModelViewSet through its UnitOfWork repository. Set
+    `repository` to the unit's attribute (e.g. 'customers') and
+    `not_found_error` to the 404 message.
+    """
+    repository = ''
+    not_found_error = 'Not found'
+
+    def update(self, request, pk=None, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        model = self.serializer_class.Meta.model
+        try:
+            pk = model._meta.pk.to_python(pk)
+        except ValidationError:
+            return self.not_found()
+        # The unique validators only need the pk, so a stand-in instance saves
+        # loading the row; the write is a single UPDATE ... RETURNING of the
+        # validated fields, and matching no row means 404.
+        serializer = self.serializer_class(model(pk=pk), data=request.data, partial=partial)
+        if not serializer.is_valid():
+            # A missing row is still a 404, whatever the payload; the lookup
+            # is only paid on this error path.
+            with UnitOfWork(read_only=True) as repo:
+                if getattr(repo, self.repository).get_by_id(pk) is None:
+                    return self.not_found()
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with UnitOfWork() as repo:
+            updated = getattr(repo, self.repository).update(pk, **serializer.validated_data)
+        if updated is None:
+            return self.not_found()
+        return Response(self.serializer_class(updated).data)
+
+    def not_found(self):
+        return Response({"error": self.not_found_error}, status=status.HTTP_404_NOT_FOUND)
+
+    def partial_update(self, request, pk=None, *args, **kwargs):
+        kwargs['partial'] = True
+        return self.update(request, pk, *args, **kwargs)
@@ -0,0 +1,142 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Viewset actions served from a replica unless the view sets `replica_actions`
+# ('__all__' routes every action).
+REPLICA_ACTIONS = ('list', 'retrieve')
+_PIN_PREFIX = 'db-pin:'
+# settings.CACHES alias shared by all worker processes (a database cache).
+PIN_CACHE = 'replica-pin'
+# Credentials and sessions are always read from the primary, so a user can
+# log in right after registering. The database cache holds the pins, which
+# must not lag either.
+PRIMARY_ONLY_APPS = ('auth', 'sessions', 'contenttypes', 'admin', 'token_blacklist', 'django_cache')
+
+
+@dataclass
+class Routing:
+    replica: Optional[str] = None
+    wrote: bool = False
+
+
+_routing: ContextVar[Optional[Routing]] = ContextVar('insurance_db_routing', default=None)
+
+
+def replica_weights() -> Dict[str, int]:
+    return {alias: weight for alias, weight in getattr(settings, 'DATABASE_REPLICA_WEIGHTS', {}).items()
+            if weight > 0}
+
+
+def choose_replica(rng=random) -> Optional[str]:
+    weights = replica_weights()
+    if not weights:
+        return None
+    aliases = list(weights)
+    return rng.choices(aliases, weights=[weights[alias] for alias in aliases])[0]
+
+
+def read_alias() -> str:
+    # Once something was written in this context, later reads go to the
+    # primary so they see it.
+    routing = _routing.get()
+    if routing is None or routing.replica is None or routing.wrote:
+        return DEFAULT_DB_ALIAS
+    return routing.replica
+
+
+@contextmanager
+def route_reads(replica: Optional[str]):
+    routing = Routing(replica)
+    token = _routing.set(routing)
+    try:
+        yield routing
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Reads inside the block go to a replica. An enclosing routing decision
+    (a request, or a unit of work further up) wins, so a request that must
+    read its own writes stays on the primary and one request never mixes
+    replicas.
+    """
+    if _routing.get() is not None:
+        yield read_alias()
+        return
+    with route_reads(choose_replica()):
+        yield read_alias()
+
+
+def wants_replica(view_func, method: str) -> bool:
+    cls = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None)
+    if cls is None or not actions:
+        return False
+    action = actions.get(method.lower())
+    allowed = getattr(cls, 'replica_actions', REPLICA_ACTIONS)
+    return action is not None and (allowed == '__all__' or action in allowed)
+
+
+def client_key(request) -> Optional[str]:
+    # Identifies the client without touching the database: the template
+    # views call the API with the session's JWT, so the token ties both
+    # halves of a page together.
+    auth = request.META.get('HTTP_AUTHORIZATION')
+    if auth:
+        return 'auth:' + hashlib.sha256(auth.encode()).hexdigest()[:32]
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        return 'session:' + hashlib.sha256(session.encode()).hexdigest()[:32]
+    return None
+
+
+def pin_to_primary(request):
+    key = client_key(request)
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    if key and seconds > 0:
+        caches[PIN_CACHE].set(_PIN_PREFIX + key, True, seconds)
+
+
+def is_pinned(request) -> bool:
+    key = client_key(request)
+    return bool(key and caches[PIN_CACHE].get(_PIN_PREFIX + key))
+
+
+class ReplicaRouter:
+    """
+    Reads go wherever the current routing context says (the primary unless a
+    request or read-only unit of work picked a replica); writes and
+    migrations always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        # Writes to primary-only tables are never read from a replica, so
+        # they need no pin. That includes the pin cache itself: looking up
+        # an expired pin deletes its row, which would otherwise renew it.
+        routing = _routing.get()
+        if routing is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication.
+        return db not in getattr(settings, 'DATABASE_REPLICA_WEIGHTS', {})
@@ -1,11 +1,47 @@
 # insurance/forms.py
 from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 from insurance.model.insurance_policy import InsurancePolicy
 from insurance.model.customer import Customer
 from insurance.model.claim import Claim
 from insurance.model.payment import Payment
 
 
+class AutocompleteWidget(forms.TextInput):
+    """
+    Search box for a foreign key that asks GET /api/autocomplete/ for
+    matches as the user types, instead of a <select> of the whole table.
+    The chosen id travels in a hidden input; rendering reads only the
+    currently selected row, for its label.
+    """
+    template_name = 'widgets/autocomplete.html'
+
+    def __init__(self, kind: str, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+
+    def selected_label(self, value) -> str:
+        # ModelChoiceField hands the widget its ModelChoiceIterator as choices.
+        queryset = getattr(getattr(self, 'choices', None), 'queryset', None)
+        if value in (None, '') or queryset is None:
+            return ''
+        try:
+            obj = queryset.filter(pk=value).first()
+        except (ValueError, TypeError, ValidationError):
+            return ''
+        return str(obj) if obj is not None else ''
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget'].update({
+            'kind': self.kind,
+            'label': self.selected_label(value),
+            'url': reverse('autocomplete-list'),
+        })
+        return context
+
+
 class InsurancePolicyForm(forms.ModelForm):
     start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
     end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
@@ -13,6 +49,7 @@ class InsurancePolicyForm(forms.ModelForm):
     class Meta:
         model = InsurancePolicy
         fields = ['policy_number', 'policy_type', 'start_date', 'end_date', 'premium', 'coverage_amount', 'customer']
+        widgets = {'customer': AutocompleteWidget('customer')}
 
 
 class CustomerForm(forms.ModelForm):
@@ -43,6 +80,7 @@ class ClaimForm(forms.ModelForm):
     class Meta:
         model = Claim
         fields = ['policy', 'claim_date', 'amount', 'description']
+        widgets = {'policy': AutocompleteWidget('policy')}
 
 
 class PaymentForm(forms.ModelForm):
@@ -51,3 +89,10 @@ class PaymentForm(forms.ModelForm):
     class Meta:
         model = Payment
         fields = ['amount', 'date', 'claim']
+        widgets = {'claim': AutocompleteWidget('claim')}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Claim.__str__ shows the policy number; labelling the selected claim
+        # then takes one query.
+        self.fields['claim'].queryset = Claim.objects.select_related('policy')
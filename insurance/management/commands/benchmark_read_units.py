@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from insurance.parallel_db.unit_benchmark import format_unit_summary, run_unit_benchmark
+from insurance.repository.unit_of_work import READ_ONLY_MODES
+
+
+class Command(BaseCommand):
+    help = ('Replays the read-only API requests in-process under each READ_ONLY_UNIT_MODE and reports '
+            'database round trips and latency per request.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(READ_ONLY_MODES),
+                            help='Benchmark only this mode (repeatable, default: all)')
+        parser.add_argument('--repetitions', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_unit_benchmark(
+                modes=options['modes'] or READ_ONLY_MODES,
+                repetitions=max(1, options['repetitions']),
+                warmup_runs=max(0, options['warmup']),
+                log=self.stderr.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stderr.write(format_unit_summary(report))
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from insurance.parallel_db.benchmark import BENCHMARKS, DEFAULT_SCALES, format_summary, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Times the repository analytics methods on generated datasets of increasing size '
+            'and reports how each one scales. Generated rows are rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                            help='Dataset sizes, in claims (default: 10000 100000 1000000)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--method', action='append', dest='methods', choices=list(BENCHMARKS),
+                            help='Benchmark only this method (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if any(scale < 1 for scale in options['scales']):
+            raise CommandError('Scales must be positive')
+        try:
+            report = run_benchmarks(
+                scales=options['scales'],
+                seed=options['seed'],
+                methods=options['methods'],
+                repetitions=max(1, options['repetitions']),
+                warmup_runs=max(0, options['warmup']),
+                log=self.stderr.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stderr.write(format_summary(report))
+        if report['super_linear']:
+            self.stderr.write(self.style.WARNING('Super-linear: ' + ', '.join(report['super_linear'])))
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from insurance.parallel_db.plans import PLAN_QUERIES, capture_plans, format_capture
+
+
+class Command(BaseCommand):
+    help = ('Runs the repository analytics queries under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON), '
+            'stores the plans and reports how they differ from the previous capture.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', dest='queries', choices=list(PLAN_QUERIES),
+                            help='Capture only this query (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Compare without storing the new plans')
+        parser.add_argument('--json', action='store_true', help='Print the captures as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            captured = capture_plans(options['queries'], save=not options['dry_run'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(captured, indent=2, cls=DjangoJSONEncoder))
+            return
+        for item in captured:
+            line = format_capture(item)
+            self.stdout.write(self.style.WARNING(line) if item['diff'].get('attention') else line)
@@ -0,0 +1,215 @@
+import math
+import threading
+import weakref
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List['_Metric'] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: '_Metric'):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ShardOwner:
+    # Lives in the thread's local storage; when the thread ends and its
+    # locals are released, the finalizer folds the shard into the metric.
+    __slots__ = ('__weakref__',)
+
+
+class _Metric:
+    """
+    Values live in one dict per thread, written only by that thread, so the
+    hot path takes no lock; a scrape sums the shards. Counters, in-flight
+    gauges and histogram buckets are all additive, which is also what lets
+    the exports of several worker processes be summed by Prometheus. A
+    finished thread's shard is merged into `_retired` and dropped, so
+    short-lived threads do not accumulate.
+    """
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._retired: dict = {}
+        # Reentrant: a finalizer may run while this thread holds the lock.
+        self._lock = threading.RLock()
+        registry.register(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard: dict):
+        with self._lock:
+            self._shards = [s for s in self._shards if s is not shard]
+            for key, value in shard.items():
+                self._retired[key] = self._combine(self._retired.get(key), value)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _merged(self) -> dict:
+        with self._lock:
+            shards = list(self._shards)
+            merged = {key: self._combine(None, value) for key, value in self._retired.items()}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                merged[key] = self._combine(merged.get(key), value)
+        return merged
+
+    def _combine(self, total, value):
+        return value if total is None else total + value
+
+    def _samples(self, merged: dict) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(merged.items())]
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}'] + \
+            self._samples(self._merged())
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, value: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + value
+
+
+class Gauge(_Metric):
+    # Only inc/dec: a gauge summed over thread shards must stay additive.
+    kind = 'gauge'
+
+    def inc(self, value: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels):
+        self.inc(-value, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, then sum and count.
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        state[index] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def _combine(self, total, value):
+        value = list(value)
+        return value if total is None else [a + b for a, b in zip(total, value)]
+
+    def _samples(self, merged: dict) -> List[str]:
+        lines = []
+        for key, state in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                le = (('le', _format_value(float(bound)) if bound != math.inf else '+Inf'),)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}')
+        return lines
+
+
+HTTP_REQUESTS = Counter(
+    'insurance_http_requests_total', 'HTTP requests by URL name, method and status.',
+    ('url_name', 'method', 'status')
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'insurance_http_request_duration_seconds', 'HTTP request latency by URL name and method.',
+    ('url_name', 'method')
+)
+HTTP_IN_FLIGHT = Gauge('insurance_http_requests_in_flight', 'Requests currently being served.')
+
+DB_QUERIES = Counter('insurance_db_queries_total', 'SQL statements executed by request handlers.', ('alias',))
+DB_QUERY_DURATION = Histogram(
+    'insurance_db_query_duration_seconds', 'SQL statement latency in request handlers.', ('alias',),
+    buckets=DB_BUCKETS
+)
+
+CACHE_REQUESTS = Counter('insurance_cache_requests_total', 'Cache lookups by cache name and result.',
+                         ('cache', 'result'))
+
+EXECUTOR_RUNS = Counter('insurance_executor_runs_total', 'ParallelDBExecutor batches executed.', ('mode',))
+EXECUTOR_QUERIES = Counter('insurance_executor_queries_total', 'Queries run by ParallelDBExecutor.',
+                           ('mode', 'outcome'))
+EXECUTOR_QUERY_DURATION = Histogram(
+    'insurance_executor_query_duration_seconds', 'Per-query latency inside ParallelDBExecutor.', ('mode',),
+    buckets=DB_BUCKETS
+)
+EXECUTOR_RUN_DURATION = Histogram('insurance_executor_run_duration_seconds',
+                                  'Wall time of one ParallelDBExecutor batch.', ('mode',))
+OPTIMIZATION_JOBS = Counter('insurance_optimization_jobs_total', 'Finished background jobs by kind and status.',
+                            ('kind', 'status'))
+OPTIMIZATION_JOBS_RUNNING = Gauge('insurance_optimization_jobs_running', 'Background jobs running in this process.')
+EXPERIMENT_REGRESSIONS = Counter('insurance_experiment_regressions_total',
+                                 'Configurations flagged as regressions by persisted experiment runs.')
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from insurance import db_router, metrics
+
+
+logger = logging.getLogger('insurance.sql')
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPOSITORY_DIR = os.path.join(_APP_DIR, 'repository')
+
+
+def _origin(frame) -> str:
+    # The repository method if one is on the stack, otherwise the innermost
+    # frame of our own code (querysets are often evaluated in the view).
+    fallback = ''
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_REPOSITORY_DIR) and not filename.endswith('unit_of_work.py'):
+            owner = frame.f_locals.get('self')
+            name = frame.f_code.co_name
+            return f'{type(owner).__name__}.{name}' if owner is not None else name
+        if not fallback and filename.startswith(_APP_DIR) and filename != __file__:
+            fallback = f'{os.path.relpath(filename, _APP_DIR)}:{frame.f_code.co_name}'
+        frame = frame.f_back
+    return fallback
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.slowest_ns = 0
+        self.slowest_sql = ''
+        self.slowest_origin = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self.count += 1
+            self.total_ns += elapsed
+            if elapsed > self.slowest_ns:
+                # Walking the stack is the expensive part, so only the new
+                # slowest statement pays for it.
+                self.slowest_ns = elapsed
+                self.slowest_sql = sql[:500]
+                self.slowest_origin = _origin(sys._getframe(1))
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Records the SQL a request issues on a sampled fraction of requests
+    (SQL_INSTRUMENTATION_SAMPLE_RATE) and reports it as Server-Timing
+    headers plus one JSON log line on the 'insurance.sql' logger.
+    Unsampled requests run without any execute wrapper.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SQL_INSTRUMENTATION_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter_ns()
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ns = time.perf_counter_ns() - start
+        request.sql_stats = recorder
+
+        timings = [
+            f'db;dur={recorder.total_ns / 1e6:.2f};desc="{recorder.count} queries"',
+            f'app;dur={(total_ns - recorder.total_ns) / 1e6:.2f}',
+        ]
+        if recorder.count:
+            timings.append(f'db-slowest;dur={recorder.slowest_ns / 1e6:.2f};desc="{recorder.slowest_origin}"')
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + timings)
+
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'url_name': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.total_ns / 1e6, 3),
+            'total_ms': round(total_ns / 1e6, 3),
+            'slowest_ms': round(recorder.slowest_ns / 1e6, 3),
+            'slowest_sql': recorder.slowest_sql,
+            'slowest_origin': recorder.slowest_origin,
+        }))
+        return response
+
+
+class _MetricsRecorder:
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.DB_QUERIES.inc(alias=self.alias)
+            metrics.DB_QUERY_DURATION.observe(time.perf_counter() - start, alias=self.alias)
+
+
+class MetricsMiddleware:
+    """
+    Feeds the /metrics endpoint: latency and status per URL name, requests
+    in flight, and the count and duration of every SQL statement. Unlike
+    SQLInstrumentationMiddleware it sees every request, so it only keeps
+    additive per-thread counters.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.recorders = [_MetricsRecorder(alias) for alias in settings.DATABASES]
+
+    def __call__(self, request):
+        metrics.HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for recorder in self.recorders:
+                    stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.HTTP_IN_FLIGHT.dec()
+            match = getattr(request, 'resolver_match', None)
+            # Unresolved paths share one label so scanners cannot blow up cardinality.
+            url_name = match.view_name if match and match.view_name else 'unmatched'
+            metrics.HTTP_REQUESTS.inc(url_name=url_name, method=request.method, status=status)
+            metrics.HTTP_REQUEST_DURATION.observe(elapsed, url_name=url_name, method=request.method)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of replica-eligible views (list/retrieve, or whatever a
+    viewset lists in `replica_actions`) to a weighted-random replica. A
+    request that writes pins its client to the primary for
+    REPLICA_PIN_SECONDS so the next pages read their own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with db_router.route_reads(None) as routing:
+            request.db_routing = routing
+            response = self.get_response(request)
+        if routing.wrote and db_router.replica_weights():
+            db_router.pin_to_primary(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = getattr(request, 'db_routing', None)
+        if routing is None or not db_router.replica_weights():
+            return None
+        if db_router.wants_replica(view_func, request.method) and not db_router.is_pinned(request):
+            routing.replica = db_router.choose_replica()
+        return None
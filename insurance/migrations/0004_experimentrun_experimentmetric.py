@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance', '0003_optimizationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExperimentRun',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('strategy', models.CharField(max_length=32)),
+                ('num_queries', models.PositiveIntegerField()),
+                ('params', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('dataset_size', models.JSONField(default=dict)),
+                ('dataset_rows', models.PositiveBigIntegerField(default=0)),
+                ('git_revision', models.CharField(blank=True, default='', max_length=64)),
+                ('settings_fingerprint', models.CharField(db_index=True, max_length=64)),
+                ('settings_snapshot', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('best_config', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('best_total_time', models.FloatField(blank=True, null=True)),
+                ('best_p99_time', models.FloatField(blank=True, null=True)),
+                ('significant', models.BooleanField(default=False)),
+                ('regressions', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('has_regression', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='runs', to='insurance.optimizationjob')),
+            ],
+            options={
+                'db_table': 'experiment_run',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExperimentMetric',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('mode', models.CharField(max_length=16)),
+                ('num_workers', models.PositiveIntegerField()),
+                ('batch_size', models.PositiveIntegerField()),
+                ('total_time', models.FloatField()),
+                ('total_time_mean', models.FloatField(blank=True, null=True)),
+                ('total_time_stdev', models.FloatField(blank=True, null=True)),
+                ('ci_low', models.FloatField(blank=True, null=True)),
+                ('ci_high', models.FloatField(blank=True, null=True)),
+                ('repetitions', models.PositiveIntegerField(default=1)),
+                ('avg_time_per_query', models.FloatField()),
+                ('p50_time', models.FloatField(default=0)),
+                ('p99_time', models.FloatField(default=0)),
+                ('success_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('cpu_usage_percent', models.FloatField(default=0)),
+                ('memory_usage_mb', models.FloatField(default=0)),
+                ('pool_startup_time', models.FloatField(default=0)),
+                ('details', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='insurance.experimentrun')),
+            ],
+            options={
+                'db_table': 'experiment_metric',
+                'indexes': [models.Index(fields=['mode', 'num_workers', 'batch_size'], name='experiment__mode_77b0de_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:25
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance', '0004_experimentrun_experimentmetric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryPlan',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(db_index=True, max_length=128)),
+                ('sql', models.TextField()),
+                ('params', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('plan', models.JSONField(default=dict)),
+                ('signature', models.CharField(max_length=64)),
+                ('planning_time', models.FloatField(blank=True, null=True)),
+                ('execution_time', models.FloatField(blank=True, null=True)),
+                ('total_cost', models.FloatField(blank=True, null=True)),
+                ('seq_scans', models.JSONField(default=list)),
+                ('estimate_misses', models.JSONField(default=list)),
+                ('diff', models.JSONField(default=dict)),
+                ('git_revision', models.CharField(blank=True, default='', max_length=64)),
+                ('settings_fingerprint', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'db_table': 'query_plan',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['name', '-created_at'], name='query_plan_name_eb92e4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+# (index, table, column) for GET /api/search/.
+TRIGRAM_INDEXES = [
+    ('customer_full_name_trgm', 'customer', 'full_name'),
+    ('customer_email_trgm', 'customer', 'email'),
+    ('customer_tax_number_trgm', 'customer', 'tax_number'),
+    ('insurance_policy_number_trgm', 'insurance_policy', 'policy_number'),
+]
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        # Servers built without contrib keep working; search then falls back
+        # to unindexed ILIKE (see repository/search.py).
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in TRIGRAM_INDEXES:
+            # CONCURRENTLY so a large customer table stays writable meanwhile.
+            cursor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def reverse(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name, _, _ in TRIGRAM_INDEXES:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('insurance', '0005_queryplan'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
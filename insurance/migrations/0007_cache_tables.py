@@ -0,0 +1,19 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def forward(apps, schema_editor):
+    # Creates the table of every DatabaseCache in settings.CACHES (the
+    # replica pins); existing tables are left alone.
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance', '0006_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, migrations.RunPython.noop),
+    ]
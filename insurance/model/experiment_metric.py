@@ -0,0 +1,40 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from insurance.model.experiment_run import ExperimentRun
+
+
+class ExperimentMetric(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    run = models.ForeignKey(
+        ExperimentRun,
+        on_delete=models.CASCADE,
+        related_name='metrics'
+    )
+    mode = models.CharField(max_length=16)
+    num_workers = models.PositiveIntegerField()
+    batch_size = models.PositiveIntegerField()
+    total_time = models.FloatField()
+    total_time_mean = models.FloatField(null=True, blank=True)
+    total_time_stdev = models.FloatField(null=True, blank=True)
+    ci_low = models.FloatField(null=True, blank=True)
+    ci_high = models.FloatField(null=True, blank=True)
+    repetitions = models.PositiveIntegerField(default=1)
+    avg_time_per_query = models.FloatField()
+    p50_time = models.FloatField(default=0)
+    p99_time = models.FloatField(default=0)
+    success_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    cpu_usage_percent = models.FloatField(default=0)
+    memory_usage_mb = models.FloatField(default=0)
+    pool_startup_time = models.FloatField(default=0)
+    details = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        db_table = "experiment_metric"
+        indexes = [
+            models.Index(fields=['mode', 'num_workers', 'batch_size']),
+        ]
+
+    def __str__(self):
+        return f"{self.mode} x{self.num_workers} / {self.batch_size} — {self.total_time:.3f}s"
@@ -0,0 +1,37 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from insurance.model.optimization_job import OptimizationJob
+
+
+class ExperimentRun(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    job = models.ForeignKey(
+        OptimizationJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='runs'
+    )
+    strategy = models.CharField(max_length=32)
+    num_queries = models.PositiveIntegerField()
+    params = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    dataset_size = models.JSONField(default=dict)
+    dataset_rows = models.PositiveBigIntegerField(default=0)
+    git_revision = models.CharField(max_length=64, blank=True, default='')
+    settings_fingerprint = models.CharField(max_length=64, db_index=True)
+    settings_snapshot = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    best_config = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    best_total_time = models.FloatField(null=True, blank=True)
+    best_p99_time = models.FloatField(null=True, blank=True)
+    significant = models.BooleanField(default=False)
+    regressions = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    has_regression = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "experiment_run"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"ExperimentRun {self.id} — {self.git_revision[:8] or 'unknown'}"
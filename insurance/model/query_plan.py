@@ -0,0 +1,28 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class QueryPlan(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=128, db_index=True)
+    sql = models.TextField()
+    params = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    plan = models.JSONField(default=dict)
+    signature = models.CharField(max_length=64)
+    planning_time = models.FloatField(null=True, blank=True)
+    execution_time = models.FloatField(null=True, blank=True)
+    total_cost = models.FloatField(null=True, blank=True)
+    seq_scans = models.JSONField(default=list)
+    estimate_misses = models.JSONField(default=list)
+    diff = models.JSONField(default=dict)
+    git_revision = models.CharField(max_length=64, blank=True, default='')
+    settings_fingerprint = models.CharField(max_length=64, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "query_plan"
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['name', '-created_at'])]
+
+    def __str__(self):
+        return f"QueryPlan {self.name} — {self.created_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,270 @@
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from django.db import connection, transaction
+
+from insurance.model.claim import Claim
+from insurance.model.customer import Customer
+from insurance.model.insurance_policy import InsurancePolicy
+from insurance.model.payment import Payment
+from insurance.parallel_db.history import fingerprint, git_revision, settings_snapshot
+from insurance.parallel_db.trial_stats import summarize_trials
+from insurance.repository.unit_of_work import UnitOfWork
+
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+# Exponents above this are reported as super-linear.
+SUPER_LINEAR_EXPONENT = 1.15
+
+_POLICY_TYPES = ('auto', 'home', 'health', 'life', 'travel')
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+@dataclass
+class BenchmarkContext:
+    scale: int
+    rows: Dict[str, int]
+    customer_id: int
+
+
+# Every benchmark evaluates the queryset the way the API does.
+BENCHMARKS: Dict[str, Callable[[UnitOfWork, BenchmarkContext], Any]] = {
+    'ClaimRepository.avg_claim_by_age_group': lambda repo, ctx: list(repo.claims.avg_claim_by_age_group()),
+    'ClaimRepository.claims_per_customer': lambda repo, ctx: list(repo.claims.claims_per_customer()[:50]),
+    'ClaimRepository.find_by_customer': lambda repo, ctx: list(repo.claims.find_by_customer(ctx.customer_id)),
+    'PaymentRepository.payments_by_month': lambda repo, ctx: list(repo.payments.payments_by_month()),
+    'PaymentRepository.top_customers_by_payouts': lambda repo, ctx: list(repo.payments.top_customers_by_payouts()),
+    'PolicyRepository.policy_profit_by_type': lambda repo, ctx: list(repo.policies.policy_profit_by_type()),
+    'PolicyRepository.time_to_first_claim_per_policy':
+        lambda repo, ctx: list(repo.policies.time_to_first_claim_per_policy()),
+    'PolicyRepository.get_active_policies': lambda repo, ctx: list(repo.policies.get_active_policies()),
+}
+
+
+@dataclass
+class ScalePoint:
+    scale: int
+    rows: Dict[str, int]
+    times: List[float]
+    result_rows: int
+    # Claims actually in the table (pre-existing plus generated): the x of the fit.
+    size: int = 0
+    median: float = 0.0
+    ci_low: float = 0.0
+    ci_high: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'scale': self.scale,
+            'size': self.size,
+            'rows': self.rows,
+            'median': self.median,
+            'ci': [self.ci_low, self.ci_high],
+            'times': self.times,
+            'result_rows': self.result_rows,
+        }
+
+
+@dataclass
+class MethodReport:
+    name: str
+    points: List[ScalePoint] = field(default_factory=list)
+
+    def exponents(self) -> List[Optional[float]]:
+        # Local slope between neighbouring scales on a log-log plot.
+        slopes = []
+        for a, b in zip(self.points, self.points[1:]):
+            slopes.append(scaling_exponent([a.size, b.size], [a.median, b.median]))
+        return slopes
+
+    def to_dict(self) -> Dict[str, Any]:
+        exponent = scaling_exponent([p.size for p in self.points], [p.median for p in self.points])
+        return {
+            'points': [p.to_dict() for p in self.points],
+            'exponent': exponent,
+            'local_exponents': self.exponents(),
+            'super_linear': exponent is not None and exponent > SUPER_LINEAR_EXPONENT,
+        }
+
+
+def scaling_exponent(scales: Sequence[float], times: Sequence[float]) -> Optional[float]:
+    # time ~ c * rows^k, so k is the slope of log(time) against log(rows).
+    pairs = [(s, t) for s, t in zip(scales, times) if s > 0 and t > 0]
+    if len(pairs) < 2 or len({s for s, _ in pairs}) < 2:
+        return None
+    x = np.log([s for s, _ in pairs])
+    y = np.log([t for _, t in pairs])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def dataset_rows(scale: int) -> Dict[str, int]:
+    # `scale` is the number of claims; every claim gets one payment.
+    return {
+        'customer': max(1, scale // 10),
+        'insurance_policy': max(1, scale // 4),
+        'claim': scale,
+        'payment': scale,
+    }
+
+
+def populate(scale: int, seed: int, prefix: str) -> Dict[str, int]:
+    """
+    Generates the dataset server-side with generate_series; setseed() makes
+    random() repeatable, so the same seed yields the same rows.
+    """
+    rows = dataset_rows(scale)
+    customer = Customer._meta.db_table
+    policy = InsurancePolicy._meta.db_table
+    claim = Claim._meta.db_table
+    payment = Payment._meta.db_table
+    pattern = f'{prefix}-%'
+    types = 'ARRAY[' + ', '.join(f"'{t}'" for t in _POLICY_TYPES) + ']'
+    with connection.cursor() as cursor:
+        # setseed takes a value in [-1, 1].
+        cursor.execute('SELECT setseed(%s)', [(seed % 2_000_000) / 1_000_000 - 1])
+        cursor.execute(f"""
+            INSERT INTO {customer} (full_name, tax_number, date_of_birth, email, phone, address, created_at)
+            SELECT 'Bench Customer ' || g, %s || '-' || g, DATE '1945-01-01' + (random() * 20000)::int,
+                   %s || '.' || g || '@example.com', '+380' || (100000000 + (random() * 899999999)::int),
+                   g || ' Benchmark St.', now()
+            FROM generate_series(1, %s) AS g
+        """, [prefix, prefix, rows['customer']])
+        cursor.execute(f"""
+            INSERT INTO {policy} (policy_number, policy_type, start_date, end_date, premium, coverage_amount,
+                                  customer_id, created_at)
+            SELECT %s || '-' || g, ({types})[1 + (random() * 4)::int], p.start_date,
+                   CASE WHEN random() < 0.5 THEN NULL ELSE p.start_date + 365 END,
+                   round((50 + random() * 450)::numeric, 2), round((5000 + random() * 95000)::numeric, 2),
+                   c.id, now()
+            FROM generate_series(1, %s) AS g
+            CROSS JOIN LATERAL (SELECT DATE '2020-01-01' + (random() * 1800)::int AS start_date) p
+            JOIN (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM {customer} WHERE tax_number LIKE %s) c
+              ON c.rn = 1 + (g - 1) %% %s
+        """, [prefix, rows['insurance_policy'], pattern, rows['customer']])
+        cursor.execute(f"""
+            INSERT INTO {claim} (policy_id, claim_date, amount, description, created_at)
+            SELECT p.id, p.start_date + (random() * 300)::int, round((100 + random() * 19900)::numeric, 2),
+                   'Benchmark claim', now()
+            FROM generate_series(1, %s) AS g
+            JOIN (SELECT id, start_date, row_number() OVER (ORDER BY id) AS rn
+                  FROM {policy} WHERE policy_number LIKE %s) p
+              ON p.rn = 1 + ((g - 1)::bigint * 7919) %% %s
+        """, [rows['claim'], pattern, rows['insurance_policy']])
+        cursor.execute(f"""
+            INSERT INTO {payment} (amount, date, claim_id, created_at)
+            SELECT round((cl.amount * (0.2 + random() * 0.8))::numeric, 2), cl.claim_date + (random() * 60)::int,
+                   cl.id, now()
+            FROM {claim} cl JOIN {policy} p ON p.id = cl.policy_id
+            WHERE p.policy_number LIKE %s
+        """, [pattern])
+        for table in (customer, policy, claim, payment):
+            cursor.execute(f'ANALYZE {table}')
+    return rows
+
+
+def table_rows() -> Dict[str, int]:
+    # The benchmarked queries scan whole tables, so rows that were there
+    # before populate() count as much as the generated ones.
+    tables = [model._meta.db_table for model in (Customer, InsurancePolicy, Claim, Payment)]
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(f"SELECT '{table}', count(*) FROM {table}" for table in tables))
+        return dict(cursor.fetchall())
+
+
+def _time(func: Callable[[], Any]):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def benchmark_scale(scale: int, seed: int, methods: Sequence[str], repetitions: int, warmup_runs: int,
+                    log: Callable[[str], None] = lambda message: None) -> Dict[str, ScalePoint]:
+    points = {}
+    prefix = f'bench{seed}s{scale}'
+    try:
+        # The dataset only exists inside this transaction and is rolled back
+        # afterwards, so benchmarks leave the database as they found it.
+        with transaction.atomic():
+            start = time.perf_counter()
+            generated = populate(scale, seed, prefix)
+            rows = table_rows()
+            log(f'  generated {sum(generated.values())} rows in {time.perf_counter() - start:.1f}s; '
+                f'tables now hold ' + ', '.join(f'{table}={count}' for table, count in rows.items()))
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT id FROM {Customer._meta.db_table} WHERE tax_number LIKE %s ORDER BY id',
+                               [f'{prefix}-%'])
+                customer_ids = [row[0] for row in cursor.fetchall()]
+            ctx = BenchmarkContext(scale, rows, random.Random(seed).choice(customer_ids))
+
+            with UnitOfWork() as repo:
+                for name in methods:
+                    func = BENCHMARKS[name]
+                    for _ in range(warmup_runs):
+                        func(repo, ctx)
+                    times = []
+                    result = []
+                    for _ in range(repetitions):
+                        elapsed, result = _time(lambda: func(repo, ctx))
+                        times.append(elapsed)
+                    summary = summarize_trials(times)
+                    points[name] = ScalePoint(scale, rows, times, len(result), rows['claim'], summary.median,
+                                              summary.ci_low, summary.ci_high)
+                    log(f'  {name}: {summary.median * 1e3:.2f} ms ({len(result)} rows)')
+            raise BenchmarkRollback()
+    except BenchmarkRollback:
+        pass
+    return points
+
+
+def run_benchmarks(scales: Sequence[int] = DEFAULT_SCALES, seed: int = 42, methods: Optional[Sequence[str]] = None,
+                   repetitions: int = 5, warmup_runs: int = 1,
+                   log: Callable[[str], None] = lambda message: None) -> Dict[str, Any]:
+    methods = list(methods or BENCHMARKS)
+    unknown = [m for m in methods if m not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s) {', '.join(unknown)}. Choose from: {', '.join(BENCHMARKS)}")
+    scales = sorted(set(scales))
+    reports = {name: MethodReport(name) for name in methods}
+    for scale in scales:
+        log(f'scale {scale}')
+        for name, point in benchmark_scale(scale, seed, methods, repetitions, warmup_runs, log).items():
+            reports[name].points.append(point)
+
+    results = {name: report.to_dict() for name, report in reports.items()}
+    return {
+        'meta': {
+            'seed': seed,
+            'scales': scales,
+            'repetitions': repetitions,
+            'warmup_runs': warmup_runs,
+            'git_revision': git_revision(),
+            'settings_fingerprint': fingerprint(settings_snapshot()),
+            'super_linear_threshold': SUPER_LINEAR_EXPONENT,
+        },
+        'results': results,
+        'super_linear': sorted(name for name, r in results.items() if r['super_linear']),
+    }
+
+
+def format_summary(report: Dict[str, Any]) -> str:
+    scales = report['meta']['scales']
+    header = f"{'method':48s}" + ''.join(f'{s:>12,d}' for s in scales) + f"{'exponent':>10s}"
+    lines = [header, '-' * len(header)]
+    sizes = {}
+    for result in report['results'].values():
+        sizes.update({p['scale']: p['size'] for p in result['points']})
+    lines.append(f"{'(claims in table)':48s}" + ''.join(f'{sizes[s]:>12,d}' if s in sizes else f"{'':>12s}"
+                                                        for s in scales))
+    for name, result in report['results'].items():
+        by_scale = {p['scale']: p['median'] for p in result['points']}
+        cells = ''.join(f"{by_scale[s] * 1e3:>10.2f}ms" if s in by_scale else f"{'':>12s}" for s in scales)
+        exponent = result['exponent']
+        flag = ' !' if result['super_linear'] else ''
+        lines.append(f'{name:48s}{cells}{(f"{exponent:.2f}" if exponent is not None else "n/a"):>10s}{flag}')
+    return '\n'.join(lines)
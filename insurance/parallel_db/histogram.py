@@ -0,0 +1,86 @@
+import math
+from typing import Dict, Iterable, List, Tuple
+
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+CURVE_PERCENTILES = (0, 10, 25, 50, 75, 90, 95, 99, 99.5, 99.9, 100)
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of integer values (nanoseconds).
+
+    Values below 2**sub_bucket_bits are stored exactly; larger values are
+    truncated to sub_bucket_bits significant bits, which bounds the relative
+    error by the requested number of significant decimal digits.
+    """
+
+    def __init__(self, significant_digits: int = 3):
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = None
+        self.max_value = None
+
+    def _bucket_key(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return (value >> shift) << shift
+
+    def _highest_equivalent(self, key: int) -> int:
+        shift = max(0, key.bit_length() - self.sub_bucket_bits)
+        return key + (1 << shift) - 1
+
+    def record(self, value: int, count: int = 1):
+        value = max(0, int(value))
+        key = self._bucket_key(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.total_count += count
+        self.total_sum += value * count
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if self.max_value is None or value > self.max_value:
+            self.max_value = value
+
+    def record_all(self, values: Iterable[int]):
+        for value in values:
+            self.record(value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total_count += other.total_count
+        self.total_sum += other.total_sum
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        if other.max_value is not None:
+            self.max_value = other.max_value if self.max_value is None else max(self.max_value, other.max_value)
+
+    def mean(self) -> float:
+        return self.total_sum / self.total_count if self.total_count else 0.0
+
+    def value_at_percentile(self, percentile: float) -> int:
+        if not self.total_count:
+            return 0
+        if percentile <= 0:
+            return self.min_value
+        if percentile >= 100:
+            return self.max_value
+        target = math.ceil(self.total_count * percentile / 100)
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= target:
+                return min(self._highest_equivalent(key), self.max_value)
+        return self.max_value
+
+    def percentiles(self, percentiles: Iterable[float] = PERCENTILES) -> Dict[str, int]:
+        return {percentile_label(p): self.value_at_percentile(p) for p in percentiles}
+
+    def curve(self, percentiles: Iterable[float] = CURVE_PERCENTILES) -> List[Tuple[float, int]]:
+        return [(p, self.value_at_percentile(p)) for p in percentiles]
+
+
+def percentile_label(percentile: float) -> str:
+    return 'p' + f'{percentile:g}'.replace('.', '')
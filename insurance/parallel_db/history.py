@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import subprocess
+from statistics import median
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from insurance.model.experiment_run import ExperimentRun
+from insurance.repository.unit_of_work import UnitOfWork
+
+
+# Runs of the same workload (size and scenario) that form the baseline of a new run.
+REGRESSION_BASELINE_RUNS = 5
+
+DB_SERVER_SETTINGS = (
+    'server_version', 'shared_buffers', 'work_mem', 'effective_cache_size', 'max_connections',
+    'random_page_cost', 'jit', 'max_parallel_workers_per_gather', 'synchronous_commit',
+)
+
+
+def git_revision() -> str:
+    revision = os.getenv('GIT_REVISION')
+    if revision:
+        return revision
+    try:
+        head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, timeout=5, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return head + ('-dirty' if dirty else '')
+
+
+def settings_snapshot() -> Dict[str, Any]:
+    db = settings.DATABASES['default']
+    snapshot = {
+        'database': {key: db.get(key) for key in ('ENGINE', 'NAME', 'HOST', 'PORT', 'CONN_MAX_AGE', 'OPTIONS')},
+        'job_workers': getattr(settings, 'OPTIMIZATION_JOB_WORKERS', 1),
+        'cpu_count': os.cpu_count(),
+        'server': {},
+        'indexes': '',
+    }
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, setting FROM pg_settings WHERE name = ANY(%s)", [list(DB_SERVER_SETTINGS)])
+            snapshot['server'] = dict(cursor.fetchall())
+            # Index definitions are hashed so adding or dropping one changes the fingerprint.
+            cursor.execute("SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() ORDER BY indexdef")
+            indexdefs = '\n'.join(row[0] for row in cursor.fetchall())
+            snapshot['indexes'] = hashlib.sha256(indexdefs.encode()).hexdigest()
+    return snapshot
+
+
+def fingerprint(snapshot: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _metric_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    ci = result.get('total_time_ci') or [None, None]
+    details = {k: v for k, v in result.items() if k != 'resource_series'}
+    return {
+        'mode': result['mode'],
+        'num_workers': result['num_workers'],
+        'batch_size': result['batch_size'],
+        'total_time': result['total_time'],
+        'total_time_mean': result.get('total_time_mean'),
+        'total_time_stdev': result.get('total_time_stdev'),
+        'ci_low': ci[0],
+        'ci_high': ci[1],
+        'repetitions': result.get('repetitions', 1),
+        'avg_time_per_query': result['avg_time_per_query'],
+        'p50_time': result.get('latency_percentiles', {}).get('p50', 0),
+        'p99_time': result.get('p99_time', 0),
+        'success_count': result['success_count'],
+        'error_count': result['error_count'],
+        'cpu_usage_percent': result['cpu_usage_percent'],
+        'memory_usage_mb': result['memory_usage_mb'],
+        'pool_startup_time': result.get('pool_startup_time', 0),
+        'details': details,
+    }
+
+
+def _cell(metric: Dict[str, Any]):
+    return metric['mode'], metric['num_workers'], metric['batch_size']
+
+
+def find_regressions(metrics: List[Dict[str, Any]], baseline: Dict[tuple, float],
+                     threshold: float) -> List[Dict[str, Any]]:
+    regressions = []
+    for metric in metrics:
+        base = baseline.get(_cell(metric))
+        if not base:
+            continue
+        change = (metric['total_time'] - base) / base
+        # A slower median alone is noise unless the whole CI sits above the baseline.
+        if change > threshold and (metric['ci_low'] is None or metric['ci_low'] > base):
+            regressions.append({
+                'mode': metric['mode'],
+                'num_workers': metric['num_workers'],
+                'batch_size': metric['batch_size'],
+                'total_time': metric['total_time'],
+                'baseline': base,
+                'change': change,
+            })
+    return sorted(regressions, key=lambda r: r['change'], reverse=True)
+
+
+def _baseline(repo: UnitOfWork, num_queries: int, scenario: str) -> Dict[tuple, float]:
+    runs = repo.experiments.recent(REGRESSION_BASELINE_RUNS, num_queries=num_queries, scenario=scenario)
+    run_ids = [run.id for run in runs]
+    times: Dict[tuple, List[float]] = {}
+    for row in repo.experiments.metrics_for_runs(run_ids):
+        times.setdefault(_cell(row), []).append(row['total_time'])
+    return {cell: median(values) for cell, values in times.items()}
+
+
+def record_experiment_run(params: Dict[str, Any], outcome: Dict[str, Any],
+                          job_id: Optional[int] = None) -> ExperimentRun:
+    threshold = getattr(settings, 'EXPERIMENT_REGRESSION_THRESHOLD', 0.10)
+    metrics = [_metric_fields(r) for r in outcome.get('all_results', [])]
+    best = outcome.get('best_candidate', {})
+    with UnitOfWork() as repo:
+        dataset_size = {
+            'customers': repo.customers.count(),
+            'policies': repo.policies.count(),
+            'claims': repo.claims.count(),
+            'payments': repo.payments.count(),
+        }
+        snapshot = settings_snapshot()
+        baseline = _baseline(repo, params['num_queries'], params.get('scenario', 'mixed'))
+        regressions = find_regressions(metrics, baseline, threshold)
+        return repo.experiments.record(
+            metrics,
+            job_id=job_id,
+            strategy=params.get('strategy', 'grid'),
+            num_queries=params['num_queries'],
+            params=params,
+            dataset_size=dataset_size,
+            dataset_rows=sum(dataset_size.values()),
+            git_revision=git_revision(),
+            settings_fingerprint=fingerprint(snapshot),
+            settings_snapshot=snapshot,
+            best_config=best,
+            best_total_time=best.get('total_time'),
+            best_p99_time=outcome.get('optimal_config_p99', {}).get('p99_time'),
+            significant=outcome.get('significant', False),
+            regressions=regressions,
+            has_regression=bool(regressions),
+        )
+
+
+def experiment_history(limit: int = 20, num_queries: Optional[int] = None) -> Dict[str, Any]:
+    with UnitOfWork(read_only=True) as repo:
+        runs = list(repo.experiments.recent(limit, num_queries=num_queries))[::-1]
+        rows = list(repo.experiments.metrics_for_runs([run.id for run in runs]))
+
+    # Best median per mode and run gives one trend line per execution mode.
+    best_by_mode: Dict[str, Dict[int, float]] = {}
+    for row in rows:
+        per_run = best_by_mode.setdefault(row['mode'], {})
+        per_run[row['run_id']] = min(per_run.get(row['run_id'], float('inf')), row['total_time'])
+
+    return {
+        'runs': [
+            {
+                'id': run.id,
+                'job_id': run.job_id,
+                'created_at': run.created_at,
+                'strategy': run.strategy,
+                'num_queries': run.num_queries,
+                'dataset_size': run.dataset_size,
+                'dataset_rows': run.dataset_rows,
+                'git_revision': run.git_revision,
+                'settings_fingerprint': run.settings_fingerprint,
+                'best_config': run.best_config,
+                'best_total_time': run.best_total_time,
+                'best_p99_time': run.best_p99_time,
+                'significant': run.significant,
+                'has_regression': run.has_regression,
+                'regressions': run.regressions,
+            }
+            for run in runs
+        ],
+        'best_by_mode': {
+            mode: [{'run_id': run_id, 'total_time': t} for run_id, t in sorted(per_run.items())]
+            for mode, per_run in best_by_mode.items()
+        },
+    }
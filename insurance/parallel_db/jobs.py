@@ -0,0 +1,278 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from insurance import metrics
+from insurance.model.optimization_job import OptimizationJob
+from insurance.repository.unit_of_work import UnitOfWork
+from insurance.parallel_db.history import record_experiment_run
+from insurance.parallel_db.load_generator import ARRIVAL_POISSON, ARRIVALS, OpenLoopLoadGenerator, ramp_stages
+from insurance.parallel_db.optimizer import DatabaseOptimizer
+from insurance.parallel_db.parallel_executor import (
+    ParallelDBExecutor, close_db_connections, MODE_THREADS, MODE_PROCESSES, MODE_ASYNC
+)
+from insurance.parallel_db.query_generator import SCENARIOS, generate_test_queries, to_async_query
+from insurance.parallel_db.workload import DISTRIBUTION_UNIFORM, KEY_DISTRIBUTIONS
+from insurance.parallel_db.search import STRATEGIES
+
+
+# A running job refreshes updated_at after every trial; one that stays
+# silent this long lost its worker (e.g. the server was restarted).
+STALE_AFTER = timedelta(minutes=10)
+# A pending job waits behind the jobs ahead of it, which may take a while;
+# one still not started this long after it was created was lost with its
+# queue.
+QUEUE_TIMEOUT = timedelta(hours=6)
+
+JOB_OPTIMIZATION = 'optimization'
+JOB_LOAD_TEST = 'load_test'
+
+MAX_LOAD_TEST_SECONDS = 120
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class ExperimentCancelled(Exception):
+    pass
+
+
+def parse_optimization_params(data) -> Dict[str, Any]:
+    strategy = data.get('strategy', 'grid')
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'")
+    scenario = data.get('scenario', 'mixed')
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{scenario}'")
+    key_distribution = data.get('key_distribution', DISTRIBUTION_UNIFORM)
+    if key_distribution not in KEY_DISTRIBUTIONS:
+        raise ValueError(f"Unknown key distribution '{key_distribution}'")
+    seed = data.get('seed')
+    return {
+        'num_queries': max(100, min(200, int(data.get('num_queries', 150)))),
+        'num_workers_range': data.get('num_workers_range', [1, 2, 4, 8, 16]),
+        'batch_sizes': data.get('batch_sizes', [10, 25, 50, 100]),
+        'test_threads': data.get('test_threads', True),
+        'test_processes': data.get('test_processes', False),
+        'test_async': data.get('test_async', False),
+        'warmup_runs': max(0, min(5, int(data.get('warmup_runs', 1)))),
+        'repetitions': max(1, min(20, int(data.get('repetitions', 3)))),
+        'seed': int(seed) if seed is not None else None,
+        'strategy': strategy,
+        'scenario': scenario,
+        'key_distribution': key_distribution,
+        'zipf_skew': max(0.1, min(3.0, float(data.get('zipf_skew', 1.1)))),
+    }
+
+
+def parse_load_test_params(data) -> Dict[str, Any]:
+    mode = data.get('mode', MODE_THREADS)
+    if mode not in (MODE_THREADS, MODE_PROCESSES, MODE_ASYNC):
+        raise ValueError(f"Unknown mode '{mode}'")
+    arrival = data.get('arrival', ARRIVAL_POISSON)
+    if arrival not in ARRIVALS:
+        raise ValueError(f"Unknown arrival process '{arrival}'")
+    scenario = data.get('scenario', 'mixed')
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{scenario}'")
+    key_distribution = data.get('key_distribution', DISTRIBUTION_UNIFORM)
+    if key_distribution not in KEY_DISTRIBUTIONS:
+        raise ValueError(f"Unknown key distribution '{key_distribution}'")
+    steps = max(1, min(20, int(data.get('steps', 5))))
+    stage_duration = max(1.0, min(30.0, float(data.get('stage_duration', 5))))
+    if steps * stage_duration > MAX_LOAD_TEST_SECONDS:
+        raise ValueError(f'A load test may run at most {MAX_LOAD_TEST_SECONDS} seconds')
+    seed = data.get('seed')
+    return {
+        'kind': JOB_LOAD_TEST,
+        'mode': mode,
+        'num_workers': max(1, min(64, int(data.get('num_workers', 4)))),
+        'arrival': arrival,
+        'start_qps': max(1.0, min(5000.0, float(data.get('start_qps', 50)))),
+        'end_qps': max(1.0, min(5000.0, float(data.get('end_qps', 500)))),
+        'steps': steps,
+        'stage_duration': stage_duration,
+        'scenario': scenario,
+        'key_distribution': key_distribution,
+        'zipf_skew': max(0.1, min(3.0, float(data.get('zipf_skew', 1.1)))),
+        'seed': int(seed) if seed is not None else None,
+    }
+
+
+def parse_job_params(data) -> Dict[str, Any]:
+    if data.get('kind', JOB_OPTIMIZATION) == JOB_LOAD_TEST:
+        return parse_load_test_params(data)
+    return parse_optimization_params(data)
+
+
+def run_load_test(params: Dict[str, Any],
+                  progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    queries = generate_test_queries(
+        200,
+        scenario=params['scenario'],
+        key_distribution=params['key_distribution'],
+        zipf_skew=params['zipf_skew'],
+        seed=params['seed']
+    )
+    mode = params['mode']
+    if mode == MODE_ASYNC:
+        queries = [to_async_query(q) for q in queries]
+    stages = ramp_stages(params['start_qps'], params['end_qps'], params['steps'], params['stage_duration'])
+    with ParallelDBExecutor(use_processes=mode == MODE_PROCESSES, use_async=mode == MODE_ASYNC) as executor:
+        generator = OpenLoopLoadGenerator(executor, max_workers=params['num_workers'],
+                                          arrival=params['arrival'], seed=params['seed'])
+        result = generator.run(queries, stages, progress_callback=progress_callback)
+    return {
+        'kind': JOB_LOAD_TEST,
+        'load_test': result.to_dict(),
+        'meta': {
+            'scenario': params['scenario'],
+            'key_distribution': params['key_distribution'],
+            'stages': len(stages),
+        }
+    }
+
+
+def run_optimization(params: Dict[str, Any],
+                     progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     job_id: Optional[int] = None) -> Dict[str, Any]:
+    optimizer = DatabaseOptimizer(
+        num_queries=params['num_queries'],
+        scenario=params.get('scenario', 'mixed'),
+        key_distribution=params.get('key_distribution', DISTRIBUTION_UNIFORM),
+        zipf_skew=params.get('zipf_skew', 1.1),
+        seed=params['seed']
+    )
+    results = optimizer.run_experiments(
+        num_workers_range=params['num_workers_range'],
+        batch_sizes=params['batch_sizes'],
+        test_threads=params['test_threads'],
+        test_processes=params['test_processes'],
+        test_async=params['test_async'],
+        warmup_runs=params['warmup_runs'],
+        repetitions=params['repetitions'],
+        seed=params['seed'],
+        strategy=params['strategy'],
+        progress_callback=progress_callback
+    )
+
+    optimal_config = optimizer.find_optimal_config(results)
+    run = record_experiment_run(params, optimal_config, job_id=job_id)
+
+    return {
+        'optimal_config': optimal_config.get('optimal_config', {}),
+        'optimal_config_p99': optimal_config.get('optimal_config_p99', {}),
+        'best_candidate': optimal_config.get('best_candidate', {}),
+        'runner_up': optimal_config.get('runner_up', {}),
+        'significant': optimal_config.get('significant', False),
+        'all_results': optimal_config.get('all_results', []),
+        'avg_time_by_workers': optimal_config.get('avg_time_by_workers', {}),
+        'best_result': optimal_config.get('best_result', {}),
+        'search': optimal_config.get('search', {}),
+        'meta': {
+            'total_experiments': len(results),
+            'num_queries': params['num_queries'],
+            'scenario': params.get('scenario', 'mixed'),
+            'key_distribution': params.get('key_distribution', DISTRIBUTION_UNIFORM),
+            'warmup_runs': params['warmup_runs'],
+            'repetitions': params['repetitions'],
+        },
+        'run': {
+            'id': run.id,
+            'git_revision': run.git_revision,
+            'settings_fingerprint': run.settings_fingerprint,
+            'dataset_size': run.dataset_size,
+            'regressions': run.regressions,
+        }
+    }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'OPTIMIZATION_JOB_WORKERS', 1),
+                thread_name_prefix='optimization-job'
+            )
+        return _executor
+
+
+def submit_optimization_job(params: Dict[str, Any]) -> OptimizationJob:
+    with UnitOfWork() as repo:
+        job = repo.jobs.create(params=params, progress={'trials_done': 0})
+    # Submitted after the unit of work committed, so the worker sees the row.
+    _get_executor().submit(run_optimization_job, job.id)
+    return job
+
+
+def run_optimization_job(job_id: int):
+    kind = JOB_OPTIMIZATION
+    status = OptimizationJob.STATUS_FAILED
+    metrics.OPTIMIZATION_JOBS_RUNNING.inc()
+    try:
+        with UnitOfWork() as repo:
+            if not repo.jobs.mark_running(job_id):
+                status = None
+                return
+            job = repo.jobs.get_by_id(job_id)
+            if job.cancel_requested:
+                repo.jobs.finish(job_id, OptimizationJob.STATUS_CANCELLED)
+                status = OptimizationJob.STATUS_CANCELLED
+                return
+            params = job.params
+            kind = params.get('kind', JOB_OPTIMIZATION)
+
+        def report(progress: Dict[str, Any]):
+            with UnitOfWork() as repo:
+                if repo.jobs.is_cancel_requested(job_id):
+                    raise ExperimentCancelled()
+                repo.jobs.set_progress(job_id, progress)
+
+        if kind == JOB_LOAD_TEST:
+            result = run_load_test(params, progress_callback=report)
+        else:
+            result = run_optimization(params, progress_callback=report, job_id=job_id)
+            metrics.EXPERIMENT_REGRESSIONS.inc(len(result['run']['regressions']))
+        with UnitOfWork() as repo:
+            # False when the job was already failed as stale meanwhile.
+            if repo.jobs.finish(job_id, OptimizationJob.STATUS_SUCCEEDED, result=result):
+                status = OptimizationJob.STATUS_SUCCEEDED
+    except ExperimentCancelled:
+        with UnitOfWork() as repo:
+            if repo.jobs.finish(job_id, OptimizationJob.STATUS_CANCELLED):
+                status = OptimizationJob.STATUS_CANCELLED
+    except Exception as e:
+        with UnitOfWork() as repo:
+            repo.jobs.finish(job_id, OptimizationJob.STATUS_FAILED, error=str(e))
+    finally:
+        metrics.OPTIMIZATION_JOBS_RUNNING.dec()
+        if status is not None:
+            metrics.OPTIMIZATION_JOBS.inc(kind=kind, status=status)
+        close_db_connections()
+
+
+def get_optimization_job(job_id: int) -> Optional[OptimizationJob]:
+    with UnitOfWork() as repo:
+        job = repo.jobs.get_by_id(job_id)
+        if job is None:
+            return None
+        now = timezone.now()
+        error = None
+        if job.status == OptimizationJob.STATUS_RUNNING and job.updated_at < now - STALE_AFTER:
+            error = 'Job worker stopped responding'
+        elif job.status == OptimizationJob.STATUS_PENDING and job.created_at < now - QUEUE_TIMEOUT:
+            error = 'Job was never started'
+        if error:
+            repo.jobs.finish(job_id, OptimizationJob.STATUS_FAILED, error=error)
+            job = repo.jobs.get_by_id(job_id)
+        return job
+
+
+def cancel_optimization_job(job_id: int) -> bool:
+    with UnitOfWork() as repo:
+        return repo.jobs.request_cancel(job_id)
@@ -0,0 +1,217 @@
+import asyncio
+import inspect
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+
+from insurance.parallel_db.histogram import LatencyHistogram, PERCENTILES
+from insurance.parallel_db.parallel_executor import ParallelDBExecutor, execute_query_in_coroutine, query_type_of
+
+
+ARRIVAL_CONSTANT = 'constant'
+ARRIVAL_POISSON = 'poisson'
+ARRIVALS = (ARRIVAL_CONSTANT, ARRIVAL_POISSON)
+
+# Head start between building the schedule and the first intended arrival.
+_START_DELAY_NS = 20_000_000
+
+
+@dataclass
+class LoadStage:
+    target_qps: float
+    duration: float
+
+
+def ramp_stages(start_qps: float, end_qps: float, steps: int, stage_duration: float) -> List[LoadStage]:
+    steps = max(1, steps)
+    if steps == 1:
+        return [LoadStage(end_qps, stage_duration)]
+    step = (end_qps - start_qps) / (steps - 1)
+    return [LoadStage(start_qps + i * step, stage_duration) for i in range(steps)]
+
+
+def arrival_offsets(stages: List[LoadStage], arrival: str = ARRIVAL_POISSON,
+                    rng: Optional[random.Random] = None) -> List[Tuple[float, int]]:
+    if arrival not in ARRIVALS:
+        raise ValueError(f"Unknown arrival process '{arrival}'. Choose one of: {', '.join(ARRIVALS)}")
+    rng = rng or random.Random()
+    offsets = []
+    stage_start = 0.0
+    for index, stage in enumerate(stages):
+        stage_end = stage_start + stage.duration
+        if stage.target_qps > 0:
+            t = stage_start
+            while True:
+                t += rng.expovariate(stage.target_qps) if arrival == ARRIVAL_POISSON else 1 / stage.target_qps
+                if t >= stage_end:
+                    break
+                offsets.append((t, index))
+        stage_start = stage_end
+    return offsets
+
+
+@dataclass
+class LoadPoint:
+    target_qps: float
+    duration: float
+    sent: int = 0
+    completed: int = 0
+    errors: int = 0
+    achieved_qps: float = 0.0
+    max_dispatch_lag: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service_time: LatencyHistogram = field(default_factory=LatencyHistogram)
+    queue_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def seconds(histogram):
+            return {k: v / 1e9 for k, v in histogram.percentiles(PERCENTILES).items()}
+
+        return {
+            'target_qps': self.target_qps,
+            'duration': self.duration,
+            'sent': self.sent,
+            'completed': self.completed,
+            'errors': self.errors,
+            'achieved_qps': self.achieved_qps,
+            'max_dispatch_lag': self.max_dispatch_lag,
+            'latency_percentiles': seconds(self.latency),
+            'service_time_percentiles': seconds(self.service_time),
+            'queue_wait_percentiles': seconds(self.queue_wait),
+            'avg_latency': self.latency.mean() / 1e9,
+        }
+
+
+@dataclass
+class LoadTestResult:
+    mode: str
+    num_workers: int
+    arrival: str
+    points: List[LoadPoint]
+    saturation_qps: Optional[float] = None
+    max_sustained_qps: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'num_workers': self.num_workers,
+            'arrival': self.arrival,
+            'points': [p.to_dict() for p in self.points],
+            'saturation_qps': self.saturation_qps,
+            'max_sustained_qps': self.max_sustained_qps,
+        }
+
+
+class OpenLoopLoadGenerator:
+    """
+    Sends queries at scheduled arrival times regardless of how many are still
+    in flight. Latency is measured from the intended send time, so a stalled
+    pool shows up as queueing delay instead of silently slowing the sender
+    (coordinated omission).
+    """
+
+    def __init__(self, executor: ParallelDBExecutor, max_workers: int = 4, arrival: str = ARRIVAL_POISSON,
+                 seed: Optional[int] = None, saturation_ratio: float = 0.9):
+        if arrival not in ARRIVALS:
+            raise ValueError(f"Unknown arrival process '{arrival}'. Choose one of: {', '.join(ARRIVALS)}")
+        self.executor = executor
+        self.max_workers = max_workers
+        self.arrival = arrival
+        self.rng = random.Random(seed)
+        self.saturation_ratio = saturation_ratio
+
+    def _stage_done(self, progress_callback, stages, index):
+        if progress_callback is not None:
+            progress_callback({
+                'trials_done': index + 1,
+                'planned_trials': len(stages),
+                'message': f'{stages[index].target_qps:.0f} QPS stage finished',
+            })
+
+    def _dispatch(self, pool, queries, schedule, stages, start_ns, progress_callback):
+        futures = []
+        lags = [0] * len(stages)
+        for i, (offset, stage) in enumerate(schedule):
+            if i and schedule[i - 1][1] != stage:
+                self._stage_done(progress_callback, stages, schedule[i - 1][1])
+            intended_ns = start_ns + int(offset * 1e9)
+            delay_ns = intended_ns - time.perf_counter_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / 1e9)
+            lags[stage] = max(lags[stage], time.perf_counter_ns() - intended_ns)
+            futures.append((stage, intended_ns, pool.submit(queries[i % len(queries)], i, submitted_ns=intended_ns)))
+        return [(stage, intended_ns, future.result()) for stage, intended_ns, future in futures], lags
+
+    async def _dispatch_async(self, queries, schedule, stages, start_ns, progress_callback):
+        semaphore = asyncio.Semaphore(self.max_workers)
+        report = sync_to_async(self._stage_done)
+        tasks = []
+        lags = [0] * len(stages)
+        for i, (offset, stage) in enumerate(schedule):
+            if i and schedule[i - 1][1] != stage:
+                await report(progress_callback, stages, schedule[i - 1][1])
+            intended_ns = start_ns + int(offset * 1e9)
+            delay_ns = intended_ns - time.perf_counter_ns()
+            if delay_ns > 0:
+                await asyncio.sleep(delay_ns / 1e9)
+            lags[stage] = max(lags[stage], time.perf_counter_ns() - intended_ns)
+            query_func = queries[i % len(queries)]
+            query_type = query_type_of(query_func)
+            if not inspect.iscoroutinefunction(query_func):
+                query_func = sync_to_async(query_func)
+            tasks.append((stage, intended_ns, asyncio.create_task(
+                execute_query_in_coroutine(query_func, i, semaphore, intended_ns, query_type)
+            )))
+        return [(stage, intended_ns, await task) for stage, intended_ns, task in tasks], lags
+
+    def run(self, queries: List[Callable], stages: List[LoadStage],
+            progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> LoadTestResult:
+        schedule = arrival_offsets(stages, self.arrival, self.rng)
+        if self.executor.use_async:
+            start_ns = time.perf_counter_ns() + _START_DELAY_NS
+            outcomes, lags = asyncio.run(self._dispatch_async(queries, schedule, stages, start_ns, progress_callback))
+        else:
+            pool, _ = self.executor.get_pool(self.max_workers)
+            start_ns = time.perf_counter_ns() + _START_DELAY_NS
+            outcomes, lags = self._dispatch(pool, queries, schedule, stages, start_ns, progress_callback)
+        if schedule:
+            self._stage_done(progress_callback, stages, schedule[-1][1])
+
+        points = [LoadPoint(target_qps=stage.target_qps, duration=stage.duration) for stage in stages]
+        stage_starts = []
+        offset = 0.0
+        for stage in stages:
+            stage_starts.append(start_ns + int(offset * 1e9))
+            offset += stage.duration
+        last_end = list(stage_starts)
+
+        for stage, intended_ns, result in outcomes:
+            point = points[stage]
+            point.sent += 1
+            end_ns = intended_ns + result['queue_wait_ns'] + result['execution_ns']
+            last_end[stage] = max(last_end[stage], end_ns)
+            if not result['success']:
+                point.errors += 1
+                continue
+            point.completed += 1
+            point.latency.record(end_ns - intended_ns)
+            point.service_time.record(result['execution_ns'])
+            point.queue_wait.record(result['queue_wait_ns'])
+
+        for index, point in enumerate(points):
+            # A stage lasts until its last answer arrives, so a backlog that
+            # spills past the stage boundary lowers its achieved throughput.
+            elapsed = max(point.duration, (last_end[index] - stage_starts[index]) / 1e9)
+            point.achieved_qps = point.completed / elapsed if elapsed else 0.0
+            point.max_dispatch_lag = lags[index] / 1e9
+
+        result = LoadTestResult(self.executor.mode, self.max_workers, self.arrival, points)
+        for point in sorted(points, key=lambda p: p.target_qps):
+            if point.target_qps and point.achieved_qps < self.saturation_ratio * point.target_qps:
+                result.saturation_qps = point.target_qps
+                break
+            result.max_sustained_qps = max(result.max_sustained_qps, point.achieved_qps)
+        return result
@@ -1,7 +1,13 @@
-from typing import List, Dict, Any
-from dataclasses import dataclass, asdict
-from insurance.parallel_db.parallel_executor import ParallelDBExecutor, ExecutionMetrics
-from insurance.parallel_db.query_generator import generate_test_queries
+import random
+from contextlib import ExitStack
+from typing import List, Dict, Any, Optional, Union, Callable
+from dataclasses import dataclass, asdict, field
+from insurance.parallel_db.parallel_executor import (
+    ParallelDBExecutor, ExecutionMetrics, MODE_THREADS, MODE_PROCESSES, MODE_ASYNC
+)
+from insurance.parallel_db.query_generator import generate_test_queries, to_async_query
+from insurance.parallel_db.trial_stats import TrialSummary, summarize_trials, is_distinguishable
+from insurance.parallel_db.search import Cell, SearchStrategy, get_strategy
 
 
 @dataclass
@@ -10,13 +16,34 @@ class ExperimentResult:
     batch_size: int
     use_processes: bool
     metrics: ExecutionMetrics
+    mode: str = MODE_THREADS
+    trials: List[ExecutionMetrics] = field(default_factory=list)
+    summary: Optional[TrialSummary] = None
+
+    @property
+    def total_time(self) -> float:
+        return self.summary.median if self.summary else self.metrics.total_time
+
+    def config(self) -> Dict[str, Any]:
+        config = {
+            'num_workers': self.num_workers,
+            'batch_size': self.batch_size,
+            'use_processes': self.use_processes,
+            'mode': self.mode,
+            'total_time': self.total_time,
+            'p99_time': self.metrics.p99_time,
+        }
+        if self.summary:
+            config['total_time_ci'] = [self.summary.ci_low, self.summary.ci_high]
+        return config
     
     def to_dict(self) -> Dict[str, Any]:
         result = {
             'num_workers': self.num_workers,
             'batch_size': self.batch_size,
             'use_processes': self.use_processes,
-            'total_time': self.metrics.total_time,
+            'mode': self.mode,
+            'total_time': self.total_time,
             'avg_time_per_query': self.metrics.avg_time_per_query,
             'min_time': self.metrics.min_time,
             'max_time': self.metrics.max_time,
@@ -25,71 +52,244 @@ class ExperimentResult:
             'cpu_usage_percent': self.metrics.cpu_usage_percent,
             'memory_usage_mb': self.metrics.memory_usage_mb,
             'total_queries': self.metrics.total_queries,
+            'pool_startup_time': self.metrics.pool_startup_time,
+            'latency_percentiles': self.metrics.latency_percentiles,
+            'queue_wait_percentiles': self.metrics.queue_wait_percentiles,
+            'avg_queue_wait': self.metrics.avg_queue_wait,
+            'p99_time': self.metrics.p99_time,
+            'query_types': sorted(
+                (stats.to_dict() for stats in self.metrics.query_types.values()),
+                key=lambda t: t['total_latency'],
+                reverse=True
+            ),
+            'latency_curve': [
+                [p, ns / 1e9] for p, ns in self.metrics.latency_histogram.curve()
+            ] if self.metrics.latency_histogram else [],
         }
+        usage = self.metrics.resource_usage
+        if usage is not None:
+            result.update({
+                'peak_cpu_percent': usage.peak_cpu_percent,
+                'mean_memory_mb': usage.mean_rss_mb,
+                'peak_memory_mb': usage.peak_rss_mb,
+                'peak_threads': usage.peak_threads,
+                'ctx_switches': usage.ctx_switches,
+                'db_cpu_percent': usage.mean_db_cpu_percent,
+                'peak_db_cpu_percent': usage.peak_db_cpu_percent,
+                'db_server_sampled': usage.db_server_sampled,
+                'resource_series': usage.series(),
+            })
+        if self.summary:
+            result.update({
+                'total_time_median': self.summary.median,
+                'total_time_mean': self.summary.mean,
+                'total_time_stdev': self.summary.stdev,
+                'total_time_ci': [self.summary.ci_low, self.summary.ci_high],
+                'confidence': self.summary.confidence,
+                'repetitions': len(self.trials),
+                'trial_times': [m.total_time for m in self.trials],
+                'rejected_trials': len(self.summary.rejected),
+            })
         return result
 
 
+class ExperimentRunner:
+    """
+    Measures cells on long-lived executors (one per mode) for a SearchStrategy
+    and keeps every trial plus a log of what was explored and why.
+    """
+
+    def __init__(self, queries, async_queries, modes: List[str], warmup_runs: int = 1,
+                 randomize: bool = True, outlier_k: float = 1.5, seed: Optional[int] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 planned_trials: Optional[int] = None):
+        self.queries = queries
+        self.async_queries = async_queries
+        self.warmup_runs = warmup_runs
+        self.randomize = randomize
+        self.outlier_k = outlier_k
+        self.rng = random.Random(seed)
+        self.trials: Dict[Cell, List[ExecutionMetrics]] = {}
+        self.startup: Dict[Cell, float] = {}
+        self.summaries: Dict[Cell, TrialSummary] = {}
+        self.exploration: List[Dict[str, Any]] = []
+        self.progress_callback = progress_callback
+        self.planned_trials = planned_trials
+        self.trials_done = 0
+        self._stack = ExitStack()
+        # One executor per mode keeps its worker pools alive across every cell.
+        self.executors = {
+            mode: self._stack.enter_context(ParallelDBExecutor(use_processes=mode == MODE_PROCESSES,
+                                                               use_async=mode == MODE_ASYNC))
+            for mode in modes
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+
+    def _run(self, cell: Cell) -> ExecutionMetrics:
+        metrics = self.executors[cell.mode].execute_queries(
+            queries=self.async_queries if cell.mode == MODE_ASYNC else self.queries,
+            max_workers=cell.num_workers,
+            batch_size=cell.batch_size
+        )
+        self.startup[cell] = max(self.startup.get(cell, 0.0), metrics.pool_startup_time)
+        self.trials_done += 1
+        if self.progress_callback is not None:
+            # The callback may raise to cancel the run between two trials.
+            self.progress_callback({
+                'trials_done': self.trials_done,
+                'planned_trials': self.planned_trials,
+                'cells_explored': sum(1 for t in self.trials.values() if t),
+                'current': {'mode': cell.mode, 'num_workers': cell.num_workers, 'batch_size': cell.batch_size},
+            })
+        return metrics
+
+    def is_explored(self, cell: Cell) -> bool:
+        return bool(self.trials.get(cell))
+
+    def median(self, cell: Cell) -> float:
+        summary = self.summaries.get(cell)
+        return summary.median if summary else float('inf')
+
+    def evaluate_many(self, cells: List[Cell], repetitions: int, reason: str) -> Dict[Cell, TrialSummary]:
+        cells = list(cells)
+        fresh = [cell for cell in cells if cell not in self.trials]
+        if self.randomize:
+            self.rng.shuffle(fresh)
+        for cell in fresh:
+            self.trials[cell] = []
+            for _ in range(self.warmup_runs):
+                self._run(cell)
+
+        # Interleave repetitions of all cells so slow drift (autovacuum,
+        # cache churn, noisy neighbours) spreads across configs evenly.
+        schedule = [cell for cell in cells for _ in range(repetitions)]
+        if self.randomize:
+            self.rng.shuffle(schedule)
+        for cell in schedule:
+            self.trials[cell].append(self._run(cell))
+
+        for cell in cells:
+            self.summaries[cell] = summarize_trials([m.total_time for m in self.trials[cell]],
+                                                    outlier_k=self.outlier_k)
+            self.exploration.append({
+                'step': len(self.exploration),
+                'mode': cell.mode,
+                'num_workers': cell.num_workers,
+                'batch_size': cell.batch_size,
+                'repetitions': repetitions,
+                'median': self.summaries[cell].median,
+                'reason': reason,
+            })
+        return {cell: self.summaries[cell] for cell in cells}
+
+    def results(self) -> List['ExperimentResult']:
+        results = []
+        for cell, cell_trials in self.trials.items():
+            if not cell_trials:
+                continue
+            summary = self.summaries[cell]
+            # The representative trial is the one closest to the median.
+            metrics = min(cell_trials, key=lambda m: abs(m.total_time - summary.median))
+            metrics.pool_startup_time = self.startup.get(cell, 0.0)
+            results.append(ExperimentResult(
+                num_workers=cell.num_workers,
+                batch_size=cell.batch_size,
+                use_processes=cell.mode == MODE_PROCESSES,
+                metrics=metrics,
+                mode=cell.mode,
+                trials=cell_trials,
+                summary=summary
+            ))
+        return results
+
+
 class DatabaseOptimizer:
-    def __init__(self, num_queries: int = 150):
+    def __init__(self, num_queries: int = 150, scenario: str = 'mixed', key_distribution: str = 'uniform',
+                 zipf_skew: float = 1.1, seed: Optional[int] = None):
         self.num_queries = num_queries
-        self.queries = generate_test_queries(num_queries)
+        self.scenario = scenario
+        self.queries = generate_test_queries(num_queries, scenario=scenario, key_distribution=key_distribution,
+                                             zipf_skew=zipf_skew, seed=seed)
+        self.async_queries = [to_async_query(q) for q in self.queries]
+        self.strategy_name = None
+        self.exploration: List[Dict[str, Any]] = []
+        self.cells_total = 0
     
     def run_experiments(
         self,
         num_workers_range: List[int] = None,
         batch_sizes: List[int] = None,
         test_threads: bool = True,
-        test_processes: bool = False
+        test_processes: bool = False,
+        test_async: bool = False,
+        warmup_runs: int = 1,
+        repetitions: int = 3,
+        randomize: bool = True,
+        outlier_k: float = 1.5,
+        seed: Optional[int] = None,
+        strategy: Union[str, SearchStrategy] = 'grid',
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> List[ExperimentResult]:
         if num_workers_range is None:
             num_workers_range = [1, 2, 4, 8, 16]
         
         if batch_sizes is None:
             batch_sizes = [None, 10, 25, 50, 100]
+
+        repetitions = max(1, repetitions)
+        if isinstance(strategy, str):
+            strategy = get_strategy(strategy, repetitions=repetitions, seed=seed)
         
-        results = []
-        
+        modes = []
         if test_threads:
-            for num_workers in num_workers_range:
-                for batch_size in batch_sizes:
-                    executor = ParallelDBExecutor(use_processes=False)
-                    metrics = executor.execute_queries(
-                        queries=self.queries,
-                        max_workers=num_workers,
-                        batch_size=batch_size
-                    )
-                    result = ExperimentResult(
-                        num_workers=num_workers,
-                        batch_size=batch_size or self.num_queries,
-                        use_processes=False,
-                        metrics=metrics
-                    )
-                    results.append(result)
-        
+            modes.append(MODE_THREADS)
         if test_processes:
+            modes.append(MODE_PROCESSES)
+        if test_async:
+            modes.append(MODE_ASYNC)
+
+        cells = []
+        for mode in modes:
             for num_workers in num_workers_range:
                 for batch_size in batch_sizes:
-                    executor = ParallelDBExecutor(use_processes=True)
-                    metrics = executor.execute_queries(
-                        queries=self.queries,
-                        max_workers=num_workers,
-                        batch_size=batch_size
-                    )
-                    result = ExperimentResult(
-                        num_workers=num_workers,
-                        batch_size=batch_size or self.num_queries,
-                        use_processes=True,
-                        metrics=metrics
-                    )
-                    results.append(result)
-        
-        return results
+                    cell = Cell(mode, num_workers, batch_size or self.num_queries)
+                    if cell not in cells:
+                        cells.append(cell)
+
+        with ExperimentRunner(self.queries, self.async_queries, modes, warmup_runs=warmup_runs,
+                              randomize=randomize, outlier_k=outlier_k, seed=seed,
+                              progress_callback=progress_callback,
+                              planned_trials=strategy.planned_trials(len(cells), warmup_runs)) as runner:
+            strategy.search(runner, cells)
+
+        self.strategy_name = strategy.name
+        self.exploration = runner.exploration
+        self.cells_total = len(cells)
+        return runner.results()
     
     def find_optimal_config(self, results: List[ExperimentResult]) -> Dict[str, Any]:
         if not results:
             return {}
         
-        best_result = min(results, key=lambda r: r.metrics.total_time)
+        ranked = sorted(results, key=lambda r: r.total_time)
+        best_result = ranked[0]
+        runner_up = ranked[1] if len(ranked) > 1 else None
+        if runner_up is None:
+            significant = True
+        elif best_result.summary and runner_up.summary:
+            significant = is_distinguishable(best_result.summary, runner_up.summary)
+        else:
+            significant = False
+
+        # Tail latency is what the SLOs track, so rank by p99 as well; runs
+        # where every query failed have no latency and cannot win.
+        measured = [r for r in results if r.metrics.success_count] or results
+        best_p99_result = min(measured, key=lambda r: (r.metrics.p99_time, r.total_time))
         
         by_workers = {}
         for result in results:
@@ -99,19 +299,24 @@ class DatabaseOptimizer:
             by_workers[key].append(result)
         
         avg_times_by_workers = {
-            workers: sum(r.metrics.total_time for r in results_list) / len(results_list)
+            workers: sum(r.total_time for r in results_list) / len(results_list)
             for workers, results_list in by_workers.items()
         }
         
         return {
-            'optimal_config': {
-                'num_workers': best_result.num_workers,
-                'batch_size': best_result.batch_size,
-                'use_processes': best_result.use_processes,
-                'total_time': best_result.metrics.total_time,
-            },
+            # Only declared when the winner's median is distinguishable from the runner-up.
+            'optimal_config': best_result.config() if significant else {},
+            'best_candidate': best_result.config(),
+            'runner_up': runner_up.config() if runner_up else {},
+            'significant': significant,
+            'optimal_config_p99': best_p99_result.config(),
             'all_results': [r.to_dict() for r in results],
             'avg_time_by_workers': avg_times_by_workers,
             'best_result': best_result.to_dict(),
+            'search': {
+                'strategy': self.strategy_name,
+                'cells_explored': len(results),
+                'cells_total': self.cells_total,
+                'exploration': self.exploration,
+            },
         }
-
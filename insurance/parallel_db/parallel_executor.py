@@ -1,14 +1,49 @@
-
 import time
-import psutil
 import os
+import asyncio
 import inspect
 import importlib
+import threading
+from functools import lru_cache, partial
 from typing import List, Dict, Callable, Any, Optional
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from asgiref.sync import sync_to_async
 from django.db import connection, connections
 
+from insurance import metrics as app_metrics
+from insurance.parallel_db.histogram import LatencyHistogram, PERCENTILES, percentile_label
+from insurance.parallel_db.resource_sampler import ResourceSampler, ResourceUsage
+
+
+MODE_THREADS = 'threads'
+MODE_PROCESSES = 'processes'
+MODE_ASYNC = 'async'
+
+
+@dataclass
+class QueryTypeStats:
+    query_type: str
+    count: int = 0
+    error_count: int = 0
+    rows: int = 0
+    latency_histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        succeeded = self.latency_histogram.total_count
+        return {
+            'query_type': self.query_type,
+            'count': self.count,
+            'error_count': self.error_count,
+            'rows': self.rows,
+            'avg_rows': self.rows / succeeded if succeeded else 0.0,
+            'total_latency': self.latency_histogram.total_sum / 1e9,
+            'avg_latency': self.latency_histogram.mean() / 1e9,
+            'latency_percentiles': {
+                k: v / 1e9 for k, v in self.latency_histogram.percentiles(PERCENTILES).items()
+            },
+        }
+
 
 @dataclass
 class ExecutionMetrics:
@@ -24,6 +59,34 @@ class ExecutionMetrics:
     num_processes: int
     batch_size: int
     total_queries: int
+    pool_startup_time: float = 0.0
+    # Percentiles are in seconds, keyed 'p50', 'p90', 'p95', 'p99', 'p999'.
+    latency_percentiles: Dict[str, float] = field(default_factory=dict)
+    queue_wait_percentiles: Dict[str, float] = field(default_factory=dict)
+    avg_queue_wait: float = 0.0
+    latency_histogram: Optional[LatencyHistogram] = None
+    queue_wait_histogram: Optional[LatencyHistogram] = None
+    resource_usage: Optional[ResourceUsage] = None
+    query_types: Dict[str, QueryTypeStats] = field(default_factory=dict)
+
+    @property
+    def p99_time(self) -> float:
+        return self.latency_percentiles.get(percentile_label(99), 0.0)
+
+
+def query_type_of(query_func: Callable) -> str:
+    if isinstance(query_func, partial):
+        query_func = query_func.func
+    name = getattr(query_func, '__name__', type(query_func).__name__)
+    return name.removeprefix('_aquery_').removeprefix('_query_')
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
 
 
 def close_db_connections():
@@ -31,76 +94,208 @@ def close_db_connections():
         conn.close()
 
 
-def execute_query_in_thread(query_func: Callable, query_id: int, *args, **kwargs) -> Dict[str, Any]:
+def init_process_worker():
+    # Runs once per worker process: bootstrap Django and open the DB connection
+    # up front so neither is billed to the first query the worker executes.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'insurance.settings')
+
+    import django
+    if not django.apps.apps.ready:
+        django.setup()
+
+    connection.ensure_connection()
+
+
+def init_thread_worker():
+    connection.ensure_connection()
+
+
+def worker_ready() -> int:
+    return os.getpid()
+
+
+@lru_cache(maxsize=None)
+def _resolve_query(module_path: str, func_name: str) -> Callable:
+    module = importlib.import_module(module_path)
+    return getattr(module, func_name)
+
+
+def _query_result(query_id: int, submitted_ns: Optional[int], start_ns: int, end_ns: int,
+                  result: Any = None, error: Optional[str] = None, query_type: str = '') -> Dict[str, Any]:
+    execution_ns = end_ns - start_ns
+    return {
+        'query_id': query_id,
+        'query_type': query_type,
+        'rows': _row_count(result),
+        'success': error is None,
+        'execution_time': execution_ns / 1e9,
+        'execution_ns': execution_ns,
+        'queue_wait_ns': start_ns - submitted_ns if submitted_ns is not None else 0,
+        'result': result,
+        'error': error
+    }
+
+
+def execute_query_in_thread(query_func: Callable, query_id: int, *args, submitted_ns: Optional[int] = None,
+                            **kwargs) -> Dict[str, Any]:
+    query_type = query_type_of(query_func)
+    start_ns = time.perf_counter_ns()
     try:
-        start_time = time.time()
         result = query_func(*args, **kwargs)
-        execution_time = time.time() - start_time
-        
-        close_db_connections()
-        
-        return {
-            'query_id': query_id,
-            'success': True,
-            'execution_time': execution_time,
-            'result': result,
-            'error': None
-        }
+        return _query_result(query_id, submitted_ns, start_ns, time.perf_counter_ns(), result=result,
+                             query_type=query_type)
     except Exception as e:
-        execution_time = time.time() - start_time if 'start_time' in locals() else 0
+        end_ns = time.perf_counter_ns()
         close_db_connections()
-        return {
-            'query_id': query_id,
-            'success': False,
-            'execution_time': execution_time,
-            'result': None,
-            'error': str(e)
-        }
+        return _query_result(query_id, submitted_ns, start_ns, end_ns, error=str(e), query_type=query_type)
 
 
-def execute_query_in_process(query_func_pickle: tuple, query_id: int) -> Dict[str, Any]:
-    if 'DJANGO_SETTINGS_MODULE' not in os.environ:
-        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'insurance.settings')
-    
-    import django
-    if not django.apps.apps.ready:
-        django.setup()
-    
+def execute_query_in_process(query_func_pickle: tuple, query_id: int,
+                             submitted_ns: Optional[int] = None) -> Dict[str, Any]:
+    # perf_counter_ns is CLOCK_MONOTONIC, shared by every process on the host,
+    # so the parent's submit timestamp is comparable with the worker's.
+    start_ns = time.perf_counter_ns()
     module_path, func_name, args, kwargs = query_func_pickle
-    module = importlib.import_module(module_path)
-    query_func = getattr(module, func_name)
-    
+    query_type = func_name.removeprefix('_query_')
+
     try:
-        start_time = time.time()
+        query_func = _resolve_query(module_path, func_name)
         result = query_func(*args, **kwargs)
-        execution_time = time.time() - start_time
-        
-        close_db_connections()
-        
-        return {
-            'query_id': query_id,
-            'success': True,
-            'execution_time': execution_time,
-            'result': result,
-            'error': None
-        }
+        return _query_result(query_id, submitted_ns, start_ns, time.perf_counter_ns(), result=result,
+                             query_type=query_type)
     except Exception as e:
-        execution_time = time.time() - start_time if 'start_time' in locals() else 0
+        end_ns = time.perf_counter_ns()
         close_db_connections()
-        return {
-            'query_id': query_id,
-            'success': False,
-            'execution_time': execution_time,
-            'result': None,
-            'error': str(e)
-        }
+        return _query_result(query_id, submitted_ns, start_ns, end_ns, error=str(e), query_type=query_type)
 
 
-class ParallelDBExecutor:
-    def __init__(self, use_processes: bool = False):
+async def execute_query_in_coroutine(query_func: Callable, query_id: int, semaphore: asyncio.Semaphore,
+                                     submitted_ns: Optional[int] = None, query_type: str = '') -> Dict[str, Any]:
+    query_type = query_type or query_type_of(query_func)
+    async with semaphore:
+        start_ns = time.perf_counter_ns()
+        try:
+            result = await query_func()
+            return _query_result(query_id, submitted_ns, start_ns, time.perf_counter_ns(), result=result,
+                                 query_type=query_type)
+        except Exception as e:
+            end_ns = time.perf_counter_ns()
+            await sync_to_async(close_db_connections)()
+            return _query_result(query_id, submitted_ns, start_ns, end_ns, error=str(e), query_type=query_type)
+
+
+class WorkerPool:
+    def __init__(self, use_processes: bool, max_workers: int):
         self.use_processes = use_processes
-        self.process = psutil.Process(os.getpid())
-    
+        self.max_workers = max_workers
+
+        start_time = time.perf_counter()
+        if use_processes:
+            # Forked workers must not inherit the parent's open DB sockets.
+            close_db_connections()
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_process_worker)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, initializer=init_thread_worker)
+        self._warm_up()
+        self.startup_time = time.perf_counter() - start_time
+
+    def _warm_up(self):
+        if self.use_processes:
+            futures = [self.executor.submit(worker_ready) for _ in range(self.max_workers)]
+            for future in futures:
+                future.result()
+        else:
+            # Every thread has to pick up exactly one task, so all of them are
+            # spawned and connected before the first measured batch.
+            barrier = threading.Barrier(self.max_workers)
+            futures = [self.executor.submit(barrier.wait, 30) for _ in range(self.max_workers)]
+            for future in futures:
+                future.result()
+
+    def submit(self, query_func: Callable, query_id: int, submitted_ns: Optional[int] = None):
+        # Open-loop callers pass the intended start time instead of "now".
+        if submitted_ns is None:
+            submitted_ns = time.perf_counter_ns()
+        if self.use_processes:
+            # Parameterised queries arrive as partials; only the function's
+            # import path and its arguments cross the process boundary.
+            args, kwargs = (), {}
+            if isinstance(query_func, partial):
+                args, kwargs = query_func.args, query_func.keywords
+                query_func = query_func.func
+            module_path = inspect.getmodule(query_func).__name__
+            func_name = query_func.__name__
+            return self.executor.submit(execute_query_in_process, (module_path, func_name, args, kwargs), query_id,
+                                        submitted_ns)
+        return self.executor.submit(execute_query_in_thread, query_func, query_id, submitted_ns=submitted_ns)
+
+    def shutdown(self):
+        if not self.use_processes:
+            barrier = threading.Barrier(self.max_workers)
+
+            def _close():
+                barrier.wait(30)
+                close_db_connections()
+
+            futures = [self.executor.submit(_close) for _ in range(self.max_workers)]
+            for future in futures:
+                try:
+                    future.result()
+                except threading.BrokenBarrierError:
+                    pass
+        self.executor.shutdown(wait=True)
+
+
+class ParallelDBExecutor:
+    def __init__(self, use_processes: bool = False, use_async: bool = False, sample_interval: float = 0.05):
+        self.use_processes = use_processes and not use_async
+        self.use_async = use_async
+        if use_async:
+            self.mode = MODE_ASYNC
+        elif use_processes:
+            self.mode = MODE_PROCESSES
+        else:
+            self.mode = MODE_THREADS
+        self.sample_interval = sample_interval
+        self._pools: Dict[int, WorkerPool] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get_pool(self, max_workers: int) -> tuple:
+        pool = self._pools.get(max_workers)
+        if pool is not None:
+            return pool, 0.0
+        pool = WorkerPool(self.use_processes, max_workers)
+        self._pools[max_workers] = pool
+        return pool, pool.startup_time
+
+    def close(self):
+        for pool in self._pools.values():
+            pool.shutdown()
+        self._pools.clear()
+        if self.use_async:
+            # The async ORM keeps its connection on asgiref's shared sync thread.
+            asyncio.run(sync_to_async(close_db_connections)())
+
+    async def _run_coroutines(self, queries: List[Callable], concurrency: int, batch_size: int) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(concurrency)
+        results = []
+        for batch_start in range(0, len(queries), batch_size):
+            batch_queries = queries[batch_start:batch_start + batch_size]
+            tasks = []
+            for idx, query_func in enumerate(batch_queries):
+                query_type = query_type_of(query_func)
+                if not inspect.iscoroutinefunction(query_func):
+                    query_func = sync_to_async(query_func)
+                tasks.append(execute_query_in_coroutine(query_func, batch_start + idx, semaphore,
+                                                        time.perf_counter_ns(), query_type))
+            results.extend(await asyncio.gather(*tasks))
+        return results
+
     def execute_queries(
         self,
         queries: List[Callable],
@@ -110,57 +305,70 @@ class ParallelDBExecutor:
         total_queries = len(queries)
         if batch_size is None:
             batch_size = total_queries
-        
-        cpu_before = self.process.cpu_percent(interval=0.1)
-        memory_before = self.process.memory_info().rss / 1024 / 1024
-        
-        start_time = time.time()
+
+        if self.use_async:
+            pool_startup_time = 0.0
+        else:
+            pool, pool_startup_time = self.get_pool(max_workers)
+
+        sampler = ResourceSampler(interval=self.sample_interval)
+        sampler.start()
+
+        start_time = time.perf_counter()
         results = []
-        
-        for batch_start in range(0, total_queries, batch_size):
-            batch_end = min(batch_start + batch_size, total_queries)
-            batch_queries = queries[batch_start:batch_end]
-            
-            if self.use_processes:
-                executor = ProcessPoolExecutor(max_workers=max_workers)
-                execute_func = execute_query_in_process
+
+        if self.use_async:
+            # max_workers bounds the number of in-flight coroutines on the loop.
+            results = asyncio.run(self._run_coroutines(queries, max_workers, batch_size))
+        else:
+            for batch_start in range(0, total_queries, batch_size):
+                batch_end = min(batch_start + batch_size, total_queries)
+                batch_queries = queries[batch_start:batch_end]
+
+                futures = []
+                for idx, query_func in enumerate(batch_queries):
+                    query_id = batch_start + idx
+                    futures.append(pool.submit(query_func, query_id))
+
+                for future in as_completed(futures):
+                    results.append(future.result())
+
+        total_time = time.perf_counter() - start_time
+
+        resource_usage = sampler.stop()
+
+        latency_histogram = LatencyHistogram()
+        queue_wait_histogram = LatencyHistogram()
+        query_types: Dict[str, QueryTypeStats] = {}
+        for r in results:
+            queue_wait_histogram.record(r['queue_wait_ns'])
+            stats = query_types.get(r['query_type'])
+            if stats is None:
+                stats = query_types[r['query_type']] = QueryTypeStats(r['query_type'])
+            stats.count += 1
+            if r['success']:
+                latency_histogram.record(r['execution_ns'])
+                stats.latency_histogram.record(r['execution_ns'])
+                stats.rows += r['rows']
+                app_metrics.EXECUTOR_QUERY_DURATION.observe(r['execution_ns'] / 1e9, mode=self.mode)
             else:
-                executor = ThreadPoolExecutor(max_workers=max_workers)
-                execute_func = execute_query_in_thread
-            
-            futures = []
-            for idx, query_func in enumerate(batch_queries):
-                query_id = batch_start + idx
-                if self.use_processes:
-                    import inspect
-                    module_path = inspect.getmodule(query_func).__name__
-                    func_name = query_func.__name__
-                    future = executor.submit(execute_func, (module_path, func_name, (), {}), query_id)
-                else:
-                    future = executor.submit(execute_func, query_func, query_id)
-                futures.append(future)
-            
-            for future in as_completed(futures):
-                results.append(future.result())
-            
-            executor.shutdown(wait=True)
-        
-        total_time = time.time() - start_time
-        
-        cpu_after = self.process.cpu_percent(interval=0.1)
-        memory_after = self.process.memory_info().rss / 1024 / 1024
-        
-        execution_times = [r['execution_time'] for r in results if r['success']]
-        success_count = sum(1 for r in results if r['success'])
+                stats.error_count += 1
+
+        success_count = latency_histogram.total_count
         error_count = total_queries - success_count
-        
-        if execution_times:
-            avg_time = sum(execution_times) / len(execution_times)
-            min_time = min(execution_times)
-            max_time = max(execution_times)
+        app_metrics.EXECUTOR_RUNS.inc(mode=self.mode)
+        app_metrics.EXECUTOR_RUN_DURATION.observe(total_time, mode=self.mode)
+        app_metrics.EXECUTOR_QUERIES.inc(success_count, mode=self.mode, outcome='success')
+        if error_count:
+            app_metrics.EXECUTOR_QUERIES.inc(error_count, mode=self.mode, outcome='error')
+
+        if success_count:
+            avg_time = latency_histogram.mean() / 1e9
+            min_time = latency_histogram.min_value / 1e9
+            max_time = latency_histogram.max_value / 1e9
         else:
             avg_time = min_time = max_time = 0
-        
+
         return ExecutionMetrics(
             total_time=total_time,
             avg_time_per_query=avg_time,
@@ -168,11 +376,18 @@ class ParallelDBExecutor:
             max_time=max_time,
             success_count=success_count,
             error_count=error_count,
-            cpu_usage_percent=max(cpu_before, cpu_after),
-            memory_usage_mb=memory_after - memory_before,
-            num_threads=max_workers if not self.use_processes else 0,
-            num_processes=max_workers if self.use_processes else 0,
+            cpu_usage_percent=resource_usage.mean_cpu_percent,
+            memory_usage_mb=resource_usage.rss_delta_mb,
+            num_threads=max_workers if self.mode == MODE_THREADS else 0,
+            num_processes=max_workers if self.mode == MODE_PROCESSES else 0,
             batch_size=batch_size,
-            total_queries=total_queries
+            total_queries=total_queries,
+            pool_startup_time=pool_startup_time,
+            latency_percentiles={k: v / 1e9 for k, v in latency_histogram.percentiles(PERCENTILES).items()},
+            queue_wait_percentiles={k: v / 1e9 for k, v in queue_wait_histogram.percentiles(PERCENTILES).items()},
+            avg_queue_wait=queue_wait_histogram.mean() / 1e9,
+            latency_histogram=latency_histogram,
+            queue_wait_histogram=queue_wait_histogram,
+            resource_usage=resource_usage,
+            query_types=query_types
         )
-
@@ -0,0 +1,194 @@
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from django.utils import timezone
+
+from insurance.model.query_plan import QueryPlan
+from insurance.parallel_db.history import fingerprint, git_revision, settings_snapshot
+from insurance.repository.unit_of_work import UnitOfWork
+
+
+# A node whose estimate is off by this factor (and involves enough rows to
+# matter) is reported as an estimate miss.
+ESTIMATE_MISS_FACTOR = 10
+ESTIMATE_MISS_MIN_ROWS = 100
+# Execution time changes beyond this fraction (and this many milliseconds,
+# so sub-millisecond jitter is ignored) are reported as slower/faster.
+TIMING_CHANGE_THRESHOLD = 0.25
+TIMING_CHANGE_MIN_MS = 1.0
+
+
+def _params(repo: UnitOfWork) -> Dict[str, Any]:
+    # Representative arguments: the dashboards' one-year window and a
+    # customer who actually has claims.
+    today = timezone.localdate()
+    customer_id = repo.claims.get_all().order_by('id').values_list('policy__customer_id', flat=True).first()
+    return {'date_from': today - timedelta(days=365), 'date_to': today, 'customer_id': customer_id or 0}
+
+
+PLAN_QUERIES: Dict[str, Callable[[UnitOfWork, Dict[str, Any]], Any]] = {
+    'claims.avg_claim_by_age_group':
+        lambda repo, p: repo.claims.avg_claim_by_age_group(date_from=p['date_from'], date_to=p['date_to']),
+    'claims.claims_per_customer': lambda repo, p: repo.claims.claims_per_customer(),
+    'claims.find_by_customer': lambda repo, p: repo.claims.find_by_customer(p['customer_id']),
+    'payments.payments_by_month':
+        lambda repo, p: repo.payments.payments_by_month(date_from=p['date_from'], date_to=p['date_to']),
+    'payments.top_customers_by_payouts':
+        lambda repo, p: repo.payments.top_customers_by_payouts(date_from=p['date_from'], date_to=p['date_to']),
+    'policies.policy_profit_by_type':
+        lambda repo, p: repo.policies.policy_profit_by_type(date_from=p['date_from'], date_to=p['date_to']),
+    'policies.time_to_first_claim_per_policy': lambda repo, p: repo.policies.time_to_first_claim_per_policy(),
+    'policies.get_active_policies': lambda repo, p: repo.policies.get_active_policies(),
+}
+
+
+def explain(qs) -> Dict[str, Any]:
+    raw = qs.explain(format='json', analyze=True, buffers=True)
+    data = json.loads(raw) if isinstance(raw, str) else raw
+    return data[0] if isinstance(data, list) else data
+
+
+def _walk(node: Dict[str, Any], depth: int = 0) -> Iterator[tuple]:
+    yield depth, node
+    for child in node.get('Plans', []):
+        yield from _walk(child, depth + 1)
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    nodes = list(_walk(plan['Plan']))
+    # The shape of the tree without costs or timings; it changes only when
+    # the planner picks a different strategy (a plan flip).
+    shape = '\n'.join(
+        f"{depth}:{node['Node Type']}:{node.get('Relation Name', '')}:{node.get('Index Name', '')}"
+        f":{node.get('Join Type', '')}:{node.get('Strategy', '')}"
+        for depth, node in nodes
+    )
+    misses = []
+    for _, node in nodes:
+        estimated = node.get('Plan Rows', 0)
+        actual = node.get('Actual Rows', 0)
+        if max(estimated, actual) < ESTIMATE_MISS_MIN_ROWS:
+            continue
+        if max(estimated, actual) >= ESTIMATE_MISS_FACTOR * max(1, min(estimated, actual)):
+            misses.append({
+                'node': node['Node Type'],
+                'relation': node.get('Relation Name', ''),
+                'estimated': estimated,
+                'actual': actual,
+            })
+    return {
+        'signature': hashlib.sha256(shape.encode()).hexdigest(),
+        'planning_time': plan.get('Planning Time'),
+        'execution_time': plan.get('Execution Time'),
+        'total_cost': plan['Plan'].get('Total Cost'),
+        'seq_scans': sorted({node['Relation Name'] for _, node in nodes
+                             if node['Node Type'] == 'Seq Scan' and 'Relation Name' in node}),
+        'estimate_misses': misses,
+    }
+
+
+def diff_plans(previous: Optional[QueryPlan], current: Dict[str, Any]) -> Dict[str, Any]:
+    if previous is None:
+        return {'baseline': True}
+    known_misses = {(m['node'], m['relation']) for m in previous.estimate_misses}
+    diff = {
+        'previous_id': previous.id,
+        'plan_flipped': previous.signature != current['signature'],
+        'new_seq_scans': sorted(set(current['seq_scans']) - set(previous.seq_scans)),
+        'resolved_seq_scans': sorted(set(previous.seq_scans) - set(current['seq_scans'])),
+        'new_estimate_misses': [m for m in current['estimate_misses']
+                                if (m['node'], m['relation']) not in known_misses],
+        'previous_execution_time': previous.execution_time,
+        'execution_time_change': None,
+    }
+    if previous.execution_time and current['execution_time'] is not None:
+        change = (current['execution_time'] - previous.execution_time) / previous.execution_time
+        diff['execution_time_change'] = change
+        delta = current['execution_time'] - previous.execution_time
+        if abs(change) > TIMING_CHANGE_THRESHOLD and abs(delta) >= TIMING_CHANGE_MIN_MS:
+            diff['timing'] = 'slower' if change > 0 else 'faster'
+    diff['attention'] = bool(diff['plan_flipped'] or diff['new_seq_scans'] or diff['new_estimate_misses']
+                             or diff.get('timing') == 'slower')
+    return diff
+
+
+def plan_to_dict(plan: QueryPlan, include_plan: bool = False) -> Dict[str, Any]:
+    data = {
+        'id': plan.id,
+        'name': plan.name,
+        'created_at': plan.created_at,
+        'planning_time': plan.planning_time,
+        'execution_time': plan.execution_time,
+        'total_cost': plan.total_cost,
+        'seq_scans': plan.seq_scans,
+        'estimate_misses': plan.estimate_misses,
+        'signature': plan.signature,
+        'diff': plan.diff,
+        'git_revision': plan.git_revision,
+    }
+    if include_plan:
+        data.update({'sql': plan.sql, 'params': plan.params, 'plan': plan.plan})
+    return data
+
+
+def capture_plans(names: Optional[Sequence[str]] = None, save: bool = True) -> List[Dict[str, Any]]:
+    names = list(names or PLAN_QUERIES)
+    unknown = [n for n in names if n not in PLAN_QUERIES]
+    if unknown:
+        raise ValueError(f"Unknown query '{unknown[0]}'. Choose one of: {', '.join(PLAN_QUERIES)}")
+
+    revision = git_revision()
+    settings_fingerprint = fingerprint(settings_snapshot())
+    captured = []
+    with UnitOfWork() as repo:
+        params = _params(repo)
+        for name in names:
+            qs = PLAN_QUERIES[name](repo, params)
+            sql, sql_params = qs.query.sql_with_params()
+            plan = explain(qs)
+            summary = summarize_plan(plan)
+            diff = diff_plans(repo.plans.latest(name), summary)
+            fields = dict(
+                name=name, sql=sql, params=list(sql_params), plan=plan, diff=diff,
+                git_revision=revision, settings_fingerprint=settings_fingerprint, **summary
+            )
+            if save:
+                captured.append(plan_to_dict(repo.plans.create(**fields), include_plan=True))
+            else:
+                captured.append(dict(fields, id=None, created_at=timezone.now()))
+    return captured
+
+
+def format_capture(captured: Dict[str, Any]) -> str:
+    diff = captured['diff']
+    line = f"{captured['name']:42s}{captured['execution_time'] or 0:>10.2f}ms"
+    if diff.get('baseline'):
+        return line + '  baseline'
+    notes = []
+    if diff['plan_flipped']:
+        notes.append('plan flipped')
+    if diff['new_seq_scans']:
+        notes.append('new seq scan on ' + ', '.join(diff['new_seq_scans']))
+    for miss in diff['new_estimate_misses']:
+        notes.append(f"estimate miss on {miss['node']} {miss['relation']} ({miss['estimated']} est. vs {miss['actual']})")
+    if diff['execution_time_change'] is not None:
+        notes.append(f"{diff['execution_time_change']:+.0%} execution time")
+    return line + '  ' + '; '.join(notes)
+
+
+def plan_overview(name: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+    with UnitOfWork(read_only=True) as repo:
+        if name:
+            history = list(repo.plans.history(name, limit))
+            latest = repo.plans.latest(name)
+            return {
+                'name': name,
+                'latest': plan_to_dict(latest, include_plan=True) if latest else None,
+                'history': [plan_to_dict(p) for p in history],
+            }
+        return {
+            'queries': list(PLAN_QUERIES),
+            'latest': [plan_to_dict(p) for p in repo.plans.latest_per_name(list(PLAN_QUERIES))],
+        }
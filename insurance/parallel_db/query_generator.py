@@ -1,36 +1,48 @@
-from typing import List, Callable
+import random
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
 from insurance.repository.unit_of_work import UnitOfWork
 from insurance.model.customer import Customer
 from insurance.model.insurance_policy import InsurancePolicy
 from insurance.model.claim import Claim
 from insurance.model.payment import Payment
+from insurance.parallel_db.workload import KeySampler, DISTRIBUTION_UNIFORM, weighted_sequence
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    mix: Dict[Callable, float]
 
 
-def generate_test_queries(num_queries: int = 100) -> List[Callable]:
+def generate_test_queries(num_queries: int = 100, scenario: str = 'mixed',
+                          key_distribution: str = DISTRIBUTION_UNIFORM, zipf_skew: float = 1.1,
+                          seed: Optional[int] = None) -> List[Callable]:
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{scenario}'. Choose one of: {', '.join(SCENARIOS)}")
+    rng = random.Random(seed)
+    sampler = KeySampler(key_distribution, skew=zipf_skew, seed=rng.randrange(2 ** 32))
+
+    # Keys are drawn once here, so every configuration replays exactly the
+    # same workload and the comparison stays fair.
     queries = []
-    
-    query_types = [
-        _query_get_all_customers,
-        _query_get_all_policies,
-        _query_get_all_claims,
-        _query_get_all_payments,
-        _query_count_customers,
-        _query_count_policies,
-        _query_count_claims,
-        _query_count_payments,
-        _query_get_customer_by_id,
-        _query_get_policy_by_id,
-        _query_get_claims_by_policy,
-        _query_get_payments_by_claim,
-    ]
-    
-    for i in range(num_queries):
-        query_type = query_types[i % len(query_types)]
-        queries.append(query_type)
-    
+    for query_func in weighted_sequence(SCENARIOS[scenario].mix, num_queries, rng):
+        model = KEYED_QUERIES.get(query_func)
+        queries.append(partial(query_func, sampler.sample(model)) if model else query_func)
     return queries
 
 
+def to_async_query(query: Callable) -> Callable:
+    if isinstance(query, partial):
+        return partial(ASYNC_QUERY_VARIANTS[query.func], *query.args, **query.keywords)
+    return ASYNC_QUERY_VARIANTS[query]
+
+
 def _query_get_all_customers():
     with UnitOfWork() as repo:
         return list(repo.customers.get_all().values('id', 'full_name', 'email')[:100])
@@ -71,42 +83,287 @@ def _query_count_payments():
         return repo.payments.count()
 
 
-def _query_get_customer_by_id():
+def _query_get_customer_by_id(customer_id: int):
+    with UnitOfWork() as repo:
+        return repo.customers.get_by_id(customer_id)
+
+
+def _query_get_policy_by_id(policy_id: int):
+    with UnitOfWork() as repo:
+        return repo.policies.get_by_id(policy_id)
+
+
+def _query_get_claims_by_policy(policy_id: int):
+    with UnitOfWork() as repo:
+        return list(repo.claims.find_by_policy(policy_id).values('id', 'claim_date', 'amount')[:10])
+
+
+def _query_get_payments_by_claim(claim_id: int):
+    with UnitOfWork() as repo:
+        return list(repo.payments.find_by_claim(claim_id).values('id', 'date', 'amount')[:10])
+
+
+def _query_get_claims_by_customer(customer_id: int):
+    with UnitOfWork() as repo:
+        return list(repo.claims.find_by_customer(customer_id)[:20])
+
+
+def _query_payments_by_month():
     with UnitOfWork() as repo:
-        customers = list(repo.customers.get_all().values_list('id', flat=True))
-        if customers:
-            customer_id = customers[0]
-            return repo.customers.get_by_id(customer_id)
-    return None
+        return list(repo.payments.payments_by_month())
 
 
-def _query_get_policy_by_id():
+def _query_avg_claim_by_age_group():
     with UnitOfWork() as repo:
-        policies = list(repo.policies.get_all().values_list('id', flat=True))
-        if policies:
-            policy_id = policies[0]
-            return repo.policies.get_by_id(policy_id)
-    return None
+        return list(repo.claims.avg_claim_by_age_group())
 
 
-def _query_get_claims_by_policy():
+def _query_claims_per_customer():
     with UnitOfWork() as repo:
-        policies = list(repo.policies.get_all().values_list('id', flat=True))
-        if policies:
-            policy_id = policies[0]
-            policy = repo.policies.get_by_id(policy_id)
-            if policy:
-                return list(policy.claims.all().values('id', 'claim_date', 'amount')[:10])
-    return []
+        return list(repo.claims.claims_per_customer()[:50])
 
 
-def _query_get_payments_by_claim():
+def _query_policy_profit_by_type():
     with UnitOfWork() as repo:
-        claims = list(repo.claims.get_all().values_list('id', flat=True))
-        if claims:
-            claim_id = claims[0]
-            claim = repo.claims.get_by_id(claim_id)
-            if claim:
-                return list(claim.payments.all().values('id', 'date', 'amount')[:10])
-    return []
+        return list(repo.policies.policy_profit_by_type())
+
+
+def _query_time_to_first_claim():
+    with UnitOfWork() as repo:
+        return list(repo.policies.time_to_first_claim_per_policy())
+
+
+def _query_top_customers_by_payouts():
+    with UnitOfWork() as repo:
+        return list(repo.payments.top_customers_by_payouts())
+
+
+# Writes leave the data as they found it, so repeated runs measure the same tables.
+def _query_update_customer(customer_id: int):
+    with UnitOfWork() as repo:
+        customer = repo.customers.get_by_id(customer_id)
+        if customer is None:
+            return None
+        return repo.customers.update(customer_id, phone=customer.phone).id
+
+
+def _query_update_policy(policy_id: int):
+    with UnitOfWork() as repo:
+        policy = repo.policies.get_by_id(policy_id)
+        if policy is None:
+            return None
+        return repo.policies.update(policy_id, premium=policy.premium).id
+
+
+def _query_create_delete_payment(claim_id: int):
+    with UnitOfWork() as repo:
+        if repo.claims.get_by_id(claim_id) is None:
+            return None
+        payment = repo.payments.create(claim_id=claim_id, amount=Decimal('0.00'), date=date.today())
+    with UnitOfWork() as repo:
+        return repo.payments.delete(payment.id)
+
+
+async def _aquery_get_all_customers():
+    async with UnitOfWork() as repo:
+        return [c async for c in repo.customers.get_all().values('id', 'full_name', 'email')[:100]]
+
+
+async def _aquery_get_all_policies():
+    async with UnitOfWork() as repo:
+        return [p async for p in repo.policies.get_all().values('id', 'policy_number', 'policy_type')[:100]]
+
+
+async def _aquery_get_all_claims():
+    async with UnitOfWork() as repo:
+        return [c async for c in repo.claims.get_all().values('id', 'claim_date', 'amount')[:100]]
+
+
+async def _aquery_get_all_payments():
+    async with UnitOfWork() as repo:
+        return [p async for p in repo.payments.get_all().values('id', 'date', 'amount')[:100]]
+
+
+async def _aquery_count_customers():
+    async with UnitOfWork() as repo:
+        return await repo.customers.acount()
+
+
+async def _aquery_count_policies():
+    async with UnitOfWork() as repo:
+        return await repo.policies.acount()
+
+
+async def _aquery_count_claims():
+    async with UnitOfWork() as repo:
+        return await repo.claims.acount()
+
+
+async def _aquery_count_payments():
+    async with UnitOfWork() as repo:
+        return await repo.payments.acount()
+
+
+async def _aquery_get_customer_by_id(customer_id: int):
+    async with UnitOfWork() as repo:
+        return await repo.customers.aget_by_id(customer_id)
+
+
+async def _aquery_get_policy_by_id(policy_id: int):
+    async with UnitOfWork() as repo:
+        return await repo.policies.aget_by_id(policy_id)
+
+
+async def _aquery_get_claims_by_policy(policy_id: int):
+    async with UnitOfWork() as repo:
+        return [c async for c in repo.claims.find_by_policy(policy_id).values('id', 'claim_date', 'amount')[:10]]
+
+
+async def _aquery_get_payments_by_claim(claim_id: int):
+    async with UnitOfWork() as repo:
+        return [p async for p in repo.payments.find_by_claim(claim_id).values('id', 'date', 'amount')[:10]]
+
+
+async def _aquery_get_claims_by_customer(customer_id: int):
+    async with UnitOfWork() as repo:
+        return [c async for c in repo.claims.find_by_customer(customer_id)[:20]]
+
+
+async def _aquery_payments_by_month():
+    async with UnitOfWork() as repo:
+        return [r async for r in repo.payments.payments_by_month()]
+
+
+async def _aquery_avg_claim_by_age_group():
+    async with UnitOfWork() as repo:
+        return [r async for r in repo.claims.avg_claim_by_age_group()]
+
+
+async def _aquery_claims_per_customer():
+    async with UnitOfWork() as repo:
+        return [r async for r in repo.claims.claims_per_customer()[:50]]
+
+
+async def _aquery_policy_profit_by_type():
+    async with UnitOfWork() as repo:
+        return [r async for r in repo.policies.policy_profit_by_type()]
+
+
+async def _aquery_time_to_first_claim():
+    async with UnitOfWork() as repo:
+        return [r async for r in repo.policies.time_to_first_claim_per_policy()]
+
+
+async def _aquery_top_customers_by_payouts():
+    async with UnitOfWork() as repo:
+        return [r async for r in repo.payments.top_customers_by_payouts()]
+
+
+async def _aquery_update_customer(customer_id: int):
+    async with UnitOfWork() as repo:
+        customer = await repo.customers.aget_by_id(customer_id)
+        if customer is None:
+            return None
+        return (await repo.customers.aupdate(customer_id, phone=customer.phone)).id
+
+
+async def _aquery_update_policy(policy_id: int):
+    async with UnitOfWork() as repo:
+        policy = await repo.policies.aget_by_id(policy_id)
+        if policy is None:
+            return None
+        return (await repo.policies.aupdate(policy_id, premium=policy.premium)).id
+
+
+async def _aquery_create_delete_payment(claim_id: int):
+    async with UnitOfWork() as repo:
+        if await repo.claims.aget_by_id(claim_id) is None:
+            return None
+        payment = await repo.payments.acreate(claim_id=claim_id, amount=Decimal('0.00'), date=date.today())
+        return await repo.payments.adelete(payment.id)
+
+
+ASYNC_QUERY_VARIANTS = {
+    _query_get_all_customers: _aquery_get_all_customers,
+    _query_get_all_policies: _aquery_get_all_policies,
+    _query_get_all_claims: _aquery_get_all_claims,
+    _query_get_all_payments: _aquery_get_all_payments,
+    _query_count_customers: _aquery_count_customers,
+    _query_count_policies: _aquery_count_policies,
+    _query_count_claims: _aquery_count_claims,
+    _query_count_payments: _aquery_count_payments,
+    _query_get_customer_by_id: _aquery_get_customer_by_id,
+    _query_get_policy_by_id: _aquery_get_policy_by_id,
+    _query_get_claims_by_policy: _aquery_get_claims_by_policy,
+    _query_get_payments_by_claim: _aquery_get_payments_by_claim,
+    _query_get_claims_by_customer: _aquery_get_claims_by_customer,
+    _query_payments_by_month: _aquery_payments_by_month,
+    _query_avg_claim_by_age_group: _aquery_avg_claim_by_age_group,
+    _query_claims_per_customer: _aquery_claims_per_customer,
+    _query_policy_profit_by_type: _aquery_policy_profit_by_type,
+    _query_time_to_first_claim: _aquery_time_to_first_claim,
+    _query_top_customers_by_payouts: _aquery_top_customers_by_payouts,
+    _query_update_customer: _aquery_update_customer,
+    _query_update_policy: _aquery_update_policy,
+    _query_create_delete_payment: _aquery_create_delete_payment,
+}
+
+KEYED_QUERIES = {
+    _query_get_customer_by_id: Customer,
+    _query_get_policy_by_id: InsurancePolicy,
+    _query_get_claims_by_policy: InsurancePolicy,
+    _query_get_payments_by_claim: Claim,
+    _query_get_claims_by_customer: Customer,
+    _query_update_customer: Customer,
+    _query_update_policy: InsurancePolicy,
+    _query_create_delete_payment: Claim,
+}
 
+SCENARIOS = {scenario.name: scenario for scenario in (
+    Scenario('mixed', 'The original twelve queries in equal shares', {
+        _query_get_all_customers: 1,
+        _query_get_all_policies: 1,
+        _query_get_all_claims: 1,
+        _query_get_all_payments: 1,
+        _query_count_customers: 1,
+        _query_count_policies: 1,
+        _query_count_claims: 1,
+        _query_count_payments: 1,
+        _query_get_customer_by_id: 1,
+        _query_get_policy_by_id: 1,
+        _query_get_claims_by_policy: 1,
+        _query_get_payments_by_claim: 1,
+    }),
+    Scenario('dashboard_heavy', 'Analytics dashboards: aggregates and the counts widget', {
+        _query_payments_by_month: 3,
+        _query_avg_claim_by_age_group: 2,
+        _query_claims_per_customer: 2,
+        _query_policy_profit_by_type: 2,
+        _query_time_to_first_claim: 1,
+        _query_top_customers_by_payouts: 2,
+        _query_count_customers: 1,
+        _query_count_policies: 1,
+        _query_count_claims: 1,
+        _query_count_payments: 1,
+    }),
+    Scenario('crud_heavy', 'Back-office editing: list pages, detail pages and writes', {
+        _query_get_all_customers: 2,
+        _query_get_all_policies: 2,
+        _query_get_all_claims: 2,
+        _query_get_all_payments: 1,
+        _query_get_customer_by_id: 2,
+        _query_get_policy_by_id: 2,
+        _query_update_customer: 3,
+        _query_update_policy: 2,
+        _query_create_delete_payment: 3,
+        _query_get_claims_by_policy: 1,
+        _query_get_payments_by_claim: 1,
+    }),
+    Scenario('lookup_heavy', 'Point lookups and small related-row fetches', {
+        _query_get_customer_by_id: 5,
+        _query_get_policy_by_id: 5,
+        _query_get_claims_by_policy: 3,
+        _query_get_payments_by_claim: 3,
+        _query_get_claims_by_customer: 2,
+    }),
+)}
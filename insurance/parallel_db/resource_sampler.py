@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import psutil
+from django.conf import settings
+
+
+LOCAL_DB_HOSTS = ('', 'localhost', '127.0.0.1', '::1')
+DB_SERVER_PROCESS_NAMES = ('postgres', 'postmaster')
+
+
+@dataclass
+class ResourceSample:
+    elapsed: float
+    cpu_percent: float
+    rss_mb: float
+    num_threads: int
+    ctx_switches: int
+    num_children: int
+    db_cpu_percent: float = 0.0
+    db_rss_mb: float = 0.0
+
+
+@dataclass
+class ResourceUsage:
+    interval: float
+    mean_cpu_percent: float = 0.0
+    peak_cpu_percent: float = 0.0
+    mean_rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    rss_delta_mb: float = 0.0
+    peak_threads: int = 0
+    ctx_switches: int = 0
+    mean_db_cpu_percent: float = 0.0
+    peak_db_cpu_percent: float = 0.0
+    peak_db_rss_mb: float = 0.0
+    db_server_sampled: bool = False
+    samples: List[ResourceSample] = field(default_factory=list)
+
+    def series(self) -> Dict[str, list]:
+        return {
+            'elapsed': [s.elapsed for s in self.samples],
+            'cpu_percent': [s.cpu_percent for s in self.samples],
+            'rss_mb': [s.rss_mb for s in self.samples],
+            'num_threads': [s.num_threads for s in self.samples],
+            'ctx_switches': [s.ctx_switches for s in self.samples],
+            'db_cpu_percent': [s.db_cpu_percent for s in self.samples],
+            'db_rss_mb': [s.db_rss_mb for s in self.samples],
+        }
+
+
+def _db_is_local() -> bool:
+    return settings.DATABASES.get('default', {}).get('HOST', '') in LOCAL_DB_HOSTS
+
+
+class ResourceSampler:
+    """
+    Samples CPU, RSS, thread count and context switches of this process and
+    all of its descendants (process-pool workers) on a background thread.
+    When the database runs on this host its server processes are sampled too.
+    """
+
+    def __init__(self, interval: float = 0.05, include_db_server: Optional[bool] = None):
+        self.interval = interval
+        self.include_db_server = _db_is_local() if include_db_server is None else include_db_server
+        self.root = psutil.Process(os.getpid())
+        self._tracked: Dict[int, psutil.Process] = {}
+        self._db_tracked: Dict[int, psutil.Process] = {}
+        self._samples: List[ResourceSample] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+        self._base_ctx = 0
+        self._baseline_rss = 0.0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _refresh(self, tracked: Dict[int, psutil.Process], processes: List[psutil.Process]):
+        alive = set()
+        for proc in processes:
+            alive.add(proc.pid)
+            if proc.pid not in tracked:
+                tracked[proc.pid] = proc
+                try:
+                    # The first cpu_percent() call only primes the counter.
+                    proc.cpu_percent(None)
+                except psutil.Error:
+                    pass
+        for pid in list(tracked):
+            if pid not in alive:
+                del tracked[pid]
+
+    def _app_processes(self) -> List[psutil.Process]:
+        try:
+            return [self.root] + self.root.children(recursive=True)
+        except psutil.Error:
+            return [self.root]
+
+    def _db_processes(self) -> List[psutil.Process]:
+        procs = []
+        for proc in psutil.process_iter(['name']):
+            if proc.info.get('name') in DB_SERVER_PROCESS_NAMES:
+                procs.append(proc)
+        return procs
+
+    def _measure(self, tracked: Dict[int, psutil.Process]):
+        cpu = rss = threads = ctx = 0
+        for proc in list(tracked.values()):
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(None)
+                    rss += proc.memory_info().rss
+                    threads += proc.num_threads()
+                    switches = proc.num_ctx_switches()
+                    ctx += switches.voluntary + switches.involuntary
+            except psutil.Error:
+                continue
+        return cpu, rss / 1024 / 1024, threads, ctx
+
+    def sample(self) -> ResourceSample:
+        self._refresh(self._tracked, self._app_processes())
+        cpu, rss_mb, threads, ctx = self._measure(self._tracked)
+        db_cpu = db_rss_mb = 0.0
+        if self.include_db_server:
+            self._refresh(self._db_tracked, self._db_processes())
+            db_cpu, db_rss_mb, _, _ = self._measure(self._db_tracked)
+        sample = ResourceSample(
+            elapsed=time.perf_counter() - self._start,
+            cpu_percent=cpu,
+            rss_mb=rss_mb,
+            num_threads=threads,
+            ctx_switches=ctx - self._base_ctx,
+            num_children=len(self._tracked) - 1,
+            db_cpu_percent=db_cpu,
+            db_rss_mb=db_rss_mb,
+        )
+        self._samples.append(sample)
+        return sample
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._samples = []
+        self._stop.clear()
+        self._start = time.perf_counter()
+        self._refresh(self._tracked, self._app_processes())
+        if self.include_db_server:
+            self._refresh(self._db_tracked, self._db_processes())
+        _, self._baseline_rss, _, self._base_ctx = self._measure(self._tracked)
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> ResourceUsage:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Always close with a final sample so short runs still get one reading.
+        self.sample()
+        return self.usage()
+
+    def usage(self) -> ResourceUsage:
+        samples = self._samples
+        if not samples:
+            return ResourceUsage(interval=self.interval)
+        count = len(samples)
+        return ResourceUsage(
+            interval=self.interval,
+            mean_cpu_percent=sum(s.cpu_percent for s in samples) / count,
+            peak_cpu_percent=max(s.cpu_percent for s in samples),
+            mean_rss_mb=sum(s.rss_mb for s in samples) / count,
+            peak_rss_mb=max(s.rss_mb for s in samples),
+            rss_delta_mb=max(s.rss_mb for s in samples) - self._baseline_rss,
+            peak_threads=max(s.num_threads for s in samples),
+            ctx_switches=samples[-1].ctx_switches,
+            mean_db_cpu_percent=sum(s.db_cpu_percent for s in samples) / count,
+            peak_db_cpu_percent=max(s.db_cpu_percent for s in samples),
+            peak_db_rss_mb=max(s.db_rss_mb for s in samples),
+            db_server_sampled=self.include_db_server and bool(self._db_tracked),
+            samples=list(samples),
+        )
@@ -0,0 +1,173 @@
+import math
+import random
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from typing import Dict, List, Optional, Type
+
+
+Cell = namedtuple('Cell', ['mode', 'num_workers', 'batch_size'])
+
+
+class SearchStrategy(ABC):
+    """
+    Decides which (mode, workers, batch size) cells to measure and how often.
+
+    Strategies drive an ExperimentRunner: runner.evaluate_many(cells, repetitions, reason)
+    measures cells and returns their TrialSummary objects, and every call is
+    recorded in the runner's exploration log together with the reason.
+    """
+
+    name = 'base'
+
+    def __init__(self, repetitions: int = 3, seed: Optional[int] = None):
+        self.repetitions = repetitions
+        self.rng = random.Random(seed)
+
+    def planned_trials(self, num_cells: int, warmup_runs: int) -> Optional[int]:
+        # Adaptive strategies cannot know their trial count up front.
+        return None
+
+    @abstractmethod
+    def search(self, runner, cells: List[Cell]):
+        ...
+
+
+class GridSearch(SearchStrategy):
+    name = 'grid'
+
+    def planned_trials(self, num_cells: int, warmup_runs: int) -> Optional[int]:
+        return num_cells * (self.repetitions + warmup_runs)
+
+    def search(self, runner, cells: List[Cell]):
+        runner.evaluate_many(cells, self.repetitions, 'full grid')
+
+
+class SuccessiveHalving(SearchStrategy):
+    name = 'halving'
+
+    def __init__(self, repetitions: int = 3, seed: Optional[int] = None, eta: int = 2, min_repetitions: int = 1):
+        super().__init__(repetitions, seed)
+        self.eta = max(2, eta)
+        self.min_repetitions = max(1, min_repetitions)
+
+    def search(self, runner, cells: List[Cell]):
+        survivors = list(cells)
+        reps = self.min_repetitions
+        round_no = 0
+        while survivors:
+            reason = (f'round {round_no}: {len(survivors)} candidates, {reps} repetition(s)'
+                      if round_no else f'round 0: screening all {len(survivors)} cells')
+            runner.evaluate_many(survivors, reps, reason)
+            if len(survivors) == 1:
+                break
+            ranked = sorted(survivors, key=runner.median)
+            survivors = ranked[:max(1, len(ranked) // self.eta)]
+            # Survivors accumulate trials, so their medians get tighter each round.
+            reps = min(reps * self.eta, self.repetitions)
+            round_no += 1
+
+
+class HillClimbing(SearchStrategy):
+    name = 'hill_climb'
+
+    def search(self, runner, cells: List[Cell]):
+        for mode in sorted({c.mode for c in cells}):
+            mode_cells = [c for c in cells if c.mode == mode]
+            workers = sorted({c.num_workers for c in mode_cells})
+            batches = sorted({c.batch_size for c in mode_cells})
+            by_key = {(c.num_workers, c.batch_size): c for c in mode_cells}
+
+            # Start in the middle of the worker range with the largest batch.
+            wi, bi = len(workers) // 2, len(batches) - 1
+            current = by_key.get((workers[wi], batches[bi])) or mode_cells[0]
+            wi, bi = workers.index(current.num_workers), batches.index(current.batch_size)
+            runner.evaluate_many([current], self.repetitions, f'{mode}: start')
+
+            while True:
+                neighbours = []
+                for dw, db in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                    nw, nb = wi + dw, bi + db
+                    if 0 <= nw < len(workers) and 0 <= nb < len(batches):
+                        cell = by_key.get((workers[nw], batches[nb]))
+                        if cell is not None and not runner.is_explored(cell):
+                            neighbours.append(cell)
+                if not neighbours:
+                    break
+                runner.evaluate_many(
+                    neighbours, self.repetitions,
+                    f'{mode}: neighbours of {current.num_workers} workers / batch {current.batch_size}'
+                )
+                best = min(neighbours, key=runner.median)
+                if runner.median(best) >= runner.median(current):
+                    break
+                current = best
+                wi, bi = workers.index(current.num_workers), batches.index(current.batch_size)
+
+
+class SurrogateSampling(SearchStrategy):
+    """
+    Bayesian-style search: a cheap surrogate (inverse-distance weighted medians
+    of measured cells) predicts unexplored cells, and the cell with the lowest
+    lower confidence bound is measured next until the budget runs out.
+    """
+
+    name = 'bayes'
+
+    def __init__(self, repetitions: int = 3, seed: Optional[int] = None, initial_samples: int = 4,
+                 budget_fraction: float = 0.4, kappa: float = 1.0):
+        super().__init__(repetitions, seed)
+        self.initial_samples = initial_samples
+        self.budget_fraction = budget_fraction
+        self.kappa = kappa
+
+    @staticmethod
+    def _distance(a: Cell, b: Cell) -> float:
+        dw = math.log2(max(1, a.num_workers)) - math.log2(max(1, b.num_workers))
+        db = math.log2(max(1, a.batch_size)) - math.log2(max(1, b.batch_size))
+        dm = 0.0 if a.mode == b.mode else 2.0
+        return math.sqrt(dw * dw + db * db + dm * dm)
+
+    def _predict(self, runner, cell: Cell, explored: List[Cell]):
+        weights = []
+        values = []
+        for other in explored:
+            d = self._distance(cell, other)
+            weights.append(1.0 / (d * d + 1e-9))
+            values.append(runner.median(other))
+        total = sum(weights)
+        mean = sum(w * v for w, v in zip(weights, values)) / total
+        spread = (max(values) - min(values)) if len(values) > 1 else abs(mean)
+        nearest = min(self._distance(cell, other) for other in explored)
+        return mean, spread * min(1.0, nearest / 2)
+
+    def search(self, runner, cells: List[Cell]):
+        budget = max(self.initial_samples, math.ceil(len(cells) * self.budget_fraction))
+        initial = self.rng.sample(cells, min(self.initial_samples, len(cells)))
+        runner.evaluate_many(initial, self.repetitions, 'initial random sample')
+        while sum(1 for c in cells if runner.is_explored(c)) < min(budget, len(cells)):
+            explored = [c for c in cells if runner.is_explored(c)]
+            candidates = [c for c in cells if not runner.is_explored(c)]
+            scored = []
+            for cell in candidates:
+                mean, uncertainty = self._predict(runner, cell, explored)
+                scored.append((mean - self.kappa * uncertainty, mean, uncertainty, cell))
+            lcb, mean, uncertainty, cell = min(scored, key=lambda s: s[0])
+            runner.evaluate_many(
+                [cell], self.repetitions,
+                f'lowest LCB {lcb:.3f}s (predicted {mean:.3f}s ± {uncertainty:.3f}s)'
+            )
+
+
+STRATEGIES: Dict[str, Type[SearchStrategy]] = {
+    GridSearch.name: GridSearch,
+    SuccessiveHalving.name: SuccessiveHalving,
+    HillClimbing.name: HillClimbing,
+    SurrogateSampling.name: SurrogateSampling,
+}
+
+
+def get_strategy(name: str, **kwargs) -> SearchStrategy:
+    try:
+        return STRATEGIES[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown search strategy '{name}'. Choose one of: {', '.join(STRATEGIES)}")
@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class TrialSummary:
+    median: float
+    mean: float
+    stdev: float
+    ci_low: float
+    ci_high: float
+    confidence: float
+    kept: List[float] = field(default_factory=list)
+    rejected: List[float] = field(default_factory=list)
+
+    @property
+    def n(self) -> int:
+        return len(self.kept)
+
+
+def reject_outliers(values: Sequence[float], k: float = 1.5) -> Tuple[List[float], List[float]]:
+    # Tukey fences; quartiles of fewer than four trials are meaningless.
+    values = list(values)
+    if len(values) < 4 or k <= 0:
+        return values, []
+    q1, q3 = np.percentile(values, [25, 75])
+    iqr = q3 - q1
+    low, high = q1 - k * iqr, q3 + k * iqr
+    kept = [v for v in values if low <= v <= high]
+    rejected = [v for v in values if v < low or v > high]
+    return kept, rejected
+
+
+def bootstrap_median_ci(values: Sequence[float], confidence: float = 0.95, resamples: int = 2000,
+                        seed: Optional[int] = 0) -> Tuple[float, float]:
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return 0.0, 0.0
+    if values.size == 1:
+        return float(values[0]), float(values[0])
+    rng = np.random.default_rng(seed)
+    samples = rng.choice(values, size=(resamples, values.size), replace=True)
+    medians = np.median(samples, axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(medians, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def summarize_trials(values: Sequence[float], outlier_k: float = 1.5, confidence: float = 0.95,
+                     seed: Optional[int] = 0) -> TrialSummary:
+    kept, rejected = reject_outliers(values, outlier_k)
+    if not kept:
+        return TrialSummary(0.0, 0.0, 0.0, 0.0, 0.0, confidence, kept, rejected)
+    arr = np.asarray(kept, dtype=float)
+    ci_low, ci_high = bootstrap_median_ci(kept, confidence=confidence, seed=seed)
+    return TrialSummary(
+        median=float(np.median(arr)),
+        mean=float(arr.mean()),
+        stdev=float(arr.std(ddof=1)) if arr.size > 1 else 0.0,
+        ci_low=ci_low,
+        ci_high=ci_high,
+        confidence=confidence,
+        kept=kept,
+        rejected=rejected,
+    )
+
+
+def is_distinguishable(best: TrialSummary, runner_up: TrialSummary) -> bool:
+    # Non-overlapping confidence intervals of the medians; a single trial
+    # carries no spread information and never counts as significant.
+    if best.n < 2 or runner_up.n < 2:
+        return False
+    return best.ci_high < runner_up.ci_low
@@ -0,0 +1,146 @@
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from insurance.parallel_db.history import git_revision
+from insurance.parallel_db.trial_stats import summarize_trials
+from insurance.repository.unit_of_work import READ_ONLY_MODES, UnitOfWork
+
+
+# Read-only API requests; {customer}, {policy} and {tax_number} are filled in
+# from the current database.
+READ_ENDPOINTS = (
+    '/api/customers/?page_size=10',
+    '/api/customers/{customer}/',
+    '/api/customers/count/',
+    '/api/customers/find_by_tax_number/?tax_number={tax_number}',
+    '/api/policies/?page_size=10',
+    '/api/policies/count/',
+    '/api/claims/?page_size=10',
+    '/api/claims/count/',
+    '/api/claims/find_by_customer/?customer_id={customer}',
+    '/api/claims/find_by_policy/?policy_id={policy}',
+    '/api/payments/?page_size=10',
+    '/api/payments/count/',
+    '/api/analytics/counts/',
+    '/api/analytics/payments-by-month/',
+    '/api/analytics/avg-claim-by-age-group/',
+    '/api/analytics/claims-per-customer/',
+    '/api/analytics/policy-profit-by-type/',
+    '/api/analytics/time-to-claim/',
+    '/api/analytics/top-customers-by-payouts/',
+    '/api/analytics/db-optimization/history/',
+)
+
+# libpq's PQTRANS_IDLE, the same value in psycopg2 and psycopg 3.
+_TRANSACTION_IDLE = 0
+
+
+class RoundTripCounter:
+    """
+    Counts statements plus the BEGIN and COMMIT the driver sends around the
+    first statement of every transaction; neither of those two passes
+    through Django's execute wrappers.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.transactions = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if not connection.get_autocommit() and \
+                connection.connection.info.transaction_status == _TRANSACTION_IDLE:
+            self.transactions += 1
+        self.statements += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def round_trips(self) -> int:
+        return self.statements + 2 * self.transactions
+
+
+def _placeholders() -> Dict[str, Any]:
+    with UnitOfWork(read_only=True) as repo:
+        customer = repo.customers.get_all().order_by('id').first()
+        policy = repo.policies.get_all().order_by('id').first()
+    return {
+        'customer': customer.id if customer else 0,
+        'tax_number': customer.tax_number if customer else '',
+        'policy': policy.id if policy else 0,
+    }
+
+
+def _measure(client: APIClient, path: str, repetitions: int, warmup_runs: int) -> Dict[str, Any]:
+    for _ in range(warmup_runs):
+        client.get(path)
+    times: List[float] = []
+    counter = RoundTripCounter()
+    status = None
+    for _ in range(repetitions):
+        counter = RoundTripCounter()
+        with connections['default'].execute_wrapper(counter):
+            start = time.perf_counter()
+            status = client.get(path).status_code
+            times.append(time.perf_counter() - start)
+    summary = summarize_trials(times)
+    return {
+        'status': status,
+        'statements': counter.statements,
+        'transactions': counter.transactions,
+        'round_trips': counter.round_trips,
+        'median_ms': summary.median * 1e3,
+        'ci_ms': [summary.ci_low * 1e3, summary.ci_high * 1e3],
+    }
+
+
+def run_unit_benchmark(modes: Sequence[str] = READ_ONLY_MODES, repetitions: int = 20, warmup_runs: int = 2,
+                       log: Callable[[str], None] = lambda message: None) -> Dict[str, Any]:
+    unknown = [m for m in modes if m not in READ_ONLY_MODES]
+    if unknown:
+        raise ValueError(f"Unknown mode(s) {', '.join(unknown)}. Choose from: {', '.join(READ_ONLY_MODES)}")
+    values = _placeholders()
+    paths = [endpoint.format(**values) for endpoint in READ_ENDPOINTS]
+    results: Dict[str, Dict[str, Any]] = {path: {} for path in paths}
+    # Replicas are left out so every mode talks to the same server.
+    with override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0, DATABASE_REPLICA_WEIGHTS={}):
+        for mode in modes:
+            log(f'mode {mode}')
+            with override_settings(READ_ONLY_UNIT_MODE=mode):
+                client = APIClient(SERVER_NAME='localhost')
+                client.force_authenticate(User(id=0, username='unit-benchmark'))
+                for path in paths:
+                    results[path][mode] = _measure(client, path, repetitions, warmup_runs)
+
+    totals = {mode: sum(r[mode]['round_trips'] for r in results.values()) for mode in modes}
+    saved = {}
+    if 'atomic' in modes:
+        saved = {mode: (totals['atomic'] - totals[mode]) / len(paths) for mode in modes}
+    return {
+        'meta': {'modes': list(modes), 'repetitions': repetitions, 'warmup_runs': warmup_runs,
+                 'git_revision': git_revision()},
+        'results': results,
+        'round_trips_per_request': {mode: totals[mode] / len(paths) for mode in modes},
+        'saved_per_request': saved,
+    }
+
+
+def format_unit_summary(report: Dict[str, Any]) -> str:
+    modes = report['meta']['modes']
+    header = f"{'endpoint':58s}" + ''.join(f'{m + " trips":>18s}{m + " ms":>16s}' for m in modes)
+    lines = [header, '-' * len(header)]
+    for path, by_mode in report['results'].items():
+        cells = ''.join(f"{by_mode[m]['round_trips']:>18d}{by_mode[m]['median_ms']:>16.2f}" for m in modes)
+        failed = sorted({by_mode[m]['status'] for m in modes if by_mode[m]['status'] >= 400})
+        lines.append(f'{path[:58]:58s}{cells}' + (f'  HTTP {failed}' if failed else ''))
+    lines.append('')
+    for mode in modes:
+        line = f"{mode}: {report['round_trips_per_request'][mode]:.2f} round trips per request"
+        if report['saved_per_request']:
+            line += f", {report['saved_per_request'][mode]:.2f} saved vs atomic"
+        lines.append(line)
+    return '\n'.join(lines)
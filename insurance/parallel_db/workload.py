@@ -0,0 +1,70 @@
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db.models import Max, Min
+
+
+DISTRIBUTION_UNIFORM = 'uniform'
+DISTRIBUTION_ZIPF = 'zipf'
+KEY_DISTRIBUTIONS = (DISTRIBUTION_UNIFORM, DISTRIBUTION_ZIPF)
+
+# Zipf ranks are multiplied by this prime modulo the id span, so the hot
+# keys are scattered over the table instead of being its oldest rows.
+_SCATTER_PRIME = 2_147_483_647
+
+
+class KeySampler:
+    """
+    Samples primary keys without loading them: one MIN/MAX aggregate per
+    table, then O(1) per key. Zipf ranks come from the inverse CDF of the
+    continuous power law, so no per-key weight table is built either.
+    """
+
+    def __init__(self, distribution: str = DISTRIBUTION_UNIFORM, skew: float = 1.1, seed: Optional[int] = None):
+        if distribution not in KEY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown key distribution '{distribution}'. Choose one of: {', '.join(KEY_DISTRIBUTIONS)}")
+        if skew <= 0:
+            raise ValueError('Zipf skew must be positive')
+        self.distribution = distribution
+        self.skew = skew
+        self.rng = random.Random(seed)
+        self._ranges: Dict[type, Optional[Tuple[int, int]]] = {}
+
+    def id_range(self, model) -> Optional[Tuple[int, int]]:
+        if model not in self._ranges:
+            bounds = model.objects.aggregate(low=Min('id'), high=Max('id'))
+            self._ranges[model] = None if bounds['low'] is None else (bounds['low'], bounds['high'])
+        return self._ranges[model]
+
+    def _zipf_rank(self, n: int) -> int:
+        u = self.rng.random()
+        s = self.skew
+        if abs(s - 1.0) < 1e-9:
+            rank = n ** u
+        else:
+            rank = ((n ** (1 - s) - 1) * u + 1) ** (1 / (1 - s))
+        return min(n, max(1, int(rank))) - 1
+
+    def sample(self, model) -> Optional[int]:
+        bounds = self.id_range(model)
+        if bounds is None:
+            return None
+        low, high = bounds
+        span = high - low + 1
+        if self.distribution == DISTRIBUTION_UNIFORM:
+            return low + self.rng.randrange(span)
+        return low + (self._zipf_rank(span) * _SCATTER_PRIME) % span
+
+
+def weighted_sequence(mix: Dict[Callable, float], count: int, rng: random.Random) -> List[Callable]:
+    # Largest-remainder apportionment keeps the realised mix exact for any
+    # count; only the order is random.
+    total = sum(mix.values())
+    exact = {func: count * weight / total for func, weight in mix.items()}
+    counts = {func: int(share) for func, share in exact.items()}
+    missing = count - sum(counts.values())
+    for func in sorted(mix, key=lambda f: exact[f] - counts[f], reverse=True)[:missing]:
+        counts[func] += 1
+    sequence = [func for func in mix for _ in range(counts[func])]
+    rng.shuffle(sequence)
+    return sequence
@@ -1,34 +1,101 @@
-from typing import Type, TypeVar, Generic
-from django.db import models
+from typing import Optional, Type, TypeVar, Generic
+from asgiref.sync import sync_to_async
+from django.db import connections, models, router
+
+from .identity_map import IdentityMap
 
 T = TypeVar('T', bound=models.Model)
 
 class BaseRepository(Generic[T]):
+    # Set by the UnitOfWork that owns this repository.
+    identity_map: Optional[IdentityMap] = None
+
     def __init__(self, model: Type[T]):
         self.model = model
 
+    def _remember(self, obj):
+        if obj is not None and self.identity_map is not None:
+            self.identity_map.add(obj)
+        return obj
+
+    def _forget(self, obj_id):
+        if self.identity_map is not None:
+            self.identity_map.evict(self.model, obj_id)
+
+    def _forget_all(self):
+        # Deletes cascade to rows of other models, so nothing cached is trusted.
+        if self.identity_map is not None:
+            self.identity_map.clear()
+
     def get_all(self):
         return self.model.objects.all()
 
     def get_by_id(self, obj_id: int):
-        return self.model.objects.filter(id=obj_id).first()
+        if self.identity_map is not None:
+            obj = self.identity_map.get(self.model, obj_id)
+            if obj is not None:
+                return obj
+        return self._remember(self.model.objects.filter(id=obj_id).first())
+
+    async def aget_by_id(self, obj_id: int):
+        if self.identity_map is not None:
+            obj = self.identity_map.get(self.model, obj_id)
+            if obj is not None:
+                return obj
+        return self._remember(await self.model.objects.filter(id=obj_id).afirst())
 
     def create(self, **kwargs) -> T:
-        return self.model.objects.create(**kwargs)
+        return self._remember(self.model.objects.create(**kwargs))
+
+    async def acreate(self, **kwargs) -> T:
+        return self._remember(await self.model.objects.acreate(**kwargs))
 
     def update(self, obj_id: int, **kwargs):
-        obj = self.get_by_id(obj_id)
-        print(kwargs)
-        if not obj:
-            return None
-        for key, value in kwargs.items():
-            setattr(obj, key, value)
-        obj.save()
-        return obj
+        """
+        Writes only the given fields (update_fields semantics) with a single
+        UPDATE ... RETURNING and returns the refreshed row, or None when no
+        row has that id. Model.save() and its signals are bypassed.
+        """
+        if not kwargs:
+            return self.get_by_id(obj_id)
+        meta = self.model._meta
+        alias = router.db_for_write(self.model)
+        connection = connections[alias]
+        quote = connection.ops.quote_name
+        assignments = []
+        params = []
+        for name, value in kwargs.items():
+            field = meta.get_field(name)
+            if field.is_relation and isinstance(value, models.Model):
+                value = value.pk
+            assignments.append(f'{quote(field.column)} = %s')
+            params.append(field.get_db_prep_save(value, connection))
+        params.append(meta.pk.get_db_prep_value(meta.pk.to_python(obj_id), connection))
+        columns = ', '.join(quote(field.column) for field in meta.concrete_fields)
+        sql = (
+            f'UPDATE {quote(meta.db_table)} SET {", ".join(assignments)} '
+            f'WHERE {quote(meta.pk.column)} = %s RETURNING {columns}'
+        )
+        self._forget(obj_id)
+        # raw() applies the fields' from_db converters to the returned row.
+        obj = next(iter(self.model.objects.raw(sql, params, using=alias)), None)
+        return self._remember(obj)
+
+    async def aupdate(self, obj_id: int, **kwargs):
+        return await sync_to_async(self.update)(obj_id, **kwargs)
 
     def delete(self, obj_id: int) -> bool:
+        self._forget_all()
         deleted, _ = self.model.objects.filter(id=obj_id).delete()
         return bool(deleted)
 
+    async def adelete(self, obj_id: int) -> bool:
+        self._forget_all()
+        deleted, _ = await self.model.objects.filter(id=obj_id).adelete()
+        return bool(deleted)
+
     def count(self):
-        return self.model.objects.count()
\ No newline at end of file
+        return self.model.objects.count()
+
+    async def acount(self):
+        return await self.model.objects.acount()
@@ -1,10 +1,13 @@
 from .base_repository import BaseRepository
 from insurance.model.claim import Claim
 from django.db import models
-from django.db.models import Avg, Count, Sum, F, Case, When, Value, IntegerField
+from django.db.models import Avg, Count, Sum, F, Case, When, Value, IntegerField, Prefetch
 from django.db.models.functions import ExtractYear, Now, Coalesce
 
 from ..model.customer import Customer
+from ..model.insurance_policy import InsurancePolicy
+from ..model.payment import Payment
+from .search import search_rows
 
 
 class ClaimRepository(BaseRepository):
@@ -14,6 +17,33 @@ class ClaimRepository(BaseRepository):
     def find_by_policy(self, policy_id: int):
         return self.model.objects.filter(policy_id=policy_id)
 
+    def autocomplete(self, query: str, limit: int, by_policy: bool = True):
+        # Claims whose id is the query, or that belong to the best matching
+        # policy numbers (served by the trigram index on policy_number).
+        match = models.Q(pk=int(query)) if query.isdigit() else models.Q(pk__in=[])
+        if by_policy:
+            policies = search_rows(InsurancePolicy, 'policy', ('policy_number',), (), query, limit)
+            match |= models.Q(policy_id__in=[row['id'] for row in policies])
+        return list(
+            self.model.objects
+            .filter(match)
+            .select_related('policy')
+            .order_by('-claim_date', '-id')[:limit]
+        )
+
+    def get_full_view(self, claim_id):
+        # One query for the claim with its policy, customer and payment total,
+        # one for the payments themselves.
+        return (
+            self.model.objects
+            .filter(pk=claim_id)
+            .select_related('policy', 'policy__customer')
+            .prefetch_related(Prefetch('payments', queryset=Payment.objects.order_by('date', 'id')))
+            .annotate(payments_total=Coalesce(Sum('payments__amount'), Value(0),
+                                              output_field=models.DecimalField(max_digits=14, decimal_places=2)))
+            .first()
+        )
+
     def find_by_customer(self, customer_id: int):
         return (
             self.model.objects
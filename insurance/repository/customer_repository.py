@@ -1,5 +1,32 @@
+from django.db import models
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
 from .base_repository import BaseRepository
+from .search import search_rows
 from insurance.model.customer import Customer
+from insurance.model.claim import Claim
+from insurance.model.insurance_policy import InsurancePolicy
+from insurance.model.payment import Payment
+
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def _scalar(qs, group_by: str, aggregate, output_field):
+    # One correlated value per outer row, e.g. the claim total of a policy.
+    value = qs.order_by().values(group_by).annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(value, output_field=output_field), Value(0), output_field=output_field)
+
+
+def _totals(claim_filter: str, payment_filter: str):
+    claims = Claim.objects.filter(**{claim_filter: OuterRef('pk')})
+    payments = Payment.objects.filter(**{payment_filter: OuterRef('pk')})
+    return {
+        'claims_count': _scalar(claims, claim_filter, Count('id'), models.IntegerField()),
+        'total_claimed': _scalar(claims, claim_filter, Sum('amount'), MONEY),
+        'total_paid': _scalar(payments, payment_filter, Sum('amount'), MONEY),
+    }
+
 
 class CustomerRepository(BaseRepository):
     def __init__(self):
@@ -9,4 +36,32 @@ class CustomerRepository(BaseRepository):
         return self.model.objects.filter(email=email).first()
 
     def find_by_tax_number(self, tax_number: str):
-        return self.model.objects.filter(tax_number=tax_number).first()
\ No newline at end of file
+        return self.model.objects.filter(tax_number=tax_number).first()
+
+    def search(self, query: str, limit: int, after=None):
+        columns = ('full_name', 'email', 'tax_number')
+        return search_rows(self.model, 'customer', columns, columns, query, limit, after)
+
+    def get_summary(self, customer_id):
+        # Two queries however many policies, claims and payments there are:
+        # the customer with its totals, and its policies with theirs.
+        policies = (
+            InsurancePolicy.objects
+            .annotate(**_totals('policy', 'claim__policy'))
+            .order_by('start_date', 'id')
+        )
+        customer = (
+            self.model.objects
+            .filter(pk=customer_id)
+            .annotate(
+                policies_count=_scalar(InsurancePolicy.objects.filter(customer=OuterRef('pk')), 'customer',
+                                       Count('id'), models.IntegerField()),
+                **_totals('policy__customer', 'claim__policy__customer'),
+            )
+            .prefetch_related(Prefetch('policies', queryset=policies, to_attr='summary_policies'))
+            .first()
+        )
+        if customer is not None:
+            for row in [customer] + customer.summary_policies:
+                row.outstanding = row.total_claimed - row.total_paid
+        return customer
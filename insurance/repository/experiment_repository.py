@@ -0,0 +1,31 @@
+from typing import Any, Dict, List
+
+from .base_repository import BaseRepository
+from insurance.model.experiment_run import ExperimentRun
+from insurance.model.experiment_metric import ExperimentMetric
+
+
+class ExperimentRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(ExperimentRun)
+
+    def record(self, metrics: List[Dict[str, Any]], **run_fields) -> ExperimentRun:
+        run = self.model.objects.create(**run_fields)
+        ExperimentMetric.objects.bulk_create([ExperimentMetric(run=run, **m) for m in metrics])
+        return run
+
+    def recent(self, limit: int = 20, num_queries: int = None, scenario: str = None):
+        qs = self.model.objects.all()
+        if num_queries is not None:
+            qs = qs.filter(num_queries=num_queries)
+        if scenario is not None:
+            qs = qs.filter(params__scenario=scenario)
+        return qs.order_by('-created_at')[:limit]
+
+    def metrics_for_runs(self, run_ids: List[int]):
+        return (
+            ExperimentMetric.objects
+            .filter(run_id__in=run_ids)
+            .values('run_id', 'mode', 'num_workers', 'batch_size', 'total_time', 'ci_low', 'ci_high', 'p99_time')
+            .order_by('run_id')
+        )
@@ -0,0 +1,43 @@
+from typing import Any, Dict, Optional, Tuple, Type
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+class IdentityMap:
+    """
+    Rows loaded by primary key within one unit of work, so asking for the
+    same row twice returns the same instance without another query.
+    """
+
+    def __init__(self):
+        self._objects: Dict[Tuple[str, Any], models.Model] = {}
+
+    @staticmethod
+    def key(model: Type[models.Model], pk) -> Optional[Tuple[str, Any]]:
+        try:
+            value = model._meta.pk.to_python(pk)
+        except ValidationError:
+            # Left to the query, which raises the usual error.
+            return None
+        return (model._meta.label, value) if value is not None else None
+
+    def get(self, model: Type[models.Model], pk) -> Optional[models.Model]:
+        key = self.key(model, pk)
+        return self._objects.get(key) if key else None
+
+    def add(self, obj: models.Model):
+        key = self.key(type(obj), obj.pk)
+        if key:
+            self._objects[key] = obj
+
+    def evict(self, model: Type[models.Model], pk):
+        key = self.key(model, pk)
+        if key:
+            self._objects.pop(key, None)
+
+    def clear(self):
+        self._objects.clear()
+
+    def __len__(self):
+        return len(self._objects)
@@ -0,0 +1,51 @@
+from django.utils import timezone
+
+from .base_repository import BaseRepository
+from insurance.model.optimization_job import OptimizationJob
+
+
+class JobRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(OptimizationJob)
+
+    def find_active(self):
+        return self.model.objects.filter(status__in=[OptimizationJob.STATUS_PENDING, OptimizationJob.STATUS_RUNNING])
+
+    def mark_running(self, job_id: int) -> bool:
+        self._forget(job_id)
+        updated = (
+            self.model.objects
+            .filter(id=job_id, status=OptimizationJob.STATUS_PENDING)
+            .update(status=OptimizationJob.STATUS_RUNNING, started_at=timezone.now(), updated_at=timezone.now())
+        )
+        return bool(updated)
+
+    def set_progress(self, job_id: int, progress: dict):
+        self._forget(job_id)
+        self.model.objects.filter(id=job_id).update(progress=progress, updated_at=timezone.now())
+
+    def finish(self, job_id: int, status: str, result=None, error: str = '') -> bool:
+        # A finished job stays finished, so a worker that outlived the stale
+        # check cannot turn a failed job into a succeeded one.
+        self._forget(job_id)
+        updated = (
+            self.model.objects
+            .filter(id=job_id)
+            .exclude(status__in=OptimizationJob.FINISHED_STATUSES)
+            .update(status=status, result=result, error=error, finished_at=timezone.now(),
+                    updated_at=timezone.now())
+        )
+        return bool(updated)
+
+    def request_cancel(self, job_id: int) -> bool:
+        self._forget(job_id)
+        updated = (
+            self.model.objects
+            .filter(id=job_id)
+            .exclude(status__in=OptimizationJob.FINISHED_STATUSES)
+            .update(cancel_requested=True, updated_at=timezone.now())
+        )
+        return bool(updated)
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        return self.model.objects.filter(id=job_id, cancel_requested=True).exists()
@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+from .base_repository import BaseRepository
+from insurance.model.query_plan import QueryPlan
+
+
+class PlanRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(QueryPlan)
+
+    def latest(self, name: str) -> Optional[QueryPlan]:
+        return self.model.objects.filter(name=name).order_by('-created_at').first()
+
+    def latest_per_name(self, names: List[str]):
+        # DISTINCT ON (name) keeps the newest capture of every query in one round trip.
+        return (
+            self.model.objects
+            .filter(name__in=names)
+            .defer('plan')
+            .order_by('name', '-created_at')
+            .distinct('name')
+        )
+
+    def history(self, name: str, limit: int = 20):
+        return (
+            self.model.objects
+            .filter(name=name)
+            .defer('plan')
+            .order_by('-created_at')[:limit]
+        )
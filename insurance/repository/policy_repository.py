@@ -1,6 +1,7 @@
 from django.db import models
 
 from .base_repository import BaseRepository
+from .search import search_rows
 from insurance.model.insurance_policy import InsurancePolicy
 from django.utils import timezone
 from django.db.models import Sum, F, Min, Value, DecimalField
@@ -13,6 +14,10 @@ class PolicyRepository(BaseRepository):
     def find_by_number(self, policy_number: str):
         return self.model.objects.filter(policy_number=policy_number).first()
 
+    def search(self, query: str, limit: int, after=None):
+        return search_rows(self.model, 'policy', ('policy_number',),
+                           ('policy_number', 'policy_type', 'customer_id'), query, limit, after)
+
     def get_active_policies(self):
         today = timezone.localdate()
         return self.model.objects.filter(models.Q(start_date__lte=today) &
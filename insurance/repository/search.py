@@ -0,0 +1,102 @@
+import base64
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.db import connections, router
+
+
+MIN_QUERY_LENGTH = 3
+# (rank, kind, id) of the last row a client has seen.
+Cursor = Tuple[float, str, int]
+
+_trigram_enabled: Dict[str, bool] = {}
+
+
+def trigram_enabled(alias: str) -> bool:
+    # Migration 0006 only installs pg_trgm and its indexes where the server
+    # ships the extension; elsewhere search ranks ILIKE matches instead.
+    if alias not in _trigram_enabled:
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            _trigram_enabled[alias] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _trigram_enabled[alias] = cursor.fetchone() is not None
+    return _trigram_enabled[alias]
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row['rank'], row['kind'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        rank, kind, pk = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(rank, (int, float)) or not isinstance(kind, str) or not isinstance(pk, int):
+        raise ValueError('Invalid cursor')
+    return float(rank), kind, pk
+
+
+def sort_key(row: dict):
+    return -row['rank'], row['kind'], row['id']
+
+
+def _like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _after(kind: str, after: Optional[Cursor]):
+    # Rows that sort after the cursor in (rank DESC, kind, id) order.
+    if after is None:
+        return '', []
+    rank, after_kind, after_id = after
+    if kind > after_kind:
+        return 'WHERE rank <= %s::float8', [rank]
+    if kind < after_kind:
+        return 'WHERE rank < %s::float8', [rank]
+    return 'WHERE (rank < %s::float8 OR (rank = %s::float8 AND id > %s))', [rank, rank, after_id]
+
+
+def search_rows(model, kind: str, match_columns: Sequence[str], columns: Sequence[str], query: str,
+                limit: int, after: Optional[Cursor] = None) -> List[dict]:
+    """
+    Rows of `model` whose match columns contain `query` (or, with pg_trgm,
+    are similar to it), best first, as dicts of id, `columns`, kind and rank.
+    Both the ILIKE and the % filters are served by the trigram GIN indexes.
+    """
+    alias = router.db_for_read(model)
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    contains = f'%{_like(query)}%'
+    matches, scores, params = [], [], []
+    if trigram_enabled(alias):
+        for column in map(quote, match_columns):
+            scores.append(f'similarity({column}, %s)')
+            params.append(query)
+        for column in map(quote, match_columns):
+            matches.append(f'{column} ILIKE %s OR {column} %% %s')
+            params.extend([contains, query])
+    else:
+        for column in map(quote, match_columns):
+            scores.append(f'CASE WHEN lower({column}) = lower(%s) THEN 1.0 WHEN {column} ILIKE %s THEN 0.75 '
+                          f'WHEN {column} ILIKE %s THEN 0.5 ELSE 0 END')
+            params.extend([query, f'{_like(query)}%', contains])
+        for column in map(quote, match_columns):
+            matches.append(f'{column} ILIKE %s')
+            params.append(contains)
+    score = scores[0] if len(scores) == 1 else f'GREATEST({", ".join(scores)})'
+    after_sql, after_params = _after(kind, after)
+    selected = ', '.join(quote(column) for column in ('id', *columns))
+    sql = (
+        f'SELECT * FROM (SELECT {selected}, ({score})::float8 AS rank '
+        f'FROM {quote(model._meta.db_table)} WHERE {" OR ".join(matches)}) matched '
+        f'{after_sql} ORDER BY rank DESC, id LIMIT %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + after_params + [limit])
+        names = [col[0] for col in cursor.description]
+        return [dict(zip(names, row), kind=kind) for row in cursor.fetchall()]
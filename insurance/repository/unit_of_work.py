@@ -1,24 +1,81 @@
 # repository/unit_of_work.py
-from django.db import transaction
+from django.conf import settings
+from django.db import connections, transaction
+from insurance.db_router import replica_reads
 from .claim_repository import ClaimRepository
 from .customer_repository import CustomerRepository
+from .job_repository import JobRepository
+from .experiment_repository import ExperimentRepository
+from .base_repository import BaseRepository
+from .identity_map import IdentityMap
 from .payment_repository import PaymentRepository
+from .plan_repository import PlanRepository
 from .policy_repository import PolicyRepository
 
+# How UnitOfWork(read_only=True) talks to the database:
+#   'autocommit'  - no transaction; saves the BEGIN/COMMIT round trips and
+#                   holds nothing open while the caller post-processes
+#   'transaction' - one READ ONLY transaction, for a consistent snapshot
+#                   across statements
+#   'atomic'      - a plain atomic block, like any other unit
+READ_ONLY_MODES = ('autocommit', 'transaction', 'atomic')
+
+
 class UnitOfWork:
-    def __init__(self):
+    # read_only units read from a replica when one is configured and the
+    # surrounding request has not been pinned to the primary.
+    def __init__(self, read_only: bool = False):
+        self.read_only = read_only
         self.claims = ClaimRepository()
         self.customers = CustomerRepository()
         self.payments = PaymentRepository()
         self.policies = PolicyRepository()
+        self.jobs = JobRepository()
+        self.experiments = ExperimentRepository()
+        self.plans = PlanRepository()
+        # get_by_id serves repeated lookups of a row from here; repository
+        # writes evict what they touch.
+        self.identity_map = IdentityMap()
+        for repository in vars(self).values():
+            if isinstance(repository, BaseRepository):
+                repository.identity_map = self.identity_map
 
     def __enter__(self):
-        self._ctx = transaction.atomic()
-        self._ctx.__enter__()
+        self._ctx = None
+        if not self.read_only:
+            self._ctx = transaction.atomic()
+            self._ctx.__enter__()
+            return self
+
+        self._routing = replica_reads()
+        using = self._routing.__enter__()
+        mode = getattr(settings, 'READ_ONLY_UNIT_MODE', 'autocommit')
+        connection = connections[using]
+        # Inside an enclosing transaction the reads simply join it.
+        if mode != 'autocommit' and not connection.in_atomic_block:
+            self._ctx = transaction.atomic(using=using)
+            self._ctx.__enter__()
+            if mode == 'transaction':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION READ ONLY')
         return self
 
     def commit(self):
         pass
 
     def __exit__(self, exc_type, exc, tb):
-        self._ctx.__exit__(exc_type, exc, tb)
+        self.identity_map.clear()
+        try:
+            if self._ctx is not None:
+                self._ctx.__exit__(exc_type, exc, tb)
+        finally:
+            if self.read_only:
+                self._routing.__exit__(exc_type, exc, tb)
+
+    # Django has no async transaction.atomic(), so async units run in autocommit.
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.identity_map.clear()
+
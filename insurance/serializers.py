@@ -3,6 +3,7 @@ from insurance.model.customer import Customer
 from insurance.model.insurance_policy import InsurancePolicy
 from insurance.model.payment import Payment
 from insurance.model.claim import Claim
+from insurance.model.optimization_job import OptimizationJob
 
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
@@ -30,6 +31,31 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = '__all__'
 
+class ClaimFullViewSerializer(ClaimSerializer):
+    policy = InsurancePolicySerializer(read_only=True)
+    customer = CustomerSerializer(source='policy.customer', read_only=True)
+    payments = PaymentSerializer(many=True, read_only=True)
+    payments_total = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+class PolicySummarySerializer(InsurancePolicySerializer):
+    claims_count = serializers.IntegerField(read_only=True)
+    total_claimed = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    total_paid = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    outstanding = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+class CustomerSummarySerializer(CustomerSerializer):
+    policies_count = serializers.IntegerField(read_only=True)
+    claims_count = serializers.IntegerField(read_only=True)
+    total_claimed = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    total_paid = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    outstanding = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    policies = PolicySummarySerializer(source='summary_policies', many=True, read_only=True)
+
+class OptimizationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OptimizationJob
+        fields = '__all__'
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -64,7 +65,10 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'insurance.middleware.MetricsMiddleware',
+    'insurance.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'insurance.middleware.SQLInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -106,6 +110,66 @@ DATABASES = {
     }
 }
 
+
+def _replicas(spec):
+    # DB_REPLICAS is a comma-separated list of host[:port][/name][*weight];
+    # credentials are the primary's. Replicas mirror the primary in tests.
+    replicas = {}
+    for i, entry in enumerate((e.strip() for e in spec.split(',') if e.strip()), 1):
+        entry, _, weight = entry.partition('*')
+        entry, _, name = entry.partition('/')
+        host, _, port = entry.partition(':')
+        primary = DATABASES['default']
+        replicas[f'replica_{i}'] = (dict(
+            primary,
+            HOST=host or primary['HOST'],
+            PORT=port or primary['PORT'],
+            NAME=name or primary['NAME'],
+            TEST={'MIRROR': 'default'},
+        ), int(weight or 1))
+    return replicas
+
+
+# Read replicas for analytics and list/retrieve traffic, e.g.
+# DB_REPLICAS="replica1.internal*3,replica2.internal:6432*1"
+DATABASE_REPLICA_WEIGHTS = {}
+for _alias, (_config, _weight) in _replicas(os.getenv('DB_REPLICAS', '')).items():
+    DATABASES[_alias] = _config
+    DATABASE_REPLICA_WEIGHTS[_alias] = _weight
+
+if 'test' in sys.argv[1:2] and 'replica_1' not in DATABASES:
+    # A mirror of the test database, so routing can be tested end to end
+    # (it only receives reads once a test sets DATABASE_REPLICA_WEIGHTS).
+    DATABASES['replica_1'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['insurance.db_router.ReplicaRouter']
+
+# How read-only units of work run: autocommit, transaction (READ ONLY) or atomic
+READ_ONLY_UNIT_MODE = os.getenv('READ_ONLY_UNIT_MODE', 'autocommit')
+
+# Seconds a client's reads stay on the primary after it wrote (replication lag)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
+# Replica pins and cached customer summaries have to be visible to every
+# worker process, so they live in database caches on the primary (tables
+# created by migrations 0007 and 0008).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'replica-pin': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'replica_pin_cache',
+    },
+    'customer-summary': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'customer_summary_cache',
+    },
+}
+
+# Seconds GET /api/customers/{id}/summary/cached/ serves a stored summary
+CUSTOMER_SUMMARY_CACHE_SECONDS = int(os.getenv('CUSTOMER_SUMMARY_CACHE_SECONDS', '60'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -147,3 +211,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Fraction of requests whose SQL is timed and reported via Server-Timing
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', '0.05'))
+
+# Clients allowed to scrape /metrics; empty allows everyone
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'insurance.sql': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
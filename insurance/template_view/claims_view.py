@@ -61,7 +61,7 @@ class ClaimsByCustomerListView(LoginRequiredMixin, ListView):
             page = int(self.request.GET.get('page', '1'))
         except ValueError:
             page = 1
-        params = {'customer_id': pk, 'page': page, 'page_size': 10}
+        params = {'customer_id': pk, 'page': page, 'page_size': 10, 'expand': 'policy'}
         resp = api_get(self.request, '/claims/find_by_customer', params=params)
         items: List[Dict[str, Any]] = []
         total_pages = 1
@@ -111,7 +111,7 @@ class ClaimListView(LoginRequiredMixin, ListView):
             page = int(self.request.GET.get('page', '1'))
         except ValueError:
             page = 1
-        params = {'page': page, 'page_size': 10}
+        params = {'page': page, 'page_size': 10, 'expand': 'policy,customer'}
         resp = api_get(self.request, '/claims/', params=params)
         items: List[Dict[str, Any]] = []
         total_pages = 1
@@ -149,7 +149,7 @@ class ClaimDetailView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         pk = self.kwargs.get('pk')
-        resp = api_get(self.request, f'/claims/{pk}/')
+        resp = api_get(self.request, f'/claims/{pk}/full/')
         if resp.status_code == 200:
             ctx['claim'] = SimpleNamespace(**resp.json())
         else:
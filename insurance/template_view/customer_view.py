@@ -11,6 +11,7 @@ from django.views.generic import ListView, TemplateView
 from django.views.generic.edit import FormView
 
 from insurance.forms import CustomerForm
+from insurance.repository.unit_of_work import UnitOfWork
 
 
 API_ROOT = "http://localhost:8000/api"
@@ -96,7 +97,7 @@ class CustomerDetailView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         pk = self.kwargs.get('pk')
-        resp = api_get(self.request, f'/customers/{pk}/')
+        resp = api_get(self.request, f'/customers/{pk}/summary/')
         if resp.status_code == 200:
             ctx['customer'] = SimpleNamespace(**resp.json())
         else:
@@ -130,20 +131,30 @@ class CustomerUpdateView(LoginRequiredMixin, FormView):
     form_class = CustomerForm
     success_url = reverse_lazy('customer_list')
 
+    def get_object(self):
+        # Loaded once per request and shared by get_form_kwargs and get_initial.
+        if not hasattr(self, '_object'):
+            self._object = None
+            try:
+                pk = self.kwargs.get('pk')
+                if pk is not None:
+                    with UnitOfWork(read_only=True) as repo:
+                        self._object = repo.customers.get_by_id(pk)
+            except Exception:
+                pass
+        return self._object
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        try:
-            pk = self.kwargs.get('pk')
-            if pk is not None:
-                from insurance.model.customer import Customer
-                instance = Customer.objects.filter(pk=pk).first()
-                if instance is not None:
-                    kwargs['instance'] = instance
-        except Exception:
-            pass
+        instance = self.get_object()
+        if instance is not None:
+            kwargs['instance'] = instance
         return kwargs
 
     def get_initial(self):
+        if self.get_object() is not None:
+            # The ModelForm already takes its initial values from the instance.
+            return {}
         pk = self.kwargs.get('pk')
         resp = api_get(self.request, f'/customers/{pk}/')
         if resp.status_code == 200:
@@ -1,3 +1,4 @@
+from django.shortcuts import redirect
 from django.views.generic import TemplateView
 import json
 import requests
@@ -7,6 +8,33 @@ import plotly.io as pio
 import plotly.express as px
 
 
+MODE_LABELS = {
+    'threads': 'Потоки',
+    'processes': 'Процеси',
+    'async': 'Asyncio',
+}
+
+
+def _mode_of(result):
+    return result.get('mode') or ('processes' if result.get('use_processes') else 'threads')
+
+
+def _ci_html(result):
+    ci = result.get('total_time_ci')
+    if not ci:
+        return ''
+    return f" (95% ДІ {ci[0]:.3f}–{ci[1]:.3f})"
+
+
+def _regressions_html(regressions):
+    items = "".join(
+        f"<li>{r['num_workers']} × {MODE_LABELS.get(r['mode'], r['mode'])}, пакет {r['batch_size']}: "
+        f"{r['total_time']:.3f} с проти {r['baseline']:.3f} с (+{r['change'] * 100:.1f}%)</li>"
+        for r in regressions
+    )
+    return f"<ul class='mb-0'>{items}</ul>"
+
+
 class DatabaseOptimizationDashboardView(TemplateView):
     template_name = 'analytics/db_optimization_dashboard.html'
     
@@ -14,11 +42,62 @@ class DatabaseOptimizationDashboardView(TemplateView):
         ctx = super().get_context_data(**kwargs)
         return ctx
 
+    def get(self, request, *args, **kwargs):
+        history = self._fetch_history(request)
+        job_id = request.GET.get('job')
+        if not job_id or not job_id.isdigit():
+            return self.render_to_response(self.get_context_data(history=history))
+
+        api_url = urljoin(request.build_absolute_uri('/'), f'/api/analytics/db-optimization/jobs/{job_id}/')
+        try:
+            response = requests.get(api_url, timeout=10)
+        except Exception as e:
+            return self.render_to_response(self.get_context_data(error=str(e)))
+        if response.status_code != 200:
+            return self.render_to_response(self.get_context_data(
+                error=f'API returned status {response.status_code}'
+            ))
+
+        job = response.json()
+        params = job.get('params', {})
+        is_load_test = params.get('kind') == 'load_test'
+        ctx = {'job': job, 'history': history, ('load_params' if is_load_test else 'params'): params}
+        if job['status'] == 'succeeded' and is_load_test:
+            ctx['load_test'] = self._process_load_test(job.get('result') or {})
+        elif job['status'] == 'succeeded':
+            ctx['results'] = self._process_results(job.get('result') or {})
+        elif job['status'] == 'failed':
+            ctx['error'] = job.get('error') or 'Експеримент завершився з помилкою'
+        elif job['status'] == 'cancelled':
+            ctx['error'] = 'Експеримент скасовано'
+        return self.render_to_response(self.get_context_data(**ctx))
+
     def post(self, request, *args, **kwargs):
+        if request.POST.get('kind') == 'load_test':
+            data = {
+                'kind': 'load_test',
+                'mode': request.POST.get('mode', 'threads'),
+                'num_workers': int(request.POST.get('num_workers', 4) or 4),
+                'arrival': request.POST.get('arrival', 'poisson'),
+                'start_qps': float(request.POST.get('start_qps', 50) or 50),
+                'end_qps': float(request.POST.get('end_qps', 500) or 500),
+                'steps': int(request.POST.get('steps', 5) or 5),
+                'stage_duration': float(request.POST.get('stage_duration', 5) or 5),
+                'scenario': request.POST.get('scenario', 'mixed'),
+                'key_distribution': request.POST.get('key_distribution', 'uniform'),
+            }
+            return self._submit_job(request, data, 'load_params')
+
         num_queries = int(request.POST.get('num_queries', 150))
         num_workers_str = request.POST.get('num_workers', '1,2,4,8,16')
         batch_sizes_str = request.POST.get('batch_sizes', '10,25,50,100')
-        what_to_test = 'test_what' in request.POST.get('test_what', 'thread')
+        what_to_test = request.POST.getlist('test_what') or ['thread']
+
+        repetitions = int(request.POST.get('repetitions', 3) or 3)
+        warmup_runs = int(request.POST.get('warmup_runs', 1) or 0)
+        strategy = request.POST.get('strategy', 'grid')
+        scenario = request.POST.get('scenario', 'mixed')
+        key_distribution = request.POST.get('key_distribution', 'uniform')
 
         num_workers = [int(x.strip()) for x in num_workers_str.split(',') if x.strip().isdigit()]
         batch_sizes = [int(x.strip()) for x in batch_sizes_str.split(',') if x.strip().isdigit()]
@@ -27,54 +106,263 @@ class DatabaseOptimizationDashboardView(TemplateView):
             'num_queries': num_queries,
             'num_workers_range': num_workers,
             'batch_sizes': batch_sizes,
-            'test_threads': what_to_test == 'thread',
-            'test_processes': what_to_test != 'thread'
+            'test_threads': 'thread' in what_to_test,
+            'test_processes': 'process' in what_to_test,
+            'test_async': 'async' in what_to_test,
+            'repetitions': repetitions,
+            'warmup_runs': warmup_runs,
+            'strategy': strategy,
+            'scenario': scenario,
+            'key_distribution': key_distribution,
         }
 
-        api_url = urljoin(request.build_absolute_uri('/'), '/api/analytics/db-optimization/')
+        return self._submit_job(request, data, 'params')
+
+    def _submit_job(self, request, data, params_key):
+        # Experiments run for minutes, so they go to the background job runner
+        # and the page polls the job instead of holding the request open.
+        api_url = urljoin(request.build_absolute_uri('/'), '/api/analytics/db-optimization/jobs/')
         try:
-            response = requests.post(api_url, json=data, timeout=300)
-            if response.status_code == 200:
-                result_data = response.json()
-                processed_results = self._process_results(result_data)
-                return self.render_to_response(self.get_context_data(
-                    results=processed_results,
-                    params=data
-                ))
+            response = requests.post(api_url, json=data, timeout=10)
+            if response.status_code == 202:
+                return redirect(f"{request.path}?job={response.json()['job_id']}")
             else:
                 return self.render_to_response(self.get_context_data(
                     error=f'API returned status {response.status_code}',
-                    params=data
+                    **{params_key: data}
                 ))
         except Exception as e:
             return self.render_to_response(self.get_context_data(
                 error=str(e),
-                params=data
+                **{params_key: data}
+            ))
+
+    def _process_load_test(self, result_data):
+        load_test = result_data.get('load_test', {})
+        points = load_test.get('points', [])
+
+        # Latency vs throughput: where the curve turns upward the system saturates.
+        fig_curve = go.Figure()
+        achieved = [p['achieved_qps'] for p in points]
+        for key, name in (('p50', 'p50'), ('p99', 'p99'), ('p999', 'p99.9')):
+            fig_curve.add_trace(go.Scatter(
+                x=achieved,
+                y=[p['latency_percentiles'].get(key, 0) * 1000 for p in points],
+                mode='lines+markers',
+                name=f'{name} від запланованого старту',
+                text=[f"ціль {p['target_qps']:.0f} QPS" for p in points],
             ))
+        fig_curve.add_trace(go.Scatter(
+            x=achieved,
+            y=[p['service_time_percentiles'].get('p99', 0) * 1000 for p in points],
+            mode='lines+markers',
+            name='p99 часу виконання',
+            line={'dash': 'dot'}
+        ))
+        fig_curve.update_layout(
+            title='Затримка залежно від пропускної здатності',
+            xaxis={'title': 'Досягнута пропускна здатність (QPS)'},
+            yaxis={'title': 'Затримка (мс)', 'type': 'log'},
+            margin={'t': 40}
+        )
+        curve_chart_html = pio.to_html(fig_curve, full_html=False, include_plotlyjs=False)
+
+        targets = [p['target_qps'] for p in points]
+        fig_throughput = go.Figure()
+        fig_throughput.add_trace(go.Scatter(x=targets, y=achieved, mode='lines+markers', name='Досягнуто'))
+        fig_throughput.add_trace(go.Scatter(x=targets, y=targets, mode='lines', name='Ціль',
+                                            line={'dash': 'dash', 'color': 'gray'}))
+        fig_throughput.update_layout(
+            title='Цільова та досягнута пропускна здатність',
+            xaxis={'title': 'Цільовий QPS'},
+            yaxis={'title': 'Досягнутий QPS'},
+            margin={'t': 40}
+        )
+        throughput_chart_html = pio.to_html(fig_throughput, full_html=False, include_plotlyjs=False)
+
+        rows = []
+        for p in points:
+            saturated = load_test.get('saturation_qps') is not None and p['target_qps'] >= load_test['saturation_qps']
+            rows.append(f"""
+            <tr{' class="table-warning"' if saturated else ''}>
+                <td>{p['target_qps']:.0f}</td>
+                <td>{p['achieved_qps']:.1f}</td>
+                <td>{p['sent']}</td>
+                <td>{p['errors']}</td>
+                <td>{p['latency_percentiles'].get('p50', 0) * 1000:.2f}</td>
+                <td>{p['latency_percentiles'].get('p99', 0) * 1000:.2f}</td>
+                <td>{p['latency_percentiles'].get('p999', 0) * 1000:.2f}</td>
+                <td>{p['service_time_percentiles'].get('p99', 0) * 1000:.2f}</td>
+                <td>{p['queue_wait_percentiles'].get('p99', 0) * 1000:.2f}</td>
+                <td>{p['max_dispatch_lag'] * 1000:.2f}</td>
+            </tr>
+            """)
+
+        saturation = load_test.get('saturation_qps')
+        summary_html = (
+            f"<p><strong>Режим:</strong> {MODE_LABELS.get(load_test.get('mode'), load_test.get('mode'))}, "
+            f"{load_test.get('num_workers')} виконавців, надходження: {load_test.get('arrival')}</p>"
+            f"<p><strong>Максимальна стабільна пропускна здатність:</strong> "
+            f"{load_test.get('max_sustained_qps', 0):.1f} QPS</p>"
+            + (f"<p><strong>Насичення</strong> при цільових {saturation:.0f} QPS</p>" if saturation is not None
+               else "<p>Насичення в досліджуваному діапазоні не досягнуто</p>")
+        )
+        return {
+            'summary_html': summary_html,
+            'curve_chart_html': curve_chart_html,
+            'throughput_chart_html': throughput_chart_html,
+            'table_html': "".join(rows),
+        }
+
+    def _fetch_history(self, request):
+        api_url = urljoin(request.build_absolute_uri('/'), '/api/analytics/db-optimization/history/')
+        try:
+            response = requests.get(api_url, params={'limit': 30}, timeout=10)
+        except Exception:
+            return None
+        if response.status_code != 200:
+            return None
+        return self._process_history(response.json())
+
+    def _process_history(self, history):
+        runs = history.get('runs', [])
+        if not runs:
+            return None
+
+        labels = [f"#{run['id']}" for run in runs]
+        fig_trend = go.Figure()
+        fig_trend.add_trace(go.Scatter(
+            x=labels,
+            y=[run['best_total_time'] for run in runs],
+            mode='lines+markers',
+            name='Найкращий час',
+            text=[f"{run['git_revision'][:10] or '—'} / {run['dataset_rows']} рядків" for run in runs],
+            marker={'size': 9, 'color': ['red' if run['has_regression'] else '#1f77b4' for run in runs]}
+        ))
+        run_labels = {run['id']: f"#{run['id']}" for run in runs}
+        for mode, points in history.get('best_by_mode', {}).items():
+            fig_trend.add_trace(go.Scatter(
+                x=[run_labels[p['run_id']] for p in points],
+                y=[p['total_time'] for p in points],
+                mode='lines',
+                name=MODE_LABELS.get(mode, mode),
+                line={'dash': 'dot'}
+            ))
+        fig_trend.add_trace(go.Scatter(
+            x=labels,
+            y=[(run['best_p99_time'] or 0) * 1000 for run in runs],
+            mode='lines+markers',
+            name='Найкращий p99 (мс)',
+            yaxis='y2'
+        ))
+        fig_trend.update_layout(
+            title='Тренд між запусками (червоні точки — регресії)',
+            xaxis={'title': 'Запуск', 'type': 'category'},
+            yaxis={'title': 'Час виконання (секунди)'},
+            yaxis2={'title': 'p99 (мс)', 'overlaying': 'y', 'side': 'right'},
+            margin={'t': 40}
+        )
+        trend_chart_html = pio.to_html(fig_trend, full_html=False, include_plotlyjs=False)
+
+        rows = []
+        previous = None
+        for run in reversed(runs):
+            changed = []
+            if previous is not None:
+                if run['git_revision'] != previous['git_revision']:
+                    changed.append('код')
+                if run['settings_fingerprint'] != previous['settings_fingerprint']:
+                    changed.append('налаштування')
+                if run['dataset_rows'] != previous['dataset_rows']:
+                    changed.append('дані')
+            previous = run
+            best = run['best_config'] or {}
+            rows.append(f"""
+            <tr{' class="table-danger"' if run['has_regression'] else ''}>
+                <td>{run['id']}</td>
+                <td>{run['created_at'][:19].replace('T', ' ')}</td>
+                <td><code>{run['git_revision'][:10] or '—'}</code></td>
+                <td><code>{run['settings_fingerprint'][:10]}</code></td>
+                <td>{run['dataset_rows']}</td>
+                <td>{', '.join(changed) or '—'}</td>
+                <td>{run['num_queries']}</td>
+                <td>{best.get('num_workers', '—')} × {MODE_LABELS.get(_mode_of(best), '—') if best else '—'}, пакет {best.get('batch_size', '—')}</td>
+                <td>{(run['best_total_time'] or 0):.3f}</td>
+                <td>{(run['best_p99_time'] or 0) * 1000:.2f}</td>
+                <td>{_regressions_html(run['regressions']) if run['has_regression'] else 'Ні'}</td>
+            </tr>
+            """)
+        return {
+            'trend_chart_html': trend_chart_html,
+            'runs_html': "".join(rows),
+        }
 
     def _process_results(self, result_data):
         opt = result_data.get('optimal_config', {})
-        optimal_config_html = (
-            f"<p><strong>Кількість потоків/процесів:</strong> {opt.get('num_workers', 'N/A')}</p>"
-            f"<p><strong>Розмір пакету:</strong> {opt.get('batch_size', 'N/A')}</p>"
-            f"<p><strong>Тип:</strong> {'Процеси' if opt.get('use_processes') else 'Потоки'}</p>"
-            f"<p><strong>Загальний час виконання:</strong> {opt.get('total_time', 0):.3f} секунд</p>"
-        )
+        if opt:
+            optimal_config_html = (
+                f"<p><strong>Кількість потоків/процесів:</strong> {opt.get('num_workers', 'N/A')}</p>"
+                f"<p><strong>Розмір пакету:</strong> {opt.get('batch_size', 'N/A')}</p>"
+                f"<p><strong>Тип:</strong> {MODE_LABELS.get(_mode_of(opt), 'N/A')}</p>"
+                f"<p><strong>Загальний час виконання (медіана):</strong> {opt.get('total_time', 0):.3f} секунд"
+                f"{_ci_html(opt)}</p>"
+            )
+        else:
+            candidate = result_data.get('best_candidate', {})
+            runner_up = result_data.get('runner_up', {})
+            optimal_config_html = (
+                "<p><strong>Статистично значущого оптимуму немає:</strong> "
+                "найкраща конфігурація не відрізняється від наступної.</p>"
+                f"<p>Кандидат: {candidate.get('num_workers', 'N/A')} × "
+                f"{MODE_LABELS.get(_mode_of(candidate), 'N/A')}, пакет {candidate.get('batch_size', 'N/A')} — "
+                f"{candidate.get('total_time', 0):.3f} с{_ci_html(candidate)}</p>"
+                f"<p>Наступна: {runner_up.get('num_workers', 'N/A')} × "
+                f"{MODE_LABELS.get(_mode_of(runner_up), 'N/A')}, пакет {runner_up.get('batch_size', 'N/A')} — "
+                f"{runner_up.get('total_time', 0):.3f} с{_ci_html(runner_up)}</p>"
+            )
+            opt = candidate
+        opt_p99 = result_data.get('optimal_config_p99', {})
+        if opt_p99:
+            optimal_config_html += (
+                f"<hr><p><strong>Оптимум за p99:</strong> "
+                f"{opt_p99.get('num_workers', 'N/A')} × {MODE_LABELS.get(_mode_of(opt_p99), 'N/A')}, "
+                f"пакет {opt_p99.get('batch_size', 'N/A')}</p>"
+                f"<p><strong>p99 затримки запиту:</strong> {opt_p99.get('p99_time', 0) * 1000:.2f} мс "
+                f"(загальний час {opt_p99.get('total_time', 0):.3f} с)</p>"
+            )
+
+        run = result_data.get('run')
+        if run:
+            optimal_config_html += (
+                f"<hr><p><strong>Запуск №{run['id']}</strong>, ревізія "
+                f"<code>{run['git_revision'][:10] or '—'}</code>, налаштування "
+                f"<code>{run['settings_fingerprint'][:10]}</code></p>"
+            )
+            if run['regressions']:
+                optimal_config_html += (
+                    "<div class='alert alert-danger'><strong>Регресії відносно попередніх запусків:</strong>"
+                    f"{_regressions_html(run['regressions'])}</div>"
+                )
+
+        all_results = result_data.get('all_results', [])
+        all_results.sort(key=lambda r: (r['num_workers'], r['batch_size'], _mode_of(r)))
+
+        times_by_mode = {}
+        for r in all_results:
+            times_by_mode.setdefault(_mode_of(r), {}).setdefault(r['num_workers'], []).append(r['total_time'])
 
-        avg_time_by_workers = result_data.get('avg_time_by_workers', {})
-        workers_sorted = sorted([int(w) for w in avg_time_by_workers.keys()])
-        times = [avg_time_by_workers[str(w)] for w in workers_sorted]
-        
         # 1. Line Chart
         fig_time = go.Figure()
-        fig_time.add_trace(go.Scatter(
-            x=workers_sorted,
-            y=times,
-            mode='lines+markers',
-            name='Середній час виконання',
-            line={'color': 'blue', 'width': 2},
-            marker={'size': 8}
-        ))
+        for mode, by_workers in times_by_mode.items():
+            workers_sorted = sorted(by_workers.keys())
+            fig_time.add_trace(go.Scatter(
+                x=workers_sorted,
+                y=[sum(by_workers[w]) / len(by_workers[w]) for w in workers_sorted],
+                mode='lines+markers',
+                name=MODE_LABELS.get(mode, mode),
+                line={'width': 2},
+                marker={'size': 8}
+            ))
         fig_time.update_layout(
             title='Залежність часу виконання від кількості потоків/процесів',
             xaxis={'title': 'Кількість потоків/процесів'},
@@ -83,9 +371,50 @@ class DatabaseOptimizationDashboardView(TemplateView):
         )
         time_chart_html = pio.to_html(fig_time, full_html=False, include_plotlyjs=False)
 
-        all_results = result_data.get('all_results', [])
-        all_results.sort(key=lambda r: (r['num_workers'], r['batch_size'], 1 if r['use_processes'] else 0))
-        
+        # 1a. Percentile curves: the fastest-p99 configuration of every mode
+        fig_percentiles = go.Figure()
+        best_by_mode = {}
+        for r in all_results:
+            mode = _mode_of(r)
+            if r.get('latency_curve') and (mode not in best_by_mode or
+                                           r.get('p99_time', 0) < best_by_mode[mode].get('p99_time', 0)):
+                best_by_mode[mode] = r
+        for mode, r in best_by_mode.items():
+            fig_percentiles.add_trace(go.Scatter(
+                x=[str(p) for p, _ in r['latency_curve']],
+                y=[v * 1000 for _, v in r['latency_curve']],
+                mode='lines+markers',
+                name=f"{MODE_LABELS.get(mode, mode)}: {r['num_workers']} / {r['batch_size']}"
+            ))
+        fig_percentiles.update_layout(
+            title='Розподіл затримки запиту за перцентилями',
+            xaxis={'title': 'Перцентиль', 'type': 'category'},
+            yaxis={'title': 'Затримка (мс)'},
+            margin={'t': 40}
+        )
+        percentile_chart_html = pio.to_html(fig_percentiles, full_html=False, include_plotlyjs=False)
+
+        # 1b. p99 by worker count
+        fig_p99 = go.Figure()
+        p99_by_mode = {}
+        for r in all_results:
+            p99_by_mode.setdefault(_mode_of(r), {}).setdefault(r['num_workers'], []).append(r.get('p99_time', 0))
+        for mode, by_workers in p99_by_mode.items():
+            workers_sorted = sorted(by_workers.keys())
+            fig_p99.add_trace(go.Scatter(
+                x=workers_sorted,
+                y=[min(by_workers[w]) * 1000 for w in workers_sorted],
+                mode='lines+markers',
+                name=MODE_LABELS.get(mode, mode)
+            ))
+        fig_p99.update_layout(
+            title='p99 затримки залежно від кількості потоків/процесів',
+            xaxis={'title': 'Кількість потоків/процесів'},
+            yaxis={'title': 'p99 (мс)'},
+            margin={'t': 40}
+        )
+        p99_chart_html = pio.to_html(fig_p99, full_html=False, include_plotlyjs=False)
+
         workers_set = sorted(list(set(r['num_workers'] for r in all_results)))
         batch_sizes_set = sorted(list(set(r['batch_size'] for r in all_results)))
         
@@ -127,70 +456,194 @@ class DatabaseOptimizationDashboardView(TemplateView):
         heatmap_chart_html = pio.to_html(fig_heatmap, full_html=False, include_plotlyjs=False)
 
         cpu_by_workers = {}
+        peak_cpu_by_workers = {}
         mem_by_workers = {}
+        peak_mem_by_workers = {}
         for r in all_results:
             w = r['num_workers']
             cpu_by_workers.setdefault(w, []).append(r['cpu_usage_percent'])
-            mem_by_workers.setdefault(w, []).append(r['memory_usage_mb'])
-        
-        # 3. CPU Chart
+            peak_cpu_by_workers.setdefault(w, []).append(r.get('peak_cpu_percent', r['cpu_usage_percent']))
+            mem_by_workers.setdefault(w, []).append(r.get('mean_memory_mb', r['memory_usage_mb']))
+            peak_mem_by_workers.setdefault(w, []).append(r.get('peak_memory_mb', r['memory_usage_mb']))
+
+        def _avg(values):
+            return sum(values) / len(values) if values else 0
+
+        # 3. CPU Chart (parent + worker processes, sampled during the run)
         fig_cpu = go.Figure()
-        for w in workers_set:
-            avg_cpu = sum(cpu_by_workers[w]) / len(cpu_by_workers[w])
-            fig_cpu.add_trace(go.Bar(
-                x=[str(w)],
-                y=[avg_cpu],
-                name=f"{w} потоків/процесів"
-            ))
+        fig_cpu.add_trace(go.Bar(
+            x=[str(w) for w in workers_set],
+            y=[_avg(cpu_by_workers[w]) for w in workers_set],
+            name='Середнє'
+        ))
+        fig_cpu.add_trace(go.Bar(
+            x=[str(w) for w in workers_set],
+            y=[max(peak_cpu_by_workers[w]) for w in workers_set],
+            name='Пік'
+        ))
         fig_cpu.update_layout(
             title='Використання CPU',
+            barmode='group',
             xaxis={'title': 'Кількість потоків/процесів'},
             yaxis={'title': 'CPU (%)'},
             margin={'t': 40}
         )
         cpu_chart_html = pio.to_html(fig_cpu, full_html=False, include_plotlyjs=False)
 
-        # 4. Memory Chart
+        # 4. Memory Chart (total RSS of parent + worker processes)
         fig_mem = go.Figure()
-        for w in workers_set:
-            avg_mem = sum(mem_by_workers[w]) / len(mem_by_workers[w])
-            fig_mem.add_trace(go.Bar(
-                x=[str(w)],
-                y=[avg_mem],
-                name=f"{w} потоків/процесів"
-            ))
+        fig_mem.add_trace(go.Bar(
+            x=[str(w) for w in workers_set],
+            y=[_avg(mem_by_workers[w]) for w in workers_set],
+            name='Середнє'
+        ))
+        fig_mem.add_trace(go.Bar(
+            x=[str(w) for w in workers_set],
+            y=[max(peak_mem_by_workers[w]) for w in workers_set],
+            name='Пік'
+        ))
         fig_mem.update_layout(
-            title='Використання пам\'яті',
+            title='Використання пам\'яті (RSS)',
+            barmode='group',
             xaxis={'title': 'Кількість потоків/процесів'},
             yaxis={'title': 'Пам\'ять (MB)'},
             margin={'t': 40}
         )
         mem_chart_html = pio.to_html(fig_mem, full_html=False, include_plotlyjs=False)
 
+        # 5. Resource timeline of the optimal configuration
+        resource_chart_html = ''
+        optimal_run = next((
+            r for r in all_results
+            if r['num_workers'] == opt.get('num_workers') and r['batch_size'] == opt.get('batch_size')
+            and _mode_of(r) == _mode_of(opt) and r.get('resource_series')
+        ), None)
+        if optimal_run:
+            series = optimal_run['resource_series']
+            fig_resources = go.Figure()
+            fig_resources.add_trace(go.Scatter(x=series['elapsed'], y=series['cpu_percent'],
+                                               mode='lines+markers', name='CPU застосунку (%)'))
+            if optimal_run.get('db_server_sampled'):
+                fig_resources.add_trace(go.Scatter(x=series['elapsed'], y=series['db_cpu_percent'],
+                                                   mode='lines+markers', name='CPU сервера БД (%)'))
+            fig_resources.add_trace(go.Scatter(x=series['elapsed'], y=series['rss_mb'],
+                                               mode='lines', name='RSS (MB)', yaxis='y2'))
+            fig_resources.update_layout(
+                title='Ресурси під час виконання оптимальної конфігурації',
+                xaxis={'title': 'Час від початку (с)'},
+                yaxis={'title': 'CPU (%)'},
+                yaxis2={'title': 'RSS (MB)', 'overlaying': 'y', 'side': 'right'},
+                margin={'t': 40}
+            )
+            resource_chart_html = pio.to_html(fig_resources, full_html=False, include_plotlyjs=False)
+
         table_rows = []
         for r in all_results:
             row = f"""
             <tr>
                 <td>{r['num_workers']}</td>
                 <td>{r['batch_size']}</td>
-                <td>{'Процеси' if r['use_processes'] else 'Потоки'}</td>
-                <td>{r['total_time']:.3f}</td>
+                <td>{MODE_LABELS.get(_mode_of(r), _mode_of(r))}</td>
+                <td>{r['total_time']:.3f}{_ci_html(r)}</td>
+                <td>{r.get('repetitions', 1)} / {r.get('rejected_trials', 0)}</td>
                 <td>{(r['avg_time_per_query'] * 1000):.2f}</td>
+                <td>{(r.get('latency_percentiles', {}).get('p50', 0) * 1000):.2f}</td>
+                <td>{(r.get('p99_time', 0) * 1000):.2f}</td>
+                <td>{(r.get('latency_percentiles', {}).get('p999', 0) * 1000):.2f}</td>
+                <td>{(r.get('avg_queue_wait', 0) * 1000):.2f}</td>
                 <td>{r['success_count']}</td>
                 <td>{r['error_count']}</td>
                 <td>{r['cpu_usage_percent']:.2f}</td>
+                <td>{r.get('peak_cpu_percent', 0):.2f}</td>
                 <td>{r['memory_usage_mb']:.2f}</td>
+                <td>{r.get('peak_threads', 0)}</td>
+                <td>{r.get('ctx_switches', 0)}</td>
+                <td>{r.get('pool_startup_time', 0):.3f}</td>
             </tr>
             """
             table_rows.append(row)
         table_html = "".join(table_rows)
 
+        search = result_data.get('search', {})
+        exploration_rows = []
+        for step in search.get('exploration', []):
+            exploration_rows.append(f"""
+            <tr>
+                <td>{step['step']}</td>
+                <td>{MODE_LABELS.get(step['mode'], step['mode'])}</td>
+                <td>{step['num_workers']}</td>
+                <td>{step['batch_size']}</td>
+                <td>{step['repetitions']}</td>
+                <td>{step['median']:.3f}</td>
+                <td>{step['reason']}</td>
+            </tr>
+            """)
+        search_summary_html = (
+            f"<p><strong>Стратегія:</strong> {search.get('strategy', 'grid')}; "
+            f"досліджено {search.get('cells_explored', len(all_results))} з "
+            f"{search.get('cells_total', len(all_results))} конфігурацій</p>"
+        )
+
+        # Query-type breakdown: summed latency per type for every mode/workers
+        # pair (averaged over batch sizes) shows which query dominates as we scale.
+        type_time = {}
+        type_runs = {}
+        for r in all_results:
+            label = f"{r['num_workers']} × {MODE_LABELS.get(_mode_of(r), _mode_of(r))}"
+            type_runs[label] = type_runs.get(label, 0) + 1
+            for t in r.get('query_types', []):
+                per_label = type_time.setdefault(t['query_type'], {})
+                per_label[label] = per_label.get(label, 0) + t['total_latency']
+        labels = list(type_runs)
+        fig_types = go.Figure()
+        for query_type, per_label in sorted(type_time.items(), key=lambda item: -sum(item[1].values())):
+            fig_types.add_trace(go.Bar(
+                x=labels,
+                y=[per_label.get(label, 0) / type_runs[label] for label in labels],
+                name=query_type
+            ))
+        fig_types.update_layout(
+            title='Сумарний час виконання за типами запитів',
+            barmode='stack',
+            xaxis={'title': 'Конфігурація'},
+            yaxis={'title': 'Сумарна затримка (секунди)'},
+            margin={'t': 40}
+        )
+        query_type_chart_html = pio.to_html(fig_types, full_html=False, include_plotlyjs=False) if type_time else ''
+
+        best = result_data.get('best_result', {})
+        best_types = best.get('query_types', [])
+        best_total = sum(t['total_latency'] for t in best_types) or 1
+        query_type_rows = []
+        for t in best_types:
+            pct = t['latency_percentiles']
+            query_type_rows.append(f"""
+            <tr>
+                <td>{t['query_type']}</td>
+                <td>{t['count']}</td>
+                <td>{t['error_count']}</td>
+                <td>{pct.get('p50', 0) * 1000:.2f}</td>
+                <td>{pct.get('p90', 0) * 1000:.2f}</td>
+                <td>{pct.get('p99', 0) * 1000:.2f}</td>
+                <td>{t['rows']}</td>
+                <td>{t['avg_rows']:.1f}</td>
+                <td>{t['total_latency'] / best_total * 100:.1f}</td>
+            </tr>
+            """)
+
         return {
+            'query_type_chart_html': query_type_chart_html,
+            'query_type_html': "".join(query_type_rows),
             'optimal_config_html': optimal_config_html,
             'time_chart_html': time_chart_html,
+            'percentile_chart_html': percentile_chart_html,
+            'p99_chart_html': p99_chart_html,
             'heatmap_chart_html': heatmap_chart_html,
             'cpu_chart_html': cpu_chart_html,
             'mem_chart_html': mem_chart_html,
+            'resource_chart_html': resource_chart_html,
             'table_html': table_html,
+            'search_summary_html': search_summary_html,
+            'exploration_html': "".join(exploration_rows),
         }
 
@@ -60,7 +60,7 @@ class PaymentListView(LoginRequiredMixin, ListView):
             page = int(self.request.GET.get('page', '1'))
         except ValueError:
             page = 1
-        params = {'page': page, 'page_size': 10}
+        params = {'page': page, 'page_size': 10, 'expand': 'claim,policy,customer'}
         resp = api_get(self.request, '/payments/', params=params)
         items: List[Dict[str, Any]] = []
         total_pages = 1
@@ -11,6 +11,7 @@ from django.views.generic import ListView, TemplateView
 from django.views.generic.edit import FormView
 
 from insurance.forms import InsurancePolicyForm
+from insurance.repository.unit_of_work import UnitOfWork
 
 
 API_ROOT = "http://localhost:8000/api"
@@ -58,7 +59,7 @@ class InsurancePolicyListView(LoginRequiredMixin, ListView):
             page = int(self.request.GET.get('page', '1'))
         except ValueError:
             page = 1
-        params = {'page': page, 'page_size': 10}
+        params = {'page': page, 'page_size': 10, 'expand': 'customer'}
         resp = api_get(self.request, '/policies/', params=params)
         items: List[Dict[str, Any]] = []
         total_pages = 1
@@ -131,20 +132,30 @@ class InsurancePolicyUpdateView(LoginRequiredMixin, FormView):
     form_class = InsurancePolicyForm
     success_url = reverse_lazy('policy_list')
 
+    def get_object(self):
+        # Loaded once per request and shared by get_form_kwargs and get_initial.
+        if not hasattr(self, '_object'):
+            self._object = None
+            try:
+                pk = self.kwargs.get('pk')
+                if pk is not None:
+                    with UnitOfWork(read_only=True) as repo:
+                        self._object = repo.policies.get_by_id(pk)
+            except Exception:
+                pass
+        return self._object
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        try:
-            pk = self.kwargs.get('pk')
-            if pk is not None:
-                from insurance.model.insurance_policy import InsurancePolicy
-                instance = InsurancePolicy.objects.filter(pk=pk).first()
-                if instance is not None:
-                    kwargs['instance'] = instance
-        except Exception:
-            pass
+        instance = self.get_object()
+        if instance is not None:
+            kwargs['instance'] = instance
         return kwargs
 
     def get_initial(self):
+        if self.get_object() is not None:
+            # The ModelForm already takes its initial values from the instance.
+            return {}
         pk = self.kwargs.get('pk')
         resp = api_get(self.request, f'/policies/{pk}/')
         if resp.status_code == 200:
@@ -0,0 +1,87 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+from insurance.model.claim import Claim
+from insurance.model.customer import Customer
+from insurance.model.insurance_policy import InsurancePolicy
+from insurance.model.payment import Payment
+
+
+POLICY_TYPES = ('auto', 'home', 'health', 'life', 'travel')
+
+
+@dataclass
+class SyntheticDataset:
+    customers: List[Customer] = field(default_factory=list)
+    policies: List[InsurancePolicy] = field(default_factory=list)
+    claims: List[Claim] = field(default_factory=list)
+    payments: List[Payment] = field(default_factory=list)
+
+    @property
+    def hot_customer(self) -> Customer:
+        # Owns more claims than the largest page size the tests request.
+        return self.customers[0]
+
+    @property
+    def hot_policy(self) -> InsurancePolicy:
+        return self.policies[0]
+
+
+def build_dataset(customers: int = 40, policies_per_customer: int = 2, claims_per_policy: int = 2,
+                  payments_per_claim: int = 1, hot_claims: int = 60, seed: int = 1234,
+                  prefix: str = 'syn') -> SyntheticDataset:
+    rng = random.Random(seed)
+    today = date(2025, 1, 1)
+    dataset = SyntheticDataset()
+
+    dataset.customers = Customer.objects.bulk_create([
+        Customer(
+            full_name=f'{prefix.title()} Customer {i:05d}',
+            tax_number=f'{prefix}-tax-{i:07d}',
+            date_of_birth=today - timedelta(days=rng.randint(18 * 365, 80 * 365)),
+            email=f'{prefix}.customer{i}@example.com',
+            phone=f'+380{rng.randint(100000000, 999999999)}',
+            address=f'{rng.randint(1, 200)} Synthetic St.',
+        )
+        for i in range(customers)
+    ])
+
+    dataset.policies = InsurancePolicy.objects.bulk_create([
+        InsurancePolicy(
+            policy_number=f'{prefix.upper()}-{c.id}-{j}',
+            policy_type=rng.choice(POLICY_TYPES),
+            start_date=today - timedelta(days=rng.randint(30, 3 * 365)),
+            end_date=None if rng.random() < 0.5 else today + timedelta(days=rng.randint(1, 365)),
+            premium=Decimal(rng.randint(50, 500)),
+            coverage_amount=Decimal(rng.randint(5, 100) * 1000),
+            customer=c,
+        )
+        for c in dataset.customers
+        for j in range(policies_per_customer)
+    ])
+
+    claims = []
+    for index, policy in enumerate(dataset.policies):
+        count = hot_claims if index == 0 else claims_per_policy
+        for _ in range(count):
+            claims.append(Claim(
+                policy=policy,
+                claim_date=policy.start_date + timedelta(days=rng.randint(1, 30)),
+                amount=Decimal(rng.randint(100, 20000)),
+                description='Synthetic claim',
+            ))
+    dataset.claims = Claim.objects.bulk_create(claims)
+
+    dataset.payments = Payment.objects.bulk_create([
+        Payment(
+            amount=Decimal(rng.randint(50, 10000)),
+            date=claim.claim_date + timedelta(days=rng.randint(1, 60)),
+            claim=claim,
+        )
+        for claim in dataset.claims
+        for _ in range(payments_per_claim)
+    ])
+    return dataset
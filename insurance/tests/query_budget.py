@@ -0,0 +1,163 @@
+import difflib
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional
+from unittest import mock
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int
+    rows: int
+
+
+@dataclass
+class RecordedQuery:
+    sql: str
+    rows: int
+    duration_ms: float
+
+
+# Tests wrap every atomic block in a savepoint; outside tests these would be
+# plain transactions, so they are not charged to the endpoint.
+_SAVEPOINT_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+@dataclass
+class QueryLog:
+    queries: List[RecordedQuery] = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith(_SAVEPOINT_PREFIXES):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            rowcount = getattr(context['cursor'], 'rowcount', -1)
+            self.queries.append(RecordedQuery(sql, max(rowcount, 0), (time.perf_counter() - start) * 1e3))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def rows(self) -> int:
+        return sum(q.rows for q in self.queries)
+
+    def statements(self) -> List[str]:
+        # SQL is captured before parameter binding, so identical statements
+        # with different ids compare equal.
+        return [q.sql for q in self.queries]
+
+    def report(self) -> str:
+        # Repeats of a statement are folded into its first occurrence.
+        repeated = Counter(self.statements())
+        lines = []
+        seen = set()
+        for i, q in enumerate(self.queries, 1):
+            if q.sql in seen:
+                continue
+            seen.add(q.sql)
+            times = repeated[q.sql]
+            marker = f' (x{times} — possible N+1)' if times > 1 else ''
+            lines.append(f'  {i:3d}. [{q.rows} rows, {q.duration_ms:.2f} ms]{marker} {q.sql}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def capture_queries():
+    log = QueryLog()
+    # QuerySet.iterator() (e.g. form choice fields) streams through a
+    # server-side cursor whose rowcount is unknown; fetch client-side while
+    # recording so those rows are charged too.
+    previous = {alias: connections[alias].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS', False)
+                for alias in settings.DATABASES}
+    try:
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                connections[alias].settings_dict['DISABLE_SERVER_SIDE_CURSORS'] = True
+                stack.enter_context(connections[alias].execute_wrapper(log))
+            yield log
+    finally:
+        for alias, value in previous.items():
+            connections[alias].settings_dict['DISABLE_SERVER_SIDE_CURSORS'] = value
+
+
+def diff_statements(expected: QueryLog, actual: QueryLog, expected_label: str, actual_label: str) -> str:
+    return '\n'.join(difflib.unified_diff(
+        expected.statements(), actual.statements(), fromfile=expected_label, tofile=actual_label, lineterm=''
+    ))
+
+
+class DjangoClientAdapter(BaseAdapter):
+    """
+    Serves the template views' calls to the API (plain `requests` against
+    localhost:8000) with the Django test client on the same thread, so the
+    API's SQL shows up in the page's query log.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.client = Client()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlsplit(request.url)
+        path = url.path + (f'?{url.query}' if url.query else '')
+        extra = {}
+        if 'Authorization' in request.headers:
+            extra['HTTP_AUTHORIZATION'] = request.headers['Authorization']
+        body = request.body or b''
+        response = self.client.generic(
+            request.method, path, data=body,
+            content_type=request.headers.get('Content-Type', 'application/octet-stream'), **extra
+        )
+        result = requests.Response()
+        result.status_code = response.status_code
+        result._content = response.content
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.encoding = 'utf-8'
+        result.url = request.url
+        result.request = request
+        return result
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def serve_api_in_process():
+    adapter = DjangoClientAdapter()
+    with mock.patch.object(requests.Session, 'get_adapter', lambda session, url: adapter):
+        yield adapter
+
+
+class QueryBudgetMixin:
+    def assertWithinBudget(self, log: QueryLog, budget: Budget, label: str, extra_rows: int = 0):
+        rows_allowed = budget.rows + extra_rows
+        problems = []
+        if log.count > budget.queries:
+            problems.append(f'{log.count} queries, budget is {budget.queries}')
+        if log.rows > rows_allowed:
+            problems.append(f'{log.rows} rows read, budget is {rows_allowed}')
+        if problems:
+            self.fail(f'{label}: {"; ".join(problems)}\n{log.report()}')
+
+    def assertSameQueries(self, small: QueryLog, large: QueryLog, small_label: str, large_label: str,
+                          label: Optional[str] = None):
+        if small.count != large.count:
+            self.fail(
+                f'{label or large_label}: query count depends on page size '
+                f'({small.count} for {small_label}, {large.count} for {large_label})\n'
+                f'{diff_statements(small, large, small_label, large_label)}'
+            )
@@ -0,0 +1,34 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from insurance.model.optimization_job import OptimizationJob
+from insurance.parallel_db import jobs
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class AnalyticsViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_history_rejects_non_numeric_parameters(self):
+        for params in ({'limit': 'abc'}, {'num_queries': 'x'}):
+            response = self.client.get('/api/analytics/db-optimization/history/', params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get('/api/analytics/db-optimization/history/', {'limit': 5, 'num_queries': 4})
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_plans_rejects_non_numeric_limit(self):
+        self.client.force_authenticate(User.objects.create_user('planner', password='x', is_staff=True))
+        self.assertEqual(self.client.get('/api/analytics/query-plans/', {'limit': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/query-plans/', {'limit': 5}).status_code, 200)
+
+    def test_optimization_is_queued_as_a_job(self):
+        with mock.patch.object(jobs, '_get_executor') as executor:
+            response = self.client.post('/api/analytics/db-optimization/', {'strategy': 'grid'}, format='json')
+        self.assertEqual(response.status_code, 202, response.content)
+        job = OptimizationJob.objects.get(id=response.json()['job_id'])
+        self.assertEqual(job.status, OptimizationJob.STATUS_PENDING)
+        executor.return_value.submit.assert_called_once_with(jobs.run_optimization_job, job.id)
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from insurance.repository.unit_of_work import UnitOfWork
+from insurance.tests.dataset import build_dataset
+from insurance.tests.query_budget import capture_queries
+
+
+class PartialUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = build_dataset(customers=2, policies_per_customer=1, claims_per_policy=1, hot_claims=0)
+
+    def test_update_is_one_statement_touching_only_the_given_fields(self):
+        claim = self.dataset.claims[0]
+        with UnitOfWork() as repo, capture_queries() as log:
+            updated = repo.claims.update(claim.id, amount=Decimal('42.10'))
+        self.assertEqual(log.count, 1)
+        sql = log.queries[0].sql
+        self.assertTrue(sql.startswith('UPDATE "claim" SET "amount" = %s WHERE'), sql)
+        self.assertIn('RETURNING', sql)
+        self.assertEqual(updated.amount, Decimal('42.10'))
+        self.assertEqual(updated.description, claim.description)
+        claim.refresh_from_db()
+        self.assertEqual(claim.amount, Decimal('42.10'))
+
+    def test_foreign_keys_accept_instances(self):
+        policy = self.dataset.policies[0]
+        other = self.dataset.customers[1]
+        with UnitOfWork() as repo:
+            updated = repo.policies.update(policy.id, customer=other)
+        self.assertEqual(updated.customer_id, other.id)
+
+    def test_missing_row_returns_none(self):
+        with UnitOfWork() as repo:
+            self.assertIsNone(repo.claims.update(10 ** 9, amount=Decimal('1.00')))
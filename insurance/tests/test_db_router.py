@@ -0,0 +1,193 @@
+import random
+from collections import Counter
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from insurance import db_router
+from insurance.middleware import ReplicaRoutingMiddleware
+from insurance.model.customer import Customer
+
+
+REPLICAS = {'replica_1': 3, 'replica_2': 1}
+CUSTOMER_DATA = {
+    'full_name': 'Replica Customer', 'tax_number': 'replica-tax-1', 'date_of_birth': '1990-01-01',
+    'email': 'replica.customer@example.com', 'phone': '+380501112233', 'address': '1 Replica St.',
+}
+
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    db_router.PIN_CACHE: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-pin'},
+}
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS=REPLICAS, REPLICA_PIN_SECONDS=5, CACHES=LOCAL_CACHES)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Checks routing decisions only; no query reaches a database (see
+    ReplicaDatabaseTests for requests against a replica). To try it by
+    hand, copy the database (`createdb -T insurance_company
+    insurance_company_replica`) and start the server with
+    DB_REPLICAS="localhost/insurance_company_replica".
+    """
+
+    def setUp(self):
+        caches[db_router.PIN_CACHE].clear()
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def dispatch(self, method, path, writes=False, **extra):
+        # Runs the middleware around a stand-in view and returns where the
+        # view's reads (before and after an optional write) were routed.
+        request = getattr(self.factory, method)(path, **extra)
+        match = resolve(path)
+        seen = {}
+
+        def view(request):
+            middleware.process_view(request, match.func, (), {})
+            seen['read'] = self.router.db_for_read(Customer)
+            if writes:
+                seen['write'] = self.router.db_for_write(Customer)
+                seen['read_after_write'] = self.router.db_for_read(Customer)
+            return None
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware(request)
+        return seen
+
+    def test_list_and_retrieve_read_from_a_replica(self):
+        self.assertIn(self.dispatch('get', '/api/customers/')['read'], REPLICAS)
+        self.assertIn(self.dispatch('get', '/api/customers/1/')['read'], REPLICAS)
+
+    def test_writes_and_other_actions_use_the_primary(self):
+        self.assertEqual(self.dispatch('post', '/api/customers/')['read'], DEFAULT_DB_ALIAS)
+        self.assertEqual(self.dispatch('get', '/api/customers/count/')['read'],
+                         DEFAULT_DB_ALIAS)
+        self.assertEqual(self.dispatch('get', '/customers/')['read'], DEFAULT_DB_ALIAS)
+
+    def test_analytics_aggregates_read_from_a_replica(self):
+        self.assertIn(self.dispatch('get', '/api/analytics/counts/')['read'], REPLICAS)
+        self.assertIn(self.dispatch('get', '/api/analytics/payments-by-month/')['read'], REPLICAS)
+
+    def test_analytics_jobs_and_plans_use_the_primary(self):
+        for method, path in [('post', '/api/analytics/db-optimization/jobs/'),
+                             ('get', '/api/analytics/db-optimization/jobs/1/'),
+                             ('post', '/api/analytics/db-optimization/jobs/1/cancel/'),
+                             ('post', '/api/analytics/db-optimization/'),
+                             ('get', '/api/analytics/query-plans/'),
+                             ('post', '/api/analytics/query-plans/')]:
+            with self.subTest(method=method, path=path):
+                self.assertEqual(self.dispatch(method, path)['read'], DEFAULT_DB_ALIAS)
+
+    def test_a_write_moves_later_reads_and_the_client_to_the_primary(self):
+        auth = {'HTTP_AUTHORIZATION': 'Bearer token-a'}
+        seen = self.dispatch('get', '/api/analytics/counts/', writes=True, **auth)
+        self.assertIn(seen['read'], REPLICAS)
+        self.assertEqual(seen['write'], DEFAULT_DB_ALIAS)
+        self.assertEqual(seen['read_after_write'], DEFAULT_DB_ALIAS)
+
+        self.assertEqual(self.dispatch('get', '/api/customers/', **auth)['read'], DEFAULT_DB_ALIAS)
+        other = {'HTTP_AUTHORIZATION': 'Bearer token-b'}
+        self.assertIn(self.dispatch('get', '/api/customers/', **other)['read'], REPLICAS)
+
+    def test_credentials_are_read_from_the_primary(self):
+        with db_router.route_reads('replica_1'):
+            self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Customer), 'replica_1')
+
+    def test_pins_in_the_database_cache_are_read_from_the_primary(self):
+        from django.core.cache.backends.db import DatabaseCache
+        cache_model = DatabaseCache('replica_pin_cache', {}).cache_model_class
+        with db_router.route_reads('replica_1'):
+            self.assertEqual(self.router.db_for_read(cache_model), DEFAULT_DB_ALIAS)
+
+    def test_replicas_are_chosen_by_weight(self):
+        rng = random.Random(7)
+        picks = Counter(db_router.choose_replica(rng) for _ in range(4000))
+        self.assertEqual(set(picks), set(REPLICAS))
+        self.assertAlmostEqual(picks['replica_1'] / 4000, 0.75, delta=0.03)
+
+    def test_replica_reads_outside_a_request_picks_a_replica(self):
+        with db_router.replica_reads() as alias:
+            self.assertIn(alias, REPLICAS)
+        with db_router.route_reads(None), db_router.replica_reads() as alias:
+            self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICA_WEIGHTS={})
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.dispatch('get', '/api/customers/')['read'], DEFAULT_DB_ALIAS)
+        with db_router.replica_reads() as alias:
+            self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_replicas_are_never_migrated(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'insurance'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'insurance'))
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={'replica_1': 1}, REPLICA_PIN_SECONDS=5)
+class ReplicaDatabaseTests(TestCase):
+    """
+    Runs requests against replica_1, a test mirror of the primary on its own
+    connection. Rows the test writes stay in the primary's open transaction,
+    so the replica cannot see them, much like replication lag.
+    """
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        caches[db_router.PIN_CACHE].clear()
+        self.client = self.client_for('replica-reader')
+
+    def client_for(self, username):
+        client = APIClient()
+        user = User.objects.create_user(username, password='x')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def test_list_and_retrieve_read_from_the_replica(self):
+        customer = Customer.objects.order_by('id').first()
+        with CaptureQueriesContext(connections['replica_1']) as replica:
+            listed = self.client.get('/api/customers/', {'page_size': 5})
+            retrieved = self.client.get(f'/api/customers/{customer.id}/')
+        self.assertEqual(listed.status_code, 200)
+        self.assertEqual(listed.json()['total'], Customer.objects.count())
+        self.assertEqual(retrieved.json()['tax_number'], customer.tax_number)
+        self.assertTrue(replica.captured_queries)
+
+        unseen = Customer.objects.create(full_name='Not Replicated', tax_number='replica-unseen',
+                                         date_of_birth=date(1990, 1, 1), email='unseen@example.com',
+                                         phone='+380500000000', address='1 Lag St.')
+        self.assertEqual(self.client.get(f'/api/customers/{unseen.id}/').status_code, 404)
+
+    def test_a_client_reads_its_own_writes(self):
+        created = self.client.post('/api/customers/', CUSTOMER_DATA, format='json')
+        self.assertEqual(created.status_code, 201, created.content)
+        path = f"/api/customers/{created.json()['id']}/"
+        with CaptureQueriesContext(connections['replica_1']) as replica:
+            self.assertEqual(self.client.get(path).status_code, 200)
+        self.assertEqual(replica.captured_queries, [])
+        self.assertEqual(self.client_for('other-reader').get(path).status_code, 404)
+
+    def test_an_expired_pin_sends_the_client_back_to_the_replica(self):
+        created = self.client.post('/api/customers/', CUSTOMER_DATA, format='json')
+        self.assertEqual(created.status_code, 201, created.content)
+        table = caches[db_router.PIN_CACHE]._table
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f"UPDATE {table} SET expires = now() - interval '1 minute'")
+
+        # The lookup deletes the expired row; that must not count as a write
+        # that pins the client again.
+        for _ in range(2):
+            with CaptureQueriesContext(connections['replica_1']) as replica:
+                self.assertEqual(self.client.get('/api/customers/').status_code, 200)
+            self.assertTrue(replica.captured_queries)
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {table}')
+            self.assertEqual(cursor.fetchone()[0], 0)
@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+from insurance.repository.unit_of_work import UnitOfWork
+from insurance.tests.dataset import build_dataset
+from insurance.tests.query_budget import capture_queries
+
+
+class IdentityMapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = build_dataset(customers=3, policies_per_customer=1, claims_per_policy=1, hot_claims=0)
+
+    def test_repeated_get_by_id_is_served_from_memory(self):
+        customer = self.dataset.customers[0]
+        with UnitOfWork() as repo, capture_queries() as log:
+            first = repo.customers.get_by_id(customer.id)
+            again = repo.customers.get_by_id(str(customer.id))
+        self.assertIs(first, again)
+        self.assertEqual(log.count, 1)
+
+    def test_units_do_not_share_their_maps(self):
+        customer = self.dataset.customers[0]
+        with UnitOfWork() as repo:
+            first = repo.customers.get_by_id(customer.id)
+        with UnitOfWork() as repo:
+            self.assertIsNot(repo.customers.get_by_id(customer.id), first)
+
+    def test_update_reuses_the_loaded_row(self):
+        customer = self.dataset.customers[0]
+        with UnitOfWork() as repo:
+            repo.customers.get_by_id(customer.id)
+            with capture_queries() as log:
+                updated = repo.customers.update(customer.id, phone='+380500000001')
+            self.assertEqual(log.count, 1)
+            self.assertEqual(repo.customers.get_by_id(customer.id).phone, '+380500000001')
+        self.assertEqual(updated.phone, '+380500000001')
+
+    def test_writes_evict_cached_rows(self):
+        policy = self.dataset.policies[0]
+        with UnitOfWork() as repo:
+            repo.policies.get_by_id(policy.id)
+            repo.customers.delete(policy.customer_id)
+            # The delete cascaded to the policy, so it must not come back from memory.
+            self.assertIsNone(repo.policies.get_by_id(policy.id))
@@ -0,0 +1,48 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from insurance.model.optimization_job import OptimizationJob
+from insurance.parallel_db import jobs
+from insurance.repository.unit_of_work import UnitOfWork
+
+
+class OptimizationJobStateTests(TestCase):
+    def make_job(self, status, age):
+        job = OptimizationJob.objects.create(params={'num_queries': 100}, status=status)
+        then = timezone.now() - age
+        OptimizationJob.objects.filter(id=job.id).update(created_at=then, updated_at=then)
+        return job.id
+
+    def test_a_silent_running_job_is_failed(self):
+        job_id = self.make_job(OptimizationJob.STATUS_RUNNING, jobs.STALE_AFTER * 2)
+        job = jobs.get_optimization_job(job_id)
+        self.assertEqual((job.status, job.error), (OptimizationJob.STATUS_FAILED, 'Job worker stopped responding'))
+
+    def test_a_queued_job_waits_past_the_heartbeat_timeout(self):
+        job_id = self.make_job(OptimizationJob.STATUS_PENDING, jobs.STALE_AFTER * 2)
+        self.assertEqual(jobs.get_optimization_job(job_id).status, OptimizationJob.STATUS_PENDING)
+        with UnitOfWork() as repo:
+            self.assertTrue(repo.jobs.mark_running(job_id))
+
+    def test_a_job_never_started_fails_after_the_queue_timeout(self):
+        job_id = self.make_job(OptimizationJob.STATUS_PENDING, jobs.QUEUE_TIMEOUT * 2)
+        job = jobs.get_optimization_job(job_id)
+        self.assertEqual((job.status, job.error), (OptimizationJob.STATUS_FAILED, 'Job was never started'))
+
+    def test_a_late_worker_cannot_revive_a_failed_job(self):
+        job_id = self.make_job(OptimizationJob.STATUS_PENDING, timedelta(0))
+
+        def run(params, progress_callback=None, job_id=None):
+            # The job is failed as stale while the worker is still busy.
+            with UnitOfWork() as repo:
+                repo.jobs.finish(job_id, OptimizationJob.STATUS_FAILED, error='Job worker stopped responding')
+            return {'run': {'regressions': []}}
+
+        with mock.patch.object(jobs, 'run_optimization', run), \
+                mock.patch.object(jobs, 'close_db_connections'):
+            jobs.run_optimization_job(job_id)
+        job = OptimizationJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.result), (OptimizationJob.STATUS_FAILED, None))
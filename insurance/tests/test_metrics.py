@@ -0,0 +1,29 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from insurance.metrics import Counter, Histogram, Registry
+
+
+class MetricShardTests(SimpleTestCase):
+    def run_threads(self, target, count=200):
+        for _ in range(count):
+            thread = threading.Thread(target=target)
+            thread.start()
+            thread.join()
+
+    def test_finished_threads_do_not_keep_their_shards(self):
+        counter = Counter('test_requests_total', 'Test.', ('status',), registry=Registry())
+        self.run_threads(lambda: counter.inc(status='200'))
+        self.assertLessEqual(len(counter._shards), 1)
+        self.assertIn('test_requests_total{status="200"} 200', counter.render())
+
+    def test_histogram_keeps_retired_observations(self):
+        histogram = Histogram('test_seconds', 'Test.', buckets=(0.1, 1.0), registry=Registry())
+        self.run_threads(lambda: histogram.observe(0.5), count=50)
+        histogram.observe(0.05)
+        lines = histogram.render()
+        self.assertLessEqual(len(histogram._shards), 2)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{le="1.0"} 51', lines)
+        self.assertIn('test_seconds_count 51', lines)
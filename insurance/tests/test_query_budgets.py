@@ -0,0 +1,317 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from insurance.model.optimization_job import OptimizationJob
+from insurance.tests.dataset import build_dataset
+from insurance.tests.query_budget import Budget, QueryBudgetMixin, capture_queries, serve_api_in_process
+
+
+SMALL_PAGE = 5
+LARGE_PAGE = 50
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    budget: Budget
+    data: Optional[Dict[str, Any]] = None
+    paged: bool = False
+
+
+CUSTOMER_DATA = {
+    'full_name': 'Budget Customer', 'tax_number': 'budget-tax-1', 'date_of_birth': '1990-01-01',
+    'email': 'budget.customer@example.com', 'phone': '+380501112233', 'address': '1 Budget St.',
+}
+POLICY_DATA = {
+    'policy_number': 'BUDGET-1', 'policy_type': 'auto', 'start_date': '2024-01-01', 'end_date': '',
+    'premium': '100.00', 'coverage_amount': '10000.00', 'customer': '{customer}',
+}
+POLICY_API_DATA = dict(POLICY_DATA, end_date=None)
+CLAIM_DATA = {'policy': '{policy}', 'claim_date': '2024-02-01', 'amount': '500.00', 'description': 'Budget'}
+PAYMENT_DATA = {'amount': '250.00', 'date': '2024-03-01', 'claim': '{claim}'}
+
+# Paged endpoints: rows are checked against budget.rows + page_size, and the
+# query count must not change between SMALL_PAGE and LARGE_PAGE.
+API_ENDPOINTS = [
+    Endpoint('customer-list', 'get', '/api/customers/', Budget(3, 2), paged=True),
+    Endpoint('customer-list', 'post', '/api/customers/', Budget(4, 2), data=CUSTOMER_DATA),
+    Endpoint('customer-detail', 'get', '/api/customers/{customer}/', Budget(2, 2)),
+    Endpoint('customer-summary', 'get', '/api/customers/{hot_customer}/summary/', Budget(3, 4)),
+    # A miss: the summary plus the shared cache's lookup, size check and insert.
+    Endpoint('customer-cached-summary', 'get', '/api/customers/{hot_customer}/summary/cached/', Budget(7, 6)),
+    Endpoint('customer-detail', 'put', '/api/customers/{customer}/', Budget(5, 2), data=CUSTOMER_DATA),
+    Endpoint('customer-detail', 'patch', '/api/customers/{customer}/', Budget(3, 2),
+             data={'phone': '+380509998877'}),
+    Endpoint('customer-detail', 'delete', '/api/customers/{customer}/', Budget(9, 19)),
+    Endpoint('customer-count', 'get', '/api/customers/count/', Budget(2, 2)),
+    Endpoint('customer-find-by-tax-number', 'get', '/api/customers/find_by_tax_number/?tax_number={tax_number}',
+             Budget(2, 2)),
+
+    Endpoint('policy-list', 'get', '/api/policies/', Budget(3, 2), paged=True),
+    Endpoint('policy-list', 'get', '/api/policies/?expand=customer', Budget(3, 2), paged=True),
+    Endpoint('policy-list', 'post', '/api/policies/', Budget(4, 3), data=POLICY_API_DATA),
+    Endpoint('policy-detail', 'get', '/api/policies/{policy}/', Budget(2, 2)),
+    Endpoint('policy-detail', 'put', '/api/policies/{policy}/', Budget(4, 3), data=POLICY_API_DATA),
+    Endpoint('policy-detail', 'patch', '/api/policies/{policy}/', Budget(2, 2), data={'premium': '120.00'}),
+    Endpoint('policy-detail', 'delete', '/api/policies/{policy}/', Budget(6, 9)),
+    Endpoint('policy-count', 'get', '/api/policies/count/', Budget(2, 2)),
+
+    Endpoint('claim-list', 'get', '/api/claims/', Budget(3, 2), paged=True),
+    Endpoint('claim-list', 'get', '/api/claims/?expand=policy,customer', Budget(3, 2), paged=True),
+    Endpoint('claim-list', 'post', '/api/claims/', Budget(3, 3), data=CLAIM_DATA),
+    Endpoint('claim-detail', 'get', '/api/claims/{claim}/', Budget(2, 2)),
+    Endpoint('claim-full-view', 'get', '/api/claims/{claim}/full/', Budget(3, 3)),
+    Endpoint('claim-detail', 'put', '/api/claims/{claim}/', Budget(3, 3), data=CLAIM_DATA),
+    Endpoint('claim-detail', 'patch', '/api/claims/{claim}/', Budget(2, 2), data={'amount': '600.00'}),
+    Endpoint('claim-detail', 'delete', '/api/claims/{claim}/', Budget(4, 4)),
+    Endpoint('claim-count', 'get', '/api/claims/count/', Budget(2, 2)),
+    Endpoint('claim-find-by-customer', 'get', '/api/claims/find_by_customer/?customer_id={hot_customer}',
+             Budget(3, 2), paged=True),
+    Endpoint('claim-find-by-customer', 'get',
+             '/api/claims/find_by_customer/?customer_id={hot_customer}&expand=policy', Budget(3, 2), paged=True),
+    Endpoint('claim-find-by-policy', 'get', '/api/claims/find_by_policy/?policy_id={hot_policy}',
+             Budget(2, 61)),
+
+    Endpoint('payment-list', 'get', '/api/payments/', Budget(3, 2), paged=True),
+    Endpoint('payment-list', 'get', '/api/payments/?expand=claim,policy,customer', Budget(3, 2), paged=True),
+    Endpoint('payment-list', 'post', '/api/payments/', Budget(3, 3), data=PAYMENT_DATA),
+    Endpoint('payment-detail', 'get', '/api/payments/{payment}/', Budget(2, 2)),
+    Endpoint('payment-detail', 'put', '/api/payments/{payment}/', Budget(3, 3), data=PAYMENT_DATA),
+    Endpoint('payment-detail', 'patch', '/api/payments/{payment}/', Budget(2, 2), data={'amount': '260.00'}),
+    Endpoint('payment-detail', 'delete', '/api/payments/{payment}/', Budget(3, 3)),
+    Endpoint('payment-count', 'get', '/api/payments/count/', Budget(2, 2)),
+
+    Endpoint('analytics-payments-by-month', 'get', '/api/analytics/payments-by-month/', Budget(2, 192)),
+    Endpoint('analytics-avg-claim-by-age-group', 'get', '/api/analytics/avg-claim-by-age-group/', Budget(2, 7)),
+    Endpoint('analytics-claims-per-customer', 'get', '/api/analytics/claims-per-customer/', Budget(2, 241)),
+    Endpoint('analytics-policy-profit-by-type', 'get', '/api/analytics/policy-profit-by-type/', Budget(2, 11)),
+    Endpoint('analytics-time-to-claim', 'get', '/api/analytics/time-to-claim/', Budget(2, 156)),
+    Endpoint('analytics-top-customers-by-payouts', 'get', '/api/analytics/top-customers-by-payouts/',
+             Budget(2, 11)),
+    Endpoint('analytics-counts', 'get', '/api/analytics/counts/', Budget(5, 5)),
+    Endpoint('analytics-db-optimization-history', 'get', '/api/analytics/db-optimization/history/',
+             Budget(2, 1)),
+    Endpoint('analytics-db-optimization-job', 'get', '/api/analytics/db-optimization/jobs/{job}/', Budget(2, 2)),
+    Endpoint('analytics-cancel-db-optimization-job', 'post', '/api/analytics/db-optimization/jobs/{job}/cancel/',
+             Budget(2, 2)),
+    Endpoint('analytics-query-plans', 'get', '/api/analytics/query-plans/', Budget(2, 9)),
+    Endpoint('analytics-query-plans', 'get', '/api/analytics/query-plans/?name=claims.find_by_customer',
+             Budget(3, 22)),
+    # One EXPLAIN, one previous-plan lookup and one insert per analytics query.
+    Endpoint('analytics-query-plans', 'post', '/api/analytics/query-plans/', Budget(28, 100)),
+
+    Endpoint('search-list', 'get', '/api/search/?q=customer&limit=20', Budget(4, 43)),
+    Endpoint('autocomplete-list', 'get', '/api/autocomplete/?kind=customer&q=customer', Budget(3, 12)),
+    Endpoint('autocomplete-list', 'get', '/api/autocomplete/?kind=claim&q={claim}', Budget(4, 22)),
+
+    Endpoint('register', 'post', '/api/register/', Budget(3, 2),
+             data={'username': 'budget-user', 'password': 'Budget-pass-123', 'password2': 'Budget-pass-123',
+                   'email': 'budget.user@example.com'}),
+    Endpoint('metrics', 'get', '/metrics', Budget(0, 0)),
+]
+
+# Pages are charged for the API calls they make too. Create/edit forms read
+# only the selected customer/policy/claim, to label its autocomplete widget.
+PAGE_ENDPOINTS = [
+    Endpoint('home', 'get', '/', Budget(7, 7)),
+    Endpoint('login', 'get', '/accounts/login/', Budget(2, 2)),
+    Endpoint('login', 'post', '/accounts/login/', Budget(5, 5),
+             data={'username': 'budget', 'password': 'Budget-pass-123'}),
+    Endpoint('logout', 'post', '/accounts/logout/', Budget(4, 4)),
+    Endpoint('register_page', 'get', '/register/', Budget(2, 2)),
+    Endpoint('register_page', 'post', '/register/', Budget(2, 1),
+             data={'username': 'budget-page-user', 'password': 'Budget-pass-123',
+                   'password2': 'Budget-pass-123', 'email': 'budget.page@example.com'}),
+
+    Endpoint('analytics_dashboard_v1', 'get', '/analytics/dashboard/v1', Budget(8, 614)),
+    Endpoint('analytics_dashboard_v2', 'get', '/analytics/dashboard/v2', Budget(8, 614)),
+    Endpoint('db_optimization_dashboard', 'get', '/analytics/db-optimization/', Budget(3, 2)),
+    Endpoint('db_optimization_dashboard', 'get', '/analytics/db-optimization/?job={job}', Budget(4, 3)),
+
+    Endpoint('customer_list', 'get', '/customers/', Budget(5, 14)),
+    Endpoint('customer_create', 'get', '/customers/create/', Budget(2, 2)),
+    Endpoint('customer_create', 'post', '/customers/create/', Budget(8, 4), data=CUSTOMER_DATA),
+    Endpoint('customer_detail', 'get', '/customers/{customer}/', Budget(5, 6)),
+    Endpoint('customer_edit', 'get', '/customers/{customer}/edit/', Budget(3, 3)),
+    Endpoint('customer_edit', 'post', '/customers/{customer}/edit/', Budget(8, 5), data=CUSTOMER_DATA),
+    Endpoint('customer_delete', 'post', '/customers/{customer}/delete/', Budget(11, 21),
+             data={'id': '{customer}'}),
+    Endpoint('claims_by_customer_list', 'get', '/claims/byCustomer/{hot_customer}/', Budget(5, 14)),
+
+    Endpoint('policy_list', 'get', '/policies/', Budget(5, 14)),
+    Endpoint('policy_create', 'get', '/policies/create/', Budget(2, 2)),
+    Endpoint('policy_create', 'post', '/policies/create/', Budget(10, 8), data=POLICY_DATA),
+    Endpoint('policy_detail', 'get', '/policies/{policy}/', Budget(4, 4)),
+    Endpoint('policy_edit', 'get', '/policies/{policy}/edit/', Budget(4, 4)),
+    Endpoint('policy_edit', 'post', '/policies/{policy}/edit/', Budget(11, 9), data=POLICY_DATA),
+    Endpoint('policy_delete', 'post', '/policies/{policy}/delete/', Budget(8, 11), data={'id': '{policy}'}),
+
+    Endpoint('claim_list', 'get', '/claims/', Budget(5, 14)),
+    Endpoint('claim_create', 'get', '/claims/create/', Budget(2, 2)),
+    Endpoint('claim_create', 'post', '/claims/create/', Budget(7, 7), data=CLAIM_DATA),
+    Endpoint('claim_detail', 'get', '/claims/{claim}/', Budget(5, 5)),
+    Endpoint('claim_edit', 'get', '/claims/{claim}/edit/', Budget(5, 5)),
+    Endpoint('claim_edit', 'post', '/claims/{claim}/edit/', Budget(9, 9), data=CLAIM_DATA),
+    Endpoint('claim_delete', 'post', '/claims/{claim}/delete/', Budget(6, 6), data={'id': '{claim}'}),
+
+    Endpoint('payment_list', 'get', '/payments/', Budget(5, 14)),
+    Endpoint('payment_create', 'get', '/payments/create/', Budget(2, 2)),
+    Endpoint('payment_create', 'post', '/payments/create/', Budget(7, 7), data=PAYMENT_DATA),
+    Endpoint('payment_detail', 'get', '/payments/{payment}/', Budget(4, 4)),
+    Endpoint('payment_edit', 'get', '/payments/{payment}/edit/', Budget(5, 5)),
+    Endpoint('payment_edit', 'post', '/payments/{payment}/edit/', Budget(9, 9), data=PAYMENT_DATA),
+    Endpoint('payment_delete', 'post', '/payments/{payment}/delete/', Budget(5, 5), data={'id': '{payment}'}),
+]
+
+# Routes exercised elsewhere or not worth a budget here, with the reason.
+EXEMPT = {
+    ('analytics-db-optimization', 'post'): 'hands the work to a background thread',
+    ('analytics-submit-db-optimization-job', 'post'): 'hands the work to a background thread',
+    ('db_optimization_dashboard', 'post'): 'submits a background job',
+}
+
+
+def _routes(patterns, seen=None):
+    seen = {} if seen is None else seen
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            _routes(pattern.url_patterns, seen)
+        elif isinstance(pattern, URLPattern) and pattern.name and pattern.name not in seen:
+            seen[pattern.name] = pattern.callback
+    return seen
+
+
+METHODS = ('get', 'post', 'put', 'patch', 'delete')
+
+
+def _methods(callback):
+    if getattr(callback, 'actions', None):
+        return set(callback.actions) & set(METHODS)
+    view_class = getattr(callback, 'view_class', None)
+    if view_class is None:
+        return {'get'}
+    # HTML pages are only reached with GET and POST (FormView's put() just aliases post()).
+    return {m for m in ('get', 'post') if m in view_class.http_method_names and hasattr(view_class, m)}
+
+
+def _owner_module(callback):
+    owner = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None) or callback
+    return owner.__module__
+
+
+# Replica aliases mirror the test database over their own connection and
+# cannot see the uncommitted test data, so budgets are measured on the primary.
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = build_dataset()
+        # Staff, so the admin-only analytics actions can be measured too.
+        cls.user = User.objects.create_user('budget', 'budget@example.com', 'Budget-pass-123', is_staff=True)
+        cls.job = OptimizationJob.objects.create(params={'num_queries': 100}, progress={'trials_done': 0})
+
+    def placeholders(self):
+        data = self.dataset
+        return {
+            'customer': data.customers[1].id,
+            'policy': data.policies[2].id,
+            'claim': data.claims[-1].id,
+            'payment': data.payments[-1].id,
+            'hot_customer': data.hot_customer.id,
+            'hot_policy': data.hot_policy.id,
+            'tax_number': data.customers[1].tax_number,
+            'job': self.job.id,
+        }
+
+    def resolve(self, endpoint: Endpoint):
+        values = self.placeholders()
+        path = endpoint.path.format(**values)
+        data = None
+        if endpoint.data is not None:
+            data = {k: v.format(**values) if isinstance(v, str) else v for k, v in endpoint.data.items()}
+        return path, data
+
+    def measure(self, client, endpoint: Endpoint, path: str, data=None, **kwargs):
+        # Each request runs in a savepoint that is rolled back, so writes do
+        # not leak into the next endpoint.
+        with transaction.atomic():
+            with capture_queries() as log:
+                response = getattr(client, endpoint.method)(path, data=data, **kwargs)
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400, f'{endpoint.method.upper()} {path}: {response.content[:500]!r}')
+        return log
+
+
+class ApiQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_endpoints_stay_within_budget(self):
+        for endpoint in API_ENDPOINTS:
+            if endpoint.paged:
+                continue
+            with self.subTest(endpoint=endpoint.name, method=endpoint.method):
+                path, data = self.resolve(endpoint)
+                log = self.measure(self.client, endpoint, path, data, format='json')
+                self.assertWithinBudget(log, endpoint.budget, f'{endpoint.method.upper()} {path}')
+
+    def test_paged_endpoints_do_not_scale_with_page_size(self):
+        for endpoint in API_ENDPOINTS:
+            if not endpoint.paged:
+                continue
+            with self.subTest(endpoint=endpoint.name):
+                path, _ = self.resolve(endpoint)
+                logs = {}
+                for page_size in (SMALL_PAGE, LARGE_PAGE):
+                    sep = '&' if '?' in path else '?'
+                    url = f'{path}{sep}page_size={page_size}'
+                    logs[page_size] = self.measure(self.client, endpoint, url)
+                    self.assertWithinBudget(logs[page_size], endpoint.budget, f'GET {url}',
+                                            extra_rows=page_size)
+                self.assertSameQueries(logs[SMALL_PAGE], logs[LARGE_PAGE],
+                                       f'page_size={SMALL_PAGE}', f'page_size={LARGE_PAGE}', endpoint.name)
+
+
+class PageQueryBudgetTests(QueryBudgetTestCase):
+    def login(self):
+        # What SiteLoginView leaves in the session: a Django login plus the
+        # JWT the pages forward to the API.
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['jwt_access'] = str(AccessToken.for_user(self.user))
+        session.save()
+
+    def test_pages_stay_within_budget(self):
+        with serve_api_in_process():
+            for endpoint in PAGE_ENDPOINTS:
+                with self.subTest(endpoint=endpoint.name, method=endpoint.method, path=endpoint.path):
+                    # Logging in or out replaces the session, so start each page from a fresh one.
+                    self.login()
+                    path, data = self.resolve(endpoint)
+                    log = self.measure(self.client, endpoint, path, data)
+                    self.assertWithinBudget(log, endpoint.budget, f'{endpoint.method.upper()} {path}')
+
+
+class RouteCoverageTests(TestCase):
+    maxDiff = None
+
+    def test_every_route_has_a_budget(self):
+        covered = {(e.name, e.method) for e in API_ENDPOINTS + PAGE_ENDPOINTS} | set(EXEMPT)
+        missing = []
+        for name, callback in _routes(get_resolver().url_patterns).items():
+            if not _owner_module(callback).startswith('insurance.'):
+                continue
+            for method in sorted(_methods(callback)):
+                if (name, method) not in covered:
+                    missing.append(f'{method.upper()} {name}')
+        self.assertEqual(missing, [], 'Add a query budget (or an EXEMPT entry) for these routes')
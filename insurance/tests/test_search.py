@@ -0,0 +1,185 @@
+from datetime import date
+from decimal import Decimal
+from unittest import SkipTest
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from insurance.model.customer import Customer
+from insurance.model.insurance_policy import InsurancePolicy
+from insurance.repository.search import trigram_enabled
+from insurance.tests.dataset import build_dataset
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = build_dataset(customers=12, policies_per_customer=1, claims_per_policy=0, hot_claims=0,
+                                    prefix='srch')
+        cls.user = User.objects.create_user('searcher', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_exact_match_ranks_first(self):
+        customer = self.dataset.customers[7]
+        items = self.search(q=customer.tax_number)['items']
+        self.assertEqual((items[0]['kind'], items[0]['id']), ('customer', customer.id))
+
+    def test_pages_follow_the_cursor_without_gaps_or_repeats(self):
+        everything = [(row['kind'], row['id']) for row in self.search(q='srch', limit=100)['items']]
+        self.assertEqual(len(everything), 24)
+        paged, after = [], None
+        while True:
+            page = self.search(q='srch', limit=5, **({'after': after} if after else {}))
+            paged += [(row['kind'], row['id']) for row in page['items']]
+            after = page['next']
+            if after is None:
+                break
+        self.assertEqual(paged, everything)
+
+    def test_kind_filter(self):
+        items = self.search(q='srch', kind='policy', limit=100)['items']
+        self.assertEqual({row['kind'] for row in items}, {'policy'})
+        self.assertEqual(len(items), 12)
+
+    def test_rejects_short_queries_and_bad_cursors(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'sr'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'srch', 'after': 'nope'}).status_code, 400)
+
+
+TIED_NAME = 'Zephyrine Quillfeather'
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class TrigramSearchTests(TestCase):
+    """
+    The pg_trgm ranking (similarity, the % operator, GREATEST over columns)
+    on servers that have the extension; SearchTests covers the ILIKE
+    fallback.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Checked here rather than with skipUnless: the test database only
+        # exists once the run has started.
+        if not trigram_enabled(DEFAULT_DB_ALIAS):
+            raise SkipTest('pg_trgm is not installed')
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        # Six customers and a policy match exactly, so they tie at rank 1,
+        # within a kind and across kinds; a misspelt name only matches
+        # through the % operator.
+        cls.tied = [
+            Customer.objects.create(full_name=TIED_NAME, tax_number=f'trgm-tax-{i}', date_of_birth=date(1980, 1, 1),
+                                    email=f'trgm{i}@example.com', phone='+380500000000', address='1 Test St.')
+            for i in range(6)
+        ]
+        cls.policy = InsurancePolicy.objects.create(policy_number=TIED_NAME.lower(), policy_type='auto',
+                                                    start_date=date(2024, 1, 1), premium=Decimal('100'),
+                                                    coverage_amount=Decimal('10000'), customer=cls.tied[0])
+        cls.misspelt = Customer.objects.create(full_name='Zephyrina Quilfeather', tax_number='trgm-tax-misspelt',
+                                               date_of_birth=date(1980, 1, 1), email='trgm.misspelt@example.com',
+                                               phone='+380500000000', address='1 Test St.')
+        cls.user = User.objects.create_user('trigram-searcher', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', dict(q=TIED_NAME, **params))
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_exact_matches_tie_ahead_of_similar_ones(self):
+        items = self.search(limit=100)['items']
+        expected = [('customer', c.id) for c in self.tied] + [('policy', self.policy.id)]
+        self.assertEqual([(row['kind'], row['id']) for row in items[:7]], expected)
+        self.assertEqual({row['rank'] for row in items[:7]}, {1.0})
+        misspelt = next(row for row in items if row['id'] == self.misspelt.id and row['kind'] == 'customer')
+        self.assertLess(misspelt['rank'], 1.0)
+
+    def test_rank_is_the_best_column_similarity(self):
+        rows = {row['id']: row['rank'] for row in self.search(kind='customer', limit=100)['items']}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT GREATEST(similarity(full_name, %s), similarity(email, %s), similarity(tax_number, %s))'
+                '::float8 FROM customer WHERE id = %s',
+                [TIED_NAME, TIED_NAME, TIED_NAME, self.misspelt.id],
+            )
+            self.assertEqual(rows[self.misspelt.id], cursor.fetchone()[0])
+
+    def test_pages_through_tied_ranks_without_gaps_or_repeats(self):
+        everything = [(row['kind'], row['id']) for row in self.search(limit=100)['items']]
+        for limit in (1, 2, 3):
+            paged, after = [], None
+            while True:
+                page = self.search(limit=limit, **({'after': after} if after else {}))
+                paged += [(row['kind'], row['id']) for row in page['items']]
+                after = page['next']
+                if after is None:
+                    break
+            self.assertEqual(paged, everything, f'limit={limit}')
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = build_dataset(customers=12, policies_per_customer=1, claims_per_policy=2, hot_claims=0,
+                                    prefix='auto')
+        cls.user = User.objects.create_user('completer', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def complete(self, kind, q):
+        response = self.client.get('/api/autocomplete/', {'kind': kind, 'q': q})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['items']
+
+    def test_customers_are_labelled_and_limited(self):
+        items = self.complete('customer', 'auto')
+        self.assertEqual(len(items), 10)
+        customers = {c.id: c for c in self.dataset.customers}
+        for item in items:
+            customer = customers[item['id']]
+            self.assertEqual(item['label'], f'{customer.full_name} ({customer.tax_number})')
+
+    def test_policy_by_number(self):
+        policy = self.dataset.policies[3]
+        self.assertEqual(self.complete('policy', policy.policy_number)[0],
+                         {'id': policy.id, 'label': policy.policy_number})
+
+    def test_claim_by_id(self):
+        claim = self.dataset.claims[5]
+        label = f'Claim {claim.id} — {claim.policy.policy_number}'
+        self.assertIn({'id': claim.id, 'label': label}, self.complete('claim', str(claim.id)))
+
+    def test_claims_by_policy_number(self):
+        policy = self.dataset.policies[2]
+        claims = sorted((c for c in self.dataset.claims if c.policy_id == policy.id),
+                        key=lambda c: (c.claim_date, c.id), reverse=True)
+        self.assertEqual(self.complete('claim', policy.policy_number),
+                         [{'id': c.id, 'label': f'Claim {c.id} — {policy.policy_number}'} for c in claims])
+
+    def test_short_queries_return_nothing(self):
+        self.assertEqual(self.complete('customer', 'au'), [])
+        self.assertEqual(self.complete('policy', 'AU'), [])
+        self.assertEqual(self.complete('claim', 'au'), [])
+
+    def test_unknown_kind(self):
+        self.assertEqual(self.client.get('/api/autocomplete/', {'kind': 'payment', 'q': 'auto'}).status_code, 400)
@@ -0,0 +1,16 @@
+from django.test import SimpleTestCase
+
+from insurance.parallel_db.search import STRATEGIES, SearchStrategy
+
+
+class SearchStrategyTests(SimpleTestCase):
+    def test_strategy_without_search_cannot_be_created(self):
+        class Incomplete(SearchStrategy):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_registered_strategies_can_be_created(self):
+        for name, strategy in STRATEGIES.items():
+            self.assertEqual(strategy().name, name)
@@ -0,0 +1,132 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from insurance.api_view.customer_view import SUMMARY_CACHE
+
+from insurance.model.claim import Claim
+from insurance.model.customer import Customer
+from insurance.model.insurance_policy import InsurancePolicy
+from insurance.model.payment import Payment
+from insurance.repository.unit_of_work import UnitOfWork
+
+
+def make_customer(n):
+    return Customer.objects.create(full_name=f'Summary Customer {n}', tax_number=f'sum-tax-{n}',
+                                   date_of_birth=date(1980, 1, 1), email=f'summary{n}@example.com',
+                                   phone='+380500000000', address='1 Test St.')
+
+
+def make_policy(customer, number):
+    return InsurancePolicy.objects.create(policy_number=number, policy_type='auto', start_date=date(2024, 1, 1),
+                                          premium=Decimal('100'), coverage_amount=Decimal('10000'),
+                                          customer=customer)
+
+
+def make_claim(policy, amount, *payments):
+    claim = Claim.objects.create(policy=policy, claim_date=date(2024, 3, 1), amount=Decimal(amount),
+                                 description='Summary test')
+    for i, paid in enumerate(payments, 1):
+        Payment.objects.create(claim=claim, amount=Decimal(paid), date=date(2024, 4, i))
+    return claim
+
+
+class SummaryTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer(1)
+        cls.empty = make_policy(cls.customer, 'SUM-EMPTY')
+        cls.busy = make_policy(cls.customer, 'SUM-BUSY')
+        cls.single = make_policy(cls.customer, 'SUM-SINGLE')
+        # busy: claimed 1000 + 500 + 200, paid 300 + 200 + 500 (+ nothing on the last claim)
+        cls.busy_claim = make_claim(cls.busy, '1000.00', '300.00', '200.00')
+        make_claim(cls.busy, '500.00', '500.00')
+        make_claim(cls.busy, '200.00')
+        # single: claimed 50, paid 10 + 15
+        make_claim(cls.single, '50.00', '10.00', '15.00')
+        # Another customer's rows must not leak into the totals.
+        other = make_policy(make_customer(2), 'SUM-OTHER')
+        make_claim(other, '999.00', '999.00')
+
+    def summary(self):
+        with UnitOfWork(read_only=True) as repo:
+            return repo.customers.get_summary(self.customer.id)
+
+    def test_customer_totals(self):
+        customer = self.summary()
+        self.assertEqual(customer.policies_count, 3)
+        self.assertEqual(customer.claims_count, 4)
+        self.assertEqual(customer.total_claimed, Decimal('1750.00'))
+        self.assertEqual(customer.total_paid, Decimal('1025.00'))
+        self.assertEqual(customer.outstanding, Decimal('725.00'))
+
+    def test_policy_totals(self):
+        totals = {p.policy_number: (p.claims_count, p.total_claimed, p.total_paid, p.outstanding)
+                  for p in self.summary().summary_policies}
+        self.assertEqual(totals, {
+            'SUM-EMPTY': (0, Decimal('0'), Decimal('0'), Decimal('0')),
+            'SUM-BUSY': (3, Decimal('1700.00'), Decimal('1000.00'), Decimal('700.00')),
+            'SUM-SINGLE': (1, Decimal('50.00'), Decimal('25.00'), Decimal('25.00')),
+        })
+
+    def test_missing_customer(self):
+        with UnitOfWork(read_only=True) as repo:
+            self.assertIsNone(repo.customers.get_summary(0))
+
+    def test_claim_full_view_payments_total(self):
+        with UnitOfWork(read_only=True) as repo:
+            claim = repo.claims.get_full_view(self.busy_claim.id)
+        self.assertEqual(claim.payments_total, Decimal('500.00'))
+        self.assertEqual([p.amount for p in claim.payments.all()], [Decimal('300.00'), Decimal('200.00')])
+        self.assertEqual(claim.policy.customer.id, self.customer.id)
+
+    def test_claim_full_view_without_payments(self):
+        claim = Claim.objects.get(policy=self.busy, amount=Decimal('200.00'))
+        with UnitOfWork(read_only=True) as repo:
+            self.assertEqual(repo.claims.get_full_view(claim.id).payments_total, Decimal('0'))
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class CachedSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer(3)
+        make_claim(make_policy(cls.customer, 'SUM-CACHED'), '400.00', '100.00')
+        cls.user = User.objects.create_user('summary-reader', password='x')
+
+    def setUp(self):
+        caches[SUMMARY_CACHE].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.path = f'/api/customers/{self.customer.id}/summary/cached/'
+
+    def get(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_a_cached_summary_is_served_from_the_cache(self):
+        first = self.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get(), first)
+        # Only the shared cache's lookup; none of the summary's aggregates.
+        self.assertEqual(len(queries), 1)
+        self.assertIn('customer_summary_cache', queries[0]['sql'])
+        self.assertEqual((first['total_claimed'], first['total_paid']), ('400.00', '100.00'))
+
+    def test_an_update_drops_the_cached_summary(self):
+        self.get()
+        response = self.client.patch(f'/api/customers/{self.customer.id}/', {'full_name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.get()['full_name'], 'Renamed')
+
+    def test_a_delete_drops_the_cached_summary(self):
+        self.get()
+        self.assertEqual(self.client.delete(f'/api/customers/{self.customer.id}/').status_code, 204)
+        self.assertEqual(self.client.get(self.path).status_code, 404)
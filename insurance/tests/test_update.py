@@ -0,0 +1,42 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from insurance.model.customer import Customer
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={})
+class RepositoryUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(full_name='Update Customer', tax_number='upd-tax-1',
+                                               date_of_birth=date(1980, 1, 1), email='update@example.com',
+                                               phone='+380500000000', address='1 Update St.')
+        cls.user = User.objects.create_user('updater', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_invalid_data_on_a_missing_id_is_not_found(self):
+        missing = Customer.objects.order_by('-id').values_list('id', flat=True).first() + 1
+        for method in (self.client.put, self.client.patch):
+            response = method(f'/api/customers/{missing}/', {'email': 'not an email'}, format='json')
+            self.assertEqual(response.status_code, 404, response.content)
+            self.assertEqual(response.json(), {'error': 'Customer not found'})
+
+    def test_a_non_numeric_id_is_not_found(self):
+        response = self.client.patch('/api/customers/abc/', {'phone': '+380501112233'}, format='json')
+        self.assertEqual(response.status_code, 404, response.content)
+
+    def test_invalid_data_on_an_existing_row(self):
+        response = self.client.patch(f'/api/customers/{self.customer.id}/', {'email': 'not an email'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+    def test_valid_data_on_a_missing_id(self):
+        response = self.client.patch(f'/api/customers/{self.customer.id + 10 ** 6}/', {'phone': '+380501112233'},
+                                     format='json')
+        self.assertEqual(response.status_code, 404)
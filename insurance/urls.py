@@ -8,6 +8,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from insurance.api_view.register_view import RegisterView
+from insurance.api_view.metrics_view import metrics_view
 from insurance.template_view import (
     InsurancePolicyListView,
     InsurancePolicyDetailView,
@@ -51,6 +52,7 @@ urlpatterns = [
     path('api/register/', RegisterView.as_view(), name='register'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics', metrics_view, name='metrics'),
 
     path('analytics/dashboard/v1', AnalyticsDashboardV1View.as_view(), name='analytics_dashboard_v1'),
     path('analytics/dashboard/v2', AnalyticsDashboardV2View.as_view(), name='analytics_dashboard_v2'),